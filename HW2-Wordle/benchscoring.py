@@ -0,0 +1,71 @@
+# ----------------------------------------------------------------------
+# Name:      benchscoring
+# Purpose:   benchmark batch scoring against the check function
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Benchmarks scoring.score_matrix against calling wordle.check per pair
+
+A list of random 5-letter words is generated (drawn from a reduced
+alphabet so that repeated letters are common), the full guess x answer
+feedback matrix is computed with NumPy, and check is timed on a sample
+of the rows to estimate how long the same matrix takes one pair at a
+time.  The sampled rows are compared code by code with check.
+
+usage: benchscoring.py [-h] [-n WORDS] [-s SAMPLE]
+"""
+import argparse
+import random
+import time
+import scoring
+import wordle
+
+
+def random_words(count, alphabet='AEIOURSTLNCDPMHGBY', seed=122):
+    """
+    Generate distinct random 5-letter words.
+    :param count: (integer) how many words to generate
+    :param alphabet: (string) the letters to draw from
+    :param seed: (integer) seed of the random generator
+    :return: (list of strings) the words in upper case
+    """
+    generator = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add(''.join(generator.choice(alphabet) for letter in
+                          range(scoring.WORD_LENGTH)))
+    return sorted(words)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--words', type=int, default=5000,
+                        help='number of guesses and answers')
+    parser.add_argument('-s', '--sample', type=int, default=50,
+                        help='rows of the matrix to score with check')
+    arguments = parser.parse_args()
+    words = random_words(arguments.words)
+
+    start = time.perf_counter()
+    codes = scoring.score_matrix(words, words)
+    batch = time.perf_counter() - start
+
+    sample = words[:arguments.sample]
+    start = time.perf_counter()
+    expected = [[scoring.code_from_check(wordle.check(answer, guess))
+                 for answer in words] for guess in sample]
+    per_row = (time.perf_counter() - start) / len(sample)
+    same = codes[:len(sample)].tolist() == expected
+
+    pairs = len(words) ** 2
+    print(f'{len(words)} x {len(words)} matrix ({pairs:,} pairs)')
+    print(f'  score_matrix: {batch:8.2f} s  '
+          f'{batch / pairs * 1e9:6.1f} ns/pair')
+    print(f'  check (est.): {per_row * len(words):8.2f} s  '
+          f'{per_row / len(words) * 1e9:6.1f} ns/pair  '
+          f'speedup {per_row * len(words) / batch:5.0f}x')
+    print(f'  sampled rows {"match" if same else "DIFFER FROM"} check')
+
+
+if __name__ == '__main__':
+    main()
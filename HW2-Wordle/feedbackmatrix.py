@@ -0,0 +1,117 @@
+# ----------------------------------------------------------------------
+# Name:      feedbackmatrix
+# Purpose:   precompute and cache the feedback of every guess and answer
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Precomputed guess x answer feedback matrix cached on disk
+
+The feedback code of every word of a list guessed against every other
+word is computed once with scoring.score_matrix and saved as a .npy
+file named after a hash of the word list.  Later processes using the
+same word list memory-map the file instead of computing it again, so
+hints, solvers and statistics look feedback codes up in the matrix
+rather than calling check.
+
+usage: feedbackmatrix.py [-h] [-c CACHE] filename
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import numpy as np
+import scoring
+import wordindex
+
+CACHE_FOLDER = wordindex.CACHE_FOLDER
+
+
+def word_list_key(words):
+    """
+    Return the hash identifying a word list.
+    :param words: (list of strings) the words in upper case
+    :return: (string) hexadecimal sha1 of the words
+    """
+    return hashlib.sha1('\n'.join(words).encode('ascii')).hexdigest()
+
+
+class FeedbackMatrix:
+    """
+    The feedback codes of a list of words guessed against each other.
+
+    Arguments:
+    words (list of strings): the words in upper case, repeats allowed
+    folder (string): folder of the cached matrices or None to compute
+                     the matrix in memory without caching it
+
+    Attributes:
+    folder (string): folder of the cached matrices or None
+    words (list of strings): the distinct words in sorted order
+    index (dictionary): word: row and column of the word in codes
+    key (string): hash of the word list
+    codes (numpy array): uint8 matrix, codes[guess, answer] is the
+                         feedback code of the guess for that answer
+    """
+
+    def __init__(self, words, folder=CACHE_FOLDER):
+        self.folder = folder
+        self.words = sorted(set(words))
+        self.index = {word: position for position, word in
+                      enumerate(self.words)}
+        self.key = word_list_key(self.words)
+        if folder is None:
+            self.codes = scoring.score_matrix(self.words, self.words)
+        else:
+            self.codes = self.load(folder)
+
+    def load(self, folder):
+        """
+        Memory-map the cached matrix, computing and saving it first if
+        this word list has not been cached yet.
+        :param folder: (string) folder of the cached matrices
+        :return: (numpy array) the read-only memory-mapped matrix
+        """
+        path = os.path.join(folder, self.key + '.npy')
+        if not os.path.exists(path):
+            os.makedirs(folder, exist_ok=True)
+            codes = scoring.score_matrix(self.words, self.words)
+            # Write to a temporary file first so that a process never
+            # maps a partially written matrix
+            descriptor, temp_path = tempfile.mkstemp(dir=folder)
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                np.save(temp_file, codes)
+            os.replace(temp_path, path)
+        return np.load(path, mmap_mode='r')
+
+    def code(self, guess, answer):
+        """
+        Return the feedback code of a guess for the answer specified.
+        :param guess: (string) a word of the list in upper case
+        :param answer: (string) a word of the list in upper case
+        :return: (integer) the feedback code
+        """
+        return int(self.codes[self.index[guess], self.index[answer]])
+
+    def __len__(self):
+        return len(self.words)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', help='file to read the words from')
+    parser.add_argument('-c', '--cache',
+                        help='folder of the cached matrices (default: '
+                             f'{CACHE_FOLDER} next to the file)')
+    arguments = parser.parse_args()
+    index = wordindex.WordIndex(arguments.filename, arguments.cache)
+    words = index.words()
+    start = time.perf_counter()
+    matrix = FeedbackMatrix(words, index.folder)
+    elapsed = time.perf_counter() - start
+    print(f'{len(matrix)} words, matrix {matrix.key}.npy '
+          f'ready in {elapsed * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
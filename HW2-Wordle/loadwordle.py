@@ -0,0 +1,130 @@
+# ----------------------------------------------------------------------
+# Name:      loadwordle
+# Purpose:   load test the wordle server with many concurrent sessions
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Load test client for server.py
+
+Opens many connections to a running wordle server at once and plays
+games on all of them concurrently, each guess being a random word of
+the list.  The latency of every request is recorded and the throughput
+and latency percentiles are printed at the end.
+
+usage: loadwordle.py [-h] [-c CONNECTIONS] [-g GAMES] [--host HOST]
+                     [-p PORT | -u UNIX] filename
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import server
+import wordindex
+
+
+async def play_session(open_connection, words, games, latencies):
+    """
+    Play games over one connection, recording each request latency.
+    :param open_connection: (function) opens a connection to the server
+    :param words: (list of strings) the words to guess from
+    :param games: (integer) number of games to play
+    :param latencies: (list of floats) receives the latencies in seconds
+    :return: (integer) number of games won
+    """
+    reader, writer = await open_connection()
+    won = 0
+    try:
+        await reader.readline()  # the first game starts right away
+        for game in range(games):
+            if game:
+                await request(reader, writer, 'NEW', latencies)
+            while True:
+                reply = await request(reader, writer, random.choice(words),
+                                      latencies)
+                if reply.startswith(('WIN', 'LOSE', 'ERROR')):
+                    won += reply.startswith('WIN')
+                    break
+        await request(reader, writer, 'QUIT', latencies)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:  # the server may have closed the socket first
+            pass
+    return won
+
+
+async def request(reader, writer, line, latencies):
+    """
+    Send one request and wait for its reply.
+    :param reader: (StreamReader) the replies of the server
+    :param writer: (StreamWriter) the requests to the server
+    :param line: (string) the request
+    :param latencies: (list of floats) receives the latency in seconds
+    :return: (string) the reply
+    """
+    start = time.perf_counter()
+    writer.write(f'{line}\n'.encode('ascii'))
+    reply = await reader.readline()
+    latencies.append(time.perf_counter() - start)
+    if not reply:
+        raise ConnectionError('the server closed the connection')
+    return reply.decode('ascii').rstrip('\n')
+
+
+async def load_test(open_connection, words, connections, games):
+    """
+    Play games on many connections at once.
+    :param open_connection: (function) opens a connection to the server
+    :param words: (list of strings) the words to guess from
+    :param connections: (integer) number of concurrent sessions
+    :param games: (integer) number of games played by each session
+    :return: a tuple (games won, list of latencies in seconds)
+    """
+    latencies = []
+    results = await asyncio.gather(*(
+        play_session(open_connection, words, games, latencies)
+        for connection in range(connections)))
+    return sum(results), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', help='file to read the guesses from')
+    parser.add_argument('-c', '--connections', type=int, default=1000,
+                        help='number of concurrent sessions')
+    parser.add_argument('-g', '--games', type=int, default=5,
+                        help='games played by each session')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address of the server')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-p', '--port', type=int, default=server.PORT,
+                       help='TCP port of the server')
+    group.add_argument('-u', '--unix', help='Unix socket of the server')
+    arguments = parser.parse_args()
+    words = wordindex.WordIndex(arguments.filename).words()
+
+    def open_connection():
+        if arguments.unix:
+            return asyncio.open_unix_connection(arguments.unix)
+        return asyncio.open_connection(arguments.host, arguments.port)
+
+    start = time.perf_counter()
+    won, latencies = asyncio.run(load_test(open_connection, words,
+                                           arguments.connections,
+                                           arguments.games))
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f'{arguments.connections} sessions, '
+          f'{arguments.connections * arguments.games} games ({won} won), '
+          f'{len(latencies)} requests in {elapsed:.2f} s '
+          f'({len(latencies) / elapsed:.0f} requests/s)')
+    print(f'latency ms: p50 {percentiles[49] * 1000:.2f}  '
+          f'p90 {percentiles[89] * 1000:.2f}  '
+          f'p99 {percentiles[98] * 1000:.2f}  '
+          f'max {max(latencies) * 1000:.2f}')
+
+
+if __name__ == '__main__':
+    main()
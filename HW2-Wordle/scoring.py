@@ -0,0 +1,139 @@
+# ----------------------------------------------------------------------
+# Name:      scoring
+# Purpose:   score many wordle guesses against many answers at once
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Batch scoring of wordle guesses with NumPy
+
+The check function in wordle.py scores one guess against one answer and
+returns a colored string.  Solvers and statistics need the feedback of
+every guess against every possible answer, so this module scores whole
+arrays of words at once and returns compact integer feedback codes.
+
+A feedback code packs the color of each of the 5 letters as a base-3
+digit: 0 for red, 1 for yellow and 2 for green, the first letter being
+the least significant digit.  Codes range from 0 (all red) to 242 (all
+green) and fit in a uint8.  Repeated letters are scored exactly like
+check: greens are taken first, then yellows from left to right while
+the answer has unmatched copies of the letter left.
+"""
+import numpy as np
+import wordle
+
+WORD_LENGTH = 5
+ALL_GREEN = 3 ** WORD_LENGTH - 1  # 242, the code of a correct guess
+PLACE_VALUES = 3 ** np.arange(WORD_LENGTH, dtype=np.uint8)
+LETTERS = 'RYG'  # letter of each digit, as in wordle.pattern_from_check
+
+
+def to_matrix(words):
+    """
+    Convert a list of 5-letter words to a matrix of letter numbers.
+    :param words: (list of strings) uppercase 5-letter words
+    :return: (numpy array) uint8 matrix of shape (len(words), 5) with
+             0 for A up to 25 for Z
+    """
+    letters = np.frombuffer(''.join(words).encode('ascii'), dtype=np.uint8)
+    return (letters - ord('A')).reshape(-1, WORD_LENGTH)
+
+
+def letter_counts(answers):
+    """
+    Count how many times each letter appears in each answer.
+    :param answers: (numpy array) letter matrix of shape (m, 5)
+    :return: (numpy array) uint8 matrix of shape (26, m)
+    """
+    counts = np.zeros((26, len(answers)), dtype=np.uint8)
+    columns = np.arange(len(answers))
+    for position in range(WORD_LENGTH):
+        np.add.at(counts, (answers[:, position], columns), 1)
+    return counts
+
+
+def score_block(guesses, answers, counts):
+    """
+    Score a block of guesses against every answer.
+    :param guesses: (numpy array) letter matrix of shape (n, 5)
+    :param answers: (numpy array) letter matrix of shape (m, 5)
+    :param counts: (numpy array) letter_counts of the answers
+    :return: (numpy array) uint8 feedback codes of shape (n, m)
+    """
+    green = [guesses[:, [i]] == answers[:, i] for i in range(WORD_LENGTH)]
+    # same[g, i, j]: letters i and j of guess g are the same letter
+    same = guesses[:, :, None] == guesses[:, None, :]
+    codes = np.zeros((len(guesses), len(answers)), dtype=np.uint8)
+    for i in range(WORD_LENGTH):
+        # Copies of letter i left in the answer once the greens are out,
+        # and rank of letter i among the non-green copies in the guess
+        available = counts[guesses[:, i]]
+        rank = np.zeros_like(available)
+        for j in range(WORD_LENGTH):
+            repeat = same[:, [i], j]
+            available -= repeat & green[j]
+            if j <= i:
+                rank += repeat & ~green[j]
+        # Like check: yellow while the answer still has unmatched copies
+        yellow = ~green[i] & (rank <= available)
+        codes += PLACE_VALUES[i] * (green[i] * np.uint8(2) + yellow)
+    return codes
+
+
+def score_matrix(guesses, answers, block_bytes=64 * 2 ** 20):
+    """
+    Score every guess against every answer.
+    :param guesses: (list of strings or numpy array) the guesses
+    :param answers: (list of strings or numpy array) the answers
+    :param block_bytes: (integer) approximate memory used per block of
+                        guesses scored together
+    :return: (numpy array) uint8 feedback codes of shape
+             (len(guesses), len(answers))
+    """
+    if not isinstance(guesses, np.ndarray):
+        guesses = to_matrix(guesses)
+    if not isinstance(answers, np.ndarray):
+        answers = to_matrix(answers)
+    counts = letter_counts(answers)
+    codes = np.empty((len(guesses), len(answers)), dtype=np.uint8)
+    # score_block needs about 16 bytes per guess and answer pair
+    block = max(1, block_bytes // (16 * max(len(answers), 1)))
+    for start in range(0, len(guesses), block):
+        codes[start:start + block] = score_block(
+            guesses[start:start + block], answers, counts)
+    return codes
+
+
+def score(wordle_word, guess):
+    """
+    Return the feedback code of a single guess.
+    :param wordle_word: (string) the mystery word in upper case
+    :param guess: (string) the guess in upper case
+    :return: (integer) the feedback code
+    """
+    return int(score_matrix([guess], [wordle_word])[0, 0])
+
+
+def code_from_check(colored):
+    """
+    Convert the colored string returned by check to a feedback code.
+    :param colored: (string) the result of wordle.check
+    :return: (integer) the feedback code
+    """
+    code = 0
+    # The first letter is the least significant digit
+    for letter in reversed(wordle.pattern_from_check(colored)):
+        code = code * 3 + LETTERS.index(letter)
+    return code
+
+
+def pattern(code):
+    """
+    Spell out a feedback code with R, Y and G letters.
+    :param code: (integer) the feedback code
+    :return: (string) for example 'GRRYG'
+    """
+    letters = []
+    for position in range(WORD_LENGTH):
+        code, digit = divmod(int(code), 3)
+        letters.append(LETTERS[digit])
+    return ''.join(letters)
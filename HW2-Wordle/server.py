@@ -0,0 +1,213 @@
+# ----------------------------------------------------------------------
+# Name:      server
+# Purpose:   host many wordle games over TCP or a local socket
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Asyncio wordle server
+
+Every connection is a session playing one game after another.  The
+words are read from the word index once when the server starts and are
+shared by all the sessions, each session choosing its own mystery word
+and scoring the guesses with wordle.check.  The protocol is one line of
+ASCII text per request and per reply:
+
+    server: WORDLE 6              a new game has started, 6 attempts
+    client: crane                 a 5-letter guess, in any case
+    server: RRYGR 1               the colors of attempt 1: Red, Yellow,
+                                  Green for each letter
+    server: WIN 3 Impressive!     the guess was right on attempt 3
+    server: LOSE RRGYR MIGHT      attempt 6 was wrong, the word was MIGHT
+    client: NEW                   start a new game (answered WORDLE 6)
+    client: QUIT                  close the session (answered BYE)
+    server: ERROR message         the request could not be handled
+
+Thousands of sessions can be served by one process as long as the limit
+on open files (ulimit -n) allows that many sockets.
+
+usage: server.py [-h] [--host HOST] [-p PORT | -u UNIX] filename
+"""
+import argparse
+import asyncio
+import random
+import wordindex
+import wordle
+
+LINE_LIMIT = 256  # longest request accepted, in bytes
+PORT = 12200
+
+
+class Session:
+    """
+    The games played over one connection.
+
+    Arguments:
+    words (list of strings): the words to choose the wordles from
+    generator (Random): the random number generator choosing the words
+
+    Attributes:
+    words (list of strings): the words to choose the wordles from
+    generator (Random): the random number generator choosing the words
+    wordle (string): the word to guess, or None between games
+    attempt (integer): number of guesses made in the current game
+    """
+
+    def __init__(self, words, generator=random):
+        self.words = words
+        self.generator = generator
+        self.wordle = None
+        self.attempt = 0
+
+    def new_game(self):
+        """
+        Choose a new mystery word.
+        :return: (string) the reply announcing the game
+        """
+        self.wordle = self.generator.choice(self.words)
+        self.attempt = 0
+        return f'WORDLE {wordle.MAX_ATTEMPTS}'
+
+    def guess(self, word):
+        """
+        Score a guess of the current game.
+        :param word: (string) a 5-letter guess
+        :return: (string) the reply to the guess
+        """
+        if self.wordle is None:
+            return 'ERROR no game in progress, send NEW'
+        if not (word.isalpha() and word.isascii() and len(word) == 5):
+            return 'ERROR the guess must be 5 letters'
+        word = word.upper()
+        self.attempt += 1
+        colored = wordle.check(self.wordle, word)
+        pattern = wordle.pattern_from_check(colored)
+        if word == self.wordle:
+            self.wordle = None
+            return f'WIN {self.attempt} {wordle.FEEDBACK[self.attempt]}'
+        if self.attempt == wordle.MAX_ATTEMPTS:
+            answer, self.wordle = self.wordle, None
+            return f'LOSE {pattern} {answer}'
+        return f'{pattern} {self.attempt}'
+
+    def respond(self, line):
+        """
+        Handle one request line.
+        :param line: (string) the request without its line ending
+        :return: (string) the reply, or None to close the session
+        """
+        request = line.strip()
+        command = request.upper()
+        if command == 'QUIT':
+            return None
+        if command == 'NEW':
+            return self.new_game()
+        return self.guess(request)
+
+
+class WordleServer:
+    """
+    Serves wordle sessions sharing one list of words.
+
+    Arguments:
+    words (list of strings): the words to choose the wordles from
+
+    Attributes:
+    words (list of strings): the words to choose the wordles from
+    sessions (integer): number of sessions currently connected
+    """
+
+    def __init__(self, words):
+        if not words:
+            raise ValueError('no 5-letter word to choose from')
+        self.words = words
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        """
+        Play the games of one connection until it is closed.
+        :param reader: (StreamReader) the requests of the client
+        :param writer: (StreamWriter) the replies to the client
+        :return: None
+        """
+        session = Session(self.words)
+        self.sessions += 1
+        try:
+            writer.write(f'{session.new_game()}\n'.encode('ascii'))
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # the line is longer than LINE_LIMIT
+                    writer.write(b'ERROR request too long\n')
+                    break
+                if not line:
+                    break
+                reply = session.respond(line.decode('ascii', 'replace'))
+                if reply is None:
+                    writer.write(b'BYE\n')
+                    break
+                writer.write(f'{reply}\n'.encode('ascii'))
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host='127.0.0.1', port=PORT, path=None):
+        """
+        Start listening for connections.
+        :param host: (string) the address to listen on
+        :param port: (integer) the TCP port, 0 for any free port
+        :param path: (string) name of a Unix socket to listen on instead
+                     of TCP, or None
+        :return: (asyncio.Server) the listening server
+        """
+        if path:
+            return await asyncio.start_unix_server(self.handle, path,
+                                                   limit=LINE_LIMIT,
+                                                   backlog=1024)
+        return await asyncio.start_server(self.handle, host, port,
+                                          limit=LINE_LIMIT, backlog=1024)
+
+
+async def serve(filename, host, port, path):
+    """
+    Serve the words of a file until interrupted.
+    :param filename: (string) name of the text file of the words
+    :param host: (string) the address to listen on
+    :param port: (integer) the TCP port
+    :param path: (string) name of a Unix socket or None
+    :return: None
+    """
+    game_server = WordleServer(wordindex.WordIndex(filename).words())
+    server = await game_server.start(host, port, path)
+    address = path or '{}:{}'.format(*server.sockets[0].getsockname())
+    print(f'serving {len(game_server.words)} words on {address}')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', help='file to read the words from')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-p', '--port', type=int, default=PORT,
+                       help='TCP port to listen on')
+    group.add_argument('-u', '--unix', help='Unix socket to listen on')
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(arguments.filename, arguments.host,
+                          arguments.port, arguments.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# ----------------------------------------------------------------------
+# Name:      simulate
+# Purpose:   play many headless wordle games with a guessing strategy
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Headless wordle simulations
+
+A strategy plays games through the guesser argument of wordle.play: a
+function given the (guess, colored feedback) history of the game that
+returns the next guess.  The answers are split in batches played by a
+pool of processes, each process loading the word index (and the feedback
+matrix for the entropy strategy) once.  The number of attempts of each
+game is reported with the buckets printed by wordle.feedback, from
+Genius to Phew, plus Lost for the games not guessed in 6 attempts.
+
+usage: simulate.py [-h] [-s {random,entropy}] [-g GAMES] [-P PROCESSES]
+                   [-b BATCH] [--seed SEED] filename
+"""
+import argparse
+import collections
+import concurrent.futures
+import os
+import random
+import time
+import wordindex
+import wordle
+
+try:
+    import feedbackmatrix
+    import solver
+except ImportError:  # the entropy strategy needs NumPy
+    solver = None
+
+LOST = 'Lost'
+BUCKETS = list(wordle.FEEDBACK.values()) + [LOST]
+
+words = []  # the words of the index, loaded once per process
+cache_folder = None  # folder of the index and matrix
+entropy_solver = None  # the Solver of the process, created when needed
+
+
+class ConsistentGuesser:
+    """
+    Guesses a random word fitting all the feedback received so far.
+
+    Arguments:
+    words (list of strings): the possible answers in upper case
+    generator (Random): the random number generator to use
+
+    Attributes:
+    words (list of strings): the possible answers in upper case
+    generator (Random): the random number generator to use
+    candidates (list of strings): the answers fitting the feedback
+    seen (integer): number of history entries applied to candidates
+    """
+
+    def __init__(self, words, generator):
+        self.words = words
+        self.generator = generator
+        self.candidates = words
+        self.seen = 0
+
+    def __call__(self, history):
+        if not history:
+            self.candidates = self.words
+            self.seen = 0
+        for guess, colored in history[self.seen:]:
+            self.candidates = [word for word in self.candidates
+                               if wordle.check(word, guess) == colored]
+        self.seen = len(history)
+        return self.generator.choice(self.candidates)
+
+
+def start_worker(filename, folder):
+    """
+    Load the words of the index in a simulation process.
+    :param filename: (string) name of the text file of the words
+    :param folder: (string) folder holding the index and matrix files
+    :return: None
+    """
+    global words, cache_folder, entropy_solver
+    words = wordindex.WordIndex(filename, folder).words()
+    cache_folder = folder
+    entropy_solver = None
+
+
+def make_guesser(strategy, generator):
+    """
+    Create the guesser of a strategy in a simulation process.
+    :param strategy: (string) 'random' or 'entropy'
+    :param generator: (Random) the random number generator to use
+    :return: (function) the guesser expected by wordle.play
+    """
+    global entropy_solver
+    if strategy == 'random':
+        return ConsistentGuesser(words, generator)
+    if entropy_solver is None:
+        matrix = feedbackmatrix.FeedbackMatrix(words, cache_folder)
+        entropy_solver = solver.Solver(matrix)
+    return entropy_solver.hint
+
+
+def play_batch(strategy, seed, answers):
+    """
+    Play a batch of games in a simulation process.
+    :param strategy: (string) 'random' or 'entropy'
+    :param seed: the seed of the random number generator of the batch
+    :param answers: (list of strings) the wordle of each game
+    :return: (Counter) bucket name: number of games
+    """
+    guesser = make_guesser(strategy, random.Random(seed))
+    buckets = collections.Counter()
+    for answer in answers:
+        attempts = wordle.play(answer, guesser=guesser, verbose=False)
+        buckets[wordle.FEEDBACK.get(attempts, LOST)] += 1
+    return buckets
+
+
+def simulate(filename, strategy='random', games=None, processes=None,
+             batch=100, seed=0, folder=None):
+    """
+    Play many games with a strategy and count the attempts they took.
+    :param filename: (string) name of the text file of the words
+    :param strategy: (string) 'random' or 'entropy'
+    :param games: (integer) number of games with random answers, or None
+                  to play every word of the file once
+    :param processes: (integer) number of simulation processes, None for
+                      one per core or 0 to play in this process
+    :param batch: (integer) number of games sent to a process at a time
+    :param seed: the seed making the simulation reproducible
+    :param folder: (string) folder holding the index and matrix files,
+                   or None for the cache folder next to the text file
+    :return: (Counter) bucket name: number of games
+    """
+    index = wordindex.WordIndex(filename, folder)
+    folder = index.folder
+    answers = index.words()
+    if strategy == 'entropy':
+        # Build the matrix and the opening once before the workers start
+        matrix = feedbackmatrix.FeedbackMatrix(answers, folder)
+        solver.Solver(matrix).suggest()
+    if games is not None:
+        generator = random.Random(seed)
+        answers = [generator.choice(answers) for game in range(games)]
+    # Each batch has its own seed so the results do not depend on the
+    # number of processes
+    batches = [(strategy, f'{seed}-{start}', answers[start:start + batch])
+               for start in range(0, len(answers), batch)]
+    buckets = collections.Counter({name: 0 for name in BUCKETS})
+    if processes == 0:
+        start_worker(filename, folder)
+        for arguments in batches:
+            buckets.update(play_batch(*arguments))
+        return buckets
+    with concurrent.futures.ProcessPoolExecutor(
+            processes, initializer=start_worker,
+            initargs=(filename, folder)) as pool:
+        for result in pool.map(play_batch, *zip(*batches)):
+            buckets.update(result)
+    return buckets
+
+
+def main():
+    strategies = ['random', 'entropy'] if solver else ['random']
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', help='file to read the words from')
+    parser.add_argument('-s', '--strategy', choices=strategies,
+                        default='random', help='how the guesses are made')
+    parser.add_argument('-g', '--games', type=int,
+                        help='games with random answers (default: one '
+                             'game per word)')
+    parser.add_argument('-P', '--processes', type=int,
+                        default=os.cpu_count(),
+                        help='simulation processes, 0 for none')
+    parser.add_argument('-b', '--batch', type=int, default=100,
+                        help='games sent to a process at a time')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random answers and guesses')
+    arguments = parser.parse_args()
+    start = time.perf_counter()
+    buckets = simulate(arguments.filename, arguments.strategy,
+                       arguments.games, arguments.processes,
+                       arguments.batch, arguments.seed)
+    elapsed = time.perf_counter() - start
+    games = sum(buckets.values())
+    print(f'{games} games in {elapsed:.2f} s '
+          f'({games / elapsed:.0f} games/s, {arguments.processes} '
+          f'processes)')
+    for name in BUCKETS:
+        print(f'{name:14}{buckets[name]:8d}'
+              f'{buckets[name] / games * 100:7.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# ----------------------------------------------------------------------
+# Name:      solver
+# Purpose:   suggest wordle guesses that maximize the expected information
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Entropy based wordle solver
+
+The solver keeps the answers still consistent with the feedback received
+so far.  Each word of the list is rated by how evenly it would split
+these candidates by feedback code: the candidates are bucketed with one
+np.bincount over the rows of the feedback matrix, and the word whose
+buckets have the highest entropy (the most bits of information expected)
+is suggested.  Suggesting the opening guess means rating every word
+against every answer, so it is computed once and cached next to the
+feedback matrix of the word list, and the second guesses are remembered
+for each feedback to the opening.  After the opening, a long word list
+only has a pool of guesses rated: the candidates and a fixed sample of
+the other words, at most POOL_SIZE of each, which keeps every guess
+quick however many words the list holds.
+
+Run headless, the solver plays every answer of a word list and reports
+the average number of guesses.
+
+usage: solver.py [-h] [-c CACHE] [-n ANSWERS] filename
+"""
+import argparse
+import collections
+import os
+import tempfile
+import time
+import numpy as np
+import feedbackmatrix
+import scoring
+import wordindex
+
+CODES = scoring.ALL_GREEN + 1  # number of distinct feedback codes
+MAX_GUESSES = 6
+POOL_SIZE = 1000  # most guesses rated after the opening
+
+
+class Solver:
+    """
+    Narrows down the answers and suggests the most informative guess.
+
+    Arguments:
+    matrix (FeedbackMatrix): the feedback codes of the word list
+
+    Attributes:
+    matrix (FeedbackMatrix): the feedback codes of the word list
+    candidates (numpy array): indexes of the answers still possible
+    history (list of tuples): (guess, code) of each guess of the game
+    book (dictionary): tuple of the history: suggestion, for the
+                       opening and second guesses already computed
+    sample (numpy array): sorted indexes of the words always rated
+                          after the opening, all of them for a short list
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.candidates = np.arange(len(matrix))
+        self.history = []
+        self.book = {}
+        # Seeded so that the suggestions do not change from run to run
+        generator = np.random.default_rng(len(matrix))
+        self.sample = np.sort(generator.permutation(len(matrix))[:POOL_SIZE])
+
+    def reset(self):
+        """
+        Start a new game with every word of the list possible.
+        :return: None
+        """
+        self.candidates = np.arange(len(self.matrix))
+        self.history = []
+
+    def update(self, guess, code):
+        """
+        Keep only the candidates that would give the feedback received.
+        :param guess: (string) the guess in upper case
+        :param code: (integer) the feedback code of the guess
+        :return: None
+        """
+        if guess in self.matrix.index:
+            codes = self.matrix.codes[self.matrix.index[guess],
+                                      self.candidates]
+        else:
+            words = [self.matrix.words[answer] for answer in
+                     self.candidates]
+            codes = scoring.score_matrix([guess], words)[0]
+        self.candidates = self.candidates[codes == code]
+        self.history.append((guess, code))
+
+    def pool(self):
+        """
+        Choose the guesses worth rating after the opening.
+        :return: (numpy array) sorted indexes of the candidates, or of an
+                 evenly spread POOL_SIZE of them, and of the sample
+        """
+        candidates = self.candidates
+        if len(candidates) > POOL_SIZE:
+            step = len(candidates) / POOL_SIZE
+            candidates = candidates[(np.arange(POOL_SIZE) * step)
+                                    .astype(np.intp)]
+        return np.union1d(candidates, self.sample)
+
+    def ratings(self, guesses=None, block_bytes=2 ** 20):
+        """
+        Rate words of the list as guesses for the candidates.
+        :param guesses: (numpy array) indexes of the words to rate, or
+                        None to rate every word of the list
+        :param block_bytes: (integer) approximate memory used per block
+                            of guesses rated together
+        :return: (numpy array) the expected information of each guess
+                 in bits, plus 1 / len(candidates) for the candidates,
+                 the chance of winning with that guess
+        """
+        if guesses is None:
+            guesses = np.arange(len(self.matrix))
+        total = len(self.candidates)
+        # c * log2(c) for every possible bucket size c
+        sizes = np.arange(total + 1)
+        size_logs = sizes * np.log2(np.maximum(sizes, 1))
+        ratings = np.empty(len(guesses))
+        block = max(1, block_bytes // (8 * max(total, CODES)))
+        for start in range(0, len(guesses), block):
+            chunk = guesses[start:start + block]
+            codes = self.matrix.codes[chunk[:, None], self.candidates]
+            rows = len(codes)
+            # Give the codes of each row their own range of bins so
+            # that a single bincount buckets every row at once
+            offsets = np.arange(0, rows * CODES, CODES, dtype=np.intp)
+            counts = np.bincount((codes + offsets[:, None]).ravel(),
+                                 minlength=rows * CODES)
+            # Entropy of the buckets: log2(N) - sum(c * log2(c)) / N,
+            # summed over the non-empty buckets only
+            buckets = np.flatnonzero(counts)
+            sums = np.bincount(buckets // CODES,
+                               weights=size_logs[counts[buckets]],
+                               minlength=rows)
+            ratings[start:start + rows] = np.log2(total) - sums / total
+        ratings[np.isin(guesses, self.candidates,
+                        assume_unique=True)] += 1 / total
+        return ratings
+
+    def suggest(self):
+        """
+        Return the guess expected to give the most information.
+        :return: (string) the suggested guess in upper case or None if
+                 no answer is consistent with the feedback
+        """
+        if len(self.candidates) <= 2:
+            if not len(self.candidates):
+                return None
+            return self.matrix.words[self.candidates[0]]
+        # The first two guesses only depend on the feedback to the
+        # opening guess, so they are worth remembering across games
+        key = tuple(self.history)
+        if key in self.book:
+            return self.book[key]
+        if not key:
+            guess = self.opening()
+        else:
+            guesses = self.pool()
+            guess = self.matrix.words[
+                guesses[int(np.argmax(self.ratings(guesses)))]]
+        if len(key) <= 1:
+            self.book[key] = guess
+        return guess
+
+    def opening(self):
+        """
+        Return the opening guess, rating every word of the list only if
+        it is not saved next to the feedback matrix yet.
+        :return: (string) the opening guess in upper case
+        """
+        if self.matrix.folder is None:
+            return self.matrix.words[int(np.argmax(self.ratings()))]
+        path = os.path.join(self.matrix.folder, self.matrix.key + '.opening')
+        try:
+            with open(path, encoding='UTF-8') as opening_file:
+                guess = opening_file.read().strip()
+        except OSError:
+            guess = None
+        if guess in self.matrix.index:
+            return guess
+        # A missing, partial or stale file: rate the words again
+        guess = self.matrix.words[int(np.argmax(self.ratings()))]
+        descriptor, temp_path = tempfile.mkstemp(dir=self.matrix.folder)
+        with os.fdopen(descriptor, 'w', encoding='UTF-8') as opening_file:
+            opening_file.write(guess + '\n')
+        os.replace(temp_path, path)
+        return guess
+
+    def hint(self, history):
+        """
+        Suggest a guess given the feedback of the guesses so far.
+        :param history: (list of tuples) (guess, colored string returned
+                        by wordle.check) of each guess of the game
+        :return: (string) the suggested guess in upper case or None
+        """
+        self.reset()
+        for guess, colored in history:
+            self.update(guess, scoring.code_from_check(colored))
+        return self.suggest()
+
+    def solve(self, answer):
+        """
+        Play a game against the answer specified with the suggestions.
+        :param answer: (string) a word of the list in upper case
+        :return: (integer) the number of guesses needed
+        """
+        self.reset()
+        target = self.matrix.index[answer]
+        guesses = 0
+        while True:
+            guess = self.suggest()
+            guesses += 1
+            code = int(self.matrix.codes[self.matrix.index[guess], target])
+            if code == scoring.ALL_GREEN:
+                return guesses
+            self.update(guess, code)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', help='file to read the words from')
+    parser.add_argument('-c', '--cache',
+                        help='folder of the cached matrices (default: '
+                             f'{wordindex.CACHE_FOLDER} next to the file)')
+    parser.add_argument('-n', '--answers', type=int,
+                        help='only play the first ANSWERS answers')
+    arguments = parser.parse_args()
+    index = wordindex.WordIndex(arguments.filename, arguments.cache)
+    matrix = feedbackmatrix.FeedbackMatrix(index.words(), index.folder)
+    solver = Solver(matrix)
+    start = time.perf_counter()
+    print(f'opening guess {solver.suggest()} '
+          f'({(time.perf_counter() - start) * 1000:.1f} ms)')
+    answers = matrix.words[:arguments.answers]
+    start = time.perf_counter()
+    guesses = collections.Counter(solver.solve(answer) for answer in answers)
+    elapsed = time.perf_counter() - start
+    total = sum(count * number for number, count in guesses.items())
+    print(f'{len(answers)} answers, average {total / len(answers):.3f} '
+          f'guesses, {elapsed / total * 1000:.1f} ms per guess')
+    for number, count in sorted(guesses.items()):
+        lost = ' (lost)' if number > MAX_GUESSES else ''
+        print(f'{number:3d} guesses: {count:6d}{lost}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+import asyncio
+import itertools
+import os
+import tempfile
+import unittest
+import unittest.mock
+import feedbackmatrix
+import scoring
+import server
+import simulate
+import solver
+import wordindex
+import wordle
+
+
+class ScoreMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        # Every word over a 3-letter alphabet: lots of repeated letters
+        self.words = [''.join(letters) for letters in
+                      itertools.product('ABE', repeat=5)]
+
+    def test_score_matrix_same_as_check(self):
+        """Test that score_matrix agrees with check on repeated letters"""
+        codes = scoring.score_matrix(self.words, self.words)
+        for row, guess in enumerate(self.words):
+            expected = [scoring.code_from_check(wordle.check(answer, guess))
+                        for answer in self.words]
+            self.assertEqual(codes[row].tolist(), expected, guess)
+
+    def test_score_matrix_blocks(self):
+        """Test that small blocks give the same codes as one block"""
+        actual = scoring.score_matrix(self.words, self.words, block_bytes=1)
+        expected = scoring.score_matrix(self.words, self.words)
+        self.assertTrue((actual == expected).all())
+
+    def test_score_repeated_letters(self):
+        """Test the codes of guesses with more copies than the answer"""
+        self.assertEqual(scoring.pattern(scoring.score('ABBEY', 'BOBBY')),
+                         'YRGRG')
+        self.assertEqual(scoring.pattern(scoring.score('SPEED', 'EERIE')),
+                         'YYRRR')
+        self.assertEqual(scoring.score('CRANE', 'CRANE'), scoring.ALL_GREEN)
+
+    def test_code_from_check(self):
+        """Test that the code of a check string spells out its colors"""
+        colored = wordle.check('HELLO', 'LOLLY')
+        self.assertEqual(scoring.pattern(scoring.code_from_check(colored)),
+                         'RYGGR')
+
+
+class FeedbackMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.words = ['SPEED', 'EERIE', 'ABBEY', 'BOBBY', 'SPEED']
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_lookup_same_as_check(self):
+        """Test that the matrix lookups agree with check"""
+        matrix = feedbackmatrix.FeedbackMatrix(self.words, self.folder.name)
+        self.assertEqual(len(matrix), 4)
+        for guess in matrix.words:
+            for answer in matrix.words:
+                expected = scoring.code_from_check(wordle.check(answer,
+                                                                guess))
+                self.assertEqual(matrix.code(guess, answer), expected)
+
+    def test_cached_matrix_reused(self):
+        """Test that a second matrix maps the cached file"""
+        first = feedbackmatrix.FeedbackMatrix(self.words, self.folder.name)
+        with unittest.mock.patch('scoring.score_matrix') as score_matrix:
+            second = feedbackmatrix.FeedbackMatrix(reversed(self.words),
+                                                   self.folder.name)
+        score_matrix.assert_not_called()
+        self.assertEqual(first.key, second.key)
+        self.assertEqual(os.listdir(self.folder.name), [first.key + '.npy'])
+        self.assertTrue((first.codes == second.codes).all())
+        del first, second
+
+
+class SolverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.words = wordindex.WordIndex('silence.txt',
+                                         self.folder.name).words()
+        matrix = feedbackmatrix.FeedbackMatrix(self.words, self.folder.name)
+        self.solver = solver.Solver(matrix)
+
+    def tearDown(self):
+        del self.solver
+        self.folder.cleanup()
+
+    def test_solve_every_answer(self):
+        """Test that the solver finds every answer within 6 guesses"""
+        for answer in self.solver.matrix.words:
+            self.assertLessEqual(self.solver.solve(answer),
+                                 solver.MAX_GUESSES, answer)
+
+    def test_hint_fits_feedback(self):
+        """Test that the hint is the only word left fitting the feedback"""
+        history = [('HELLO', wordle.check('WELLS', 'HELLO'))]
+        candidates = [word for word in self.solver.matrix.words
+                      if wordle.check(word, 'HELLO') == history[0][1]]
+        self.assertEqual(self.solver.hint(history), 'WELLS')
+        self.assertEqual(candidates, ['WELLS'])
+
+    def test_opening_cached(self):
+        """Test that the opening guess is saved next to the matrix"""
+        opening = self.solver.hint([])
+        with unittest.mock.patch.object(self.solver, 'ratings') as ratings:
+            self.solver.book.clear()
+            self.assertEqual(self.solver.hint([]), opening)
+        ratings.assert_not_called()
+
+    def test_stale_opening_ignored(self):
+        """Test that a saved opening missing from the list is replaced"""
+        opening = self.solver.hint([])
+        path = os.path.join(self.folder.name,
+                            self.solver.matrix.key + '.opening')
+        with open(path, 'w', encoding='UTF-8') as opening_file:
+            opening_file.write('QUIZZ\n')
+        self.solver.book.clear()
+        self.assertEqual(self.solver.hint([]), opening)
+        with open(path, encoding='UTF-8') as opening_file:
+            self.assertEqual(opening_file.read(), opening + '\n')
+
+    def test_pool_bounded(self):
+        """Test that a small pool still solves every answer in time"""
+        with unittest.mock.patch.object(solver, 'POOL_SIZE', 5):
+            pool_solver = solver.Solver(self.solver.matrix)
+            self.assertEqual(len(pool_solver.sample), 5)
+            self.assertLessEqual(len(pool_solver.pool()), 10)
+            for answer in pool_solver.matrix.words:
+                self.assertLessEqual(pool_solver.solve(answer),
+                                     solver.MAX_GUESSES, answer)
+
+
+class WordIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'words.txt')
+        with open(self.filename, 'w', encoding='UTF-8') as text_file:
+            text_file.write('Hello, world!\nhello  Thing1 abcdef\n"ALONE"')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_stream_words_chunks(self):
+        """Test that words cut across chunks are read like a whole file"""
+        with open('silence.txt', encoding='UTF-8') as text_file:
+            expected = list(wordindex.five_letter_words(
+                text_file.read().split()))
+        for chunk_size in range(1, 12):
+            actual = list(wordindex.stream_words('silence.txt', chunk_size))
+            self.assertEqual(actual, expected)
+
+    def test_index_words(self):
+        """Test that the index holds the distinct words in sorted order"""
+        index = wordindex.WordIndex(self.filename, self.folder.name)
+        self.assertEqual(index.words(), ['ALONE', 'HELLO', 'WORLD'])
+        self.assertIn(index.choose(), index.words())
+        self.assertEqual(index.word(1), 'HELLO')
+
+    def test_index_rebuilt(self):
+        """Test that the index is only rebuilt when the file changes"""
+        wordindex.WordIndex(self.filename, self.folder.name)
+        with unittest.mock.patch('wordindex.stream_words') as stream:
+            index = wordindex.WordIndex(self.filename, self.folder.name)
+        stream.assert_not_called()
+        with open(self.filename, 'a', encoding='UTF-8') as text_file:
+            text_file.write(' zebra')
+        index = wordindex.WordIndex(self.filename, self.folder.name)
+        self.assertEqual(len(index), 4)
+
+    def test_index_next_to_file(self):
+        """Test that the default folder is beside the text file"""
+        index = wordindex.WordIndex(self.filename)
+        self.assertEqual(index.folder, os.path.join(self.folder.name,
+                                                    wordindex.CACHE_FOLDER))
+        self.assertTrue(os.path.exists(index.path))
+
+
+class HeadlessTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_play_with_guesser(self):
+        """Test that play asks the guesser and returns the attempts"""
+        guesses = iter(['hello', 'WORDS', 'WELLS'])
+        histories = []
+
+        def guesser(history):
+            histories.append(list(history))
+            return next(guesses)
+        self.assertEqual(wordle.play('WELLS', guesser=guesser,
+                                     verbose=False), 3)
+        self.assertEqual([len(history) for history in histories], [0, 1, 2])
+        self.assertEqual(histories[2][0],
+                         ('HELLO', wordle.check('WELLS', 'HELLO')))
+
+    def test_play_lost(self):
+        """Test that play returns None after 6 wrong guesses"""
+        self.assertIsNone(wordle.play('WELLS', guesser=lambda history:
+                                      'HELLO', verbose=False))
+        with self.assertRaises(ValueError):
+            wordle.play('WELLS', guesser=lambda history: 'HI',
+                        verbose=False)
+
+    def test_simulate_processes(self):
+        """Test that the buckets do not depend on the number of processes"""
+        expected = simulate.simulate('silence.txt', games=60, processes=0,
+                                     batch=7, folder=self.folder.name)
+        actual = simulate.simulate('silence.txt', games=60, processes=2,
+                                   batch=7, folder=self.folder.name)
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(actual), simulate.BUCKETS)
+        self.assertEqual(sum(actual.values()), 60)
+
+
+class ServerTestCase(unittest.TestCase):
+    async def converse(self, requests):
+        game_server = server.WordleServer(['WELLS'])
+        listener = await game_server.start(port=0)
+        host, port = listener.sockets[0].getsockname()
+        reader, writer = await asyncio.open_connection(host, port)
+        replies = [await reader.readline()]
+        for line in requests:
+            writer.write(line.encode('ascii') + b'\n')
+            replies.append(await reader.readline())
+        writer.close()
+        await writer.wait_closed()
+        listener.close()
+        await listener.wait_closed()
+        return [reply.decode('ascii').rstrip('\n') for reply in replies]
+
+    def test_session_protocol(self):
+        """Test a game played over a connection to the server"""
+        actual = asyncio.run(self.converse(['hello', 'WELLS', 'hello',
+                                            'NEW', 'toolong', 'QUIT']))
+        expected = ['WORDLE 6', 'RGGGR 1', 'WIN 2 Magnificent!',
+                    'ERROR no game in progress, send NEW', 'WORDLE 6',
+                    'ERROR the guess must be 5 letters', 'BYE']
+        self.assertEqual(actual, expected)
+
+    def test_session_lost(self):
+        """Test that the sixth wrong guess reveals the word"""
+        session = server.Session(['WELLS'])
+        session.new_game()
+        replies = [session.respond('SWELL') for attempt in range(6)]
+        self.assertEqual(replies[-1], 'LOSE YYYGY WELLS')
+        self.assertEqual(replies[0], 'YYYGY 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+# ----------------------------------------------------------------------
+# Name:      wordindex
+# Purpose:   index the 5-letter words of a text file for quick loading
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+On-disk index of the 5-letter words of a text file
+
+Choosing a wordle used to read and tokenize the whole text file on every
+game.  The first time a file is used, its words are streamed in chunks,
+filtered like before (punctuation stripped, 5 letters only), and the
+distinct words are saved in sorted order to an index file as fixed-width
+5-byte records after a small header.  The header holds the size and
+modification time of the text file, so the index is rebuilt whenever the
+text file changes.  Later games only read the header and pick a random
+word by seeking straight to its record, however large the text is.  The
+index files are kept in a .wordle_cache folder next to the text file,
+wherever the game is started from.
+"""
+import hashlib
+import os
+import random
+import string
+import struct
+import tempfile
+
+CACHE_FOLDER = '.wordle_cache'
+WORD_LENGTH = 5
+CHUNK_SIZE = 2 ** 20  # characters read at a time when building an index
+MAGIC = b'WORDIDX1'
+HEADER = struct.Struct('<8sQqI')  # magic, source size, mtime in ns, count
+
+
+def stream_words(filename, chunk_size=CHUNK_SIZE):
+    """
+    Read the file specified in chunks and generate its 5-letter words.
+    :param filename: (string) name of the text file
+    :param chunk_size: (integer) number of characters read at a time
+    :return: (generator) the 5-letter words in upper case, repeats
+             included, in the order they appear in the file
+    """
+    with open(filename, 'r', encoding='UTF-8') as input_file:
+        partial = ''
+        while True:
+            chunk = input_file.read(chunk_size)
+            if not chunk:
+                break
+            tokens = (partial + chunk).split()
+            # The last token may continue in the next chunk
+            partial = tokens.pop() if tokens and not chunk[-1].isspace() \
+                else ''
+            yield from five_letter_words(tokens)
+        yield from five_letter_words([partial])
+
+
+def five_letter_words(tokens):
+    """
+    Keep the tokens that are 5-letter words once stripped of punctuation.
+    :param tokens: (list of strings) words separated by white space
+    :return: (generator) the 5-letter words in upper case
+    """
+    for token in tokens:
+        word = token.strip(string.punctuation)
+        if len(word) == WORD_LENGTH and word.isalpha() and word.isascii():
+            yield word.upper()
+
+
+def cache_folder(filename):
+    """
+    Return the folder holding the index files of a text file.
+    :param filename: (string) name of the text file
+    :return: (string) the CACHE_FOLDER next to the text file
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(filename)),
+                        CACHE_FOLDER)
+
+
+class WordIndex:
+    """
+    The distinct 5-letter words of a text file, stored in an index file.
+
+    Arguments:
+    filename (string): name of the text file
+    folder (string): folder holding the index files, or None for the
+                     CACHE_FOLDER next to the text file
+
+    Attributes:
+    source (string): name of the text file
+    folder (string): folder holding the index files
+    path (string): name of the index file
+    count (integer): number of distinct 5-letter words
+    """
+
+    def __init__(self, filename, folder=None):
+        self.source = filename
+        self.folder = folder or cache_folder(filename)
+        key = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()
+        self.path = os.path.join(self.folder, key + '.words')
+        status = os.stat(filename)
+        self.count = self.read_header(status)
+        if self.count is None:
+            self.count = self.build(status)
+
+    def read_header(self, status):
+        """
+        Check that the index file is up-to-date with the text file.
+        :param status: (os.stat_result) the status of the text file
+        :return: (integer) the number of words in the index, or None if
+                 the index is missing or out of date
+        """
+        try:
+            with open(self.path, 'rb') as index_file:
+                header = index_file.read(HEADER.size)
+        except OSError:
+            return None
+        if len(header) < HEADER.size:
+            return None
+        magic, size, mtime, count = HEADER.unpack(header)
+        if (magic, size, mtime) != (MAGIC, status.st_size,
+                                    status.st_mtime_ns):
+            return None
+        return count
+
+    def build(self, status):
+        """
+        Stream the text file and write the index file.
+        :param status: (os.stat_result) the status of the text file
+        :return: (integer) the number of words in the index
+        """
+        words = sorted(set(stream_words(self.source)))
+        os.makedirs(self.folder, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.folder)
+        with os.fdopen(descriptor, 'wb') as index_file:
+            index_file.write(HEADER.pack(MAGIC, status.st_size,
+                                         status.st_mtime_ns, len(words)))
+            index_file.write(''.join(words).encode('ascii'))
+        os.replace(temp_path, self.path)
+        return len(words)
+
+    def word(self, position):
+        """
+        Read one word of the index.
+        :param position: (integer) position of the word in sorted order
+        :return: (string) the word in upper case
+        """
+        with open(self.path, 'rb') as index_file:
+            index_file.seek(HEADER.size + position * WORD_LENGTH)
+            return index_file.read(WORD_LENGTH).decode('ascii')
+
+    def choose(self, generator=random):
+        """
+        Choose a random word of the index.
+        :param generator: (Random) the random number generator to use
+        :return: (string) the word in upper case
+        :raises IndexError: if the text file has no 5-letter word
+        """
+        if not self.count:
+            raise IndexError(f'no 5-letter word in {self.source}')
+        return self.word(generator.randrange(self.count))
+
+    def words(self):
+        """
+        Read every word of the index.
+        :return: (list of strings) the distinct words in sorted order
+        """
+        with open(self.path, 'rb') as index_file:
+            index_file.seek(HEADER.size)
+            data = index_file.read(self.count * WORD_LENGTH).decode('ascii')
+        return [data[start:start + WORD_LENGTH] for start in
+                range(0, len(data), WORD_LENGTH)]
+
+    def __len__(self):
+        return self.count
@@ -10,31 +10,28 @@
 and a more detailed description here.
 """
 
-import random
-import string
+import wordindex
 
 # Constant assignments
 RED = '\033[91m'  # to print text in red: print(RED + text)
 GREEN = '\033[92m'  # to print a letter in green: print(GREEN + text)
 YELLOW = '\033[93m'  # to print a letter in yellow: print(YELLOW + text)
 DEFAULT = '\033[0m'  # to reset the color print(DEFAULT + text)
+COLOR_LETTERS = {RED: 'R', YELLOW: 'Y', GREEN: 'G'}  # color: letter
+MAX_ATTEMPTS = 6
+FEEDBACK = {1: "Genius!", 2: "Magnificent!", 3: "Impressive!",
+            4: "Splendid!", 5: "Great!", 6: "Phew!"}  # attempts: feedback
 
 
 def choose_wordle(filename):
     """
-    Read the file specified and choose a random 5-letter word.
+    Choose a random 5-letter word of the file specified.  The words of
+    the file are indexed the first time, so later calls do not read the
+    whole file again.
     :param filename: (string) name of the file to choose the wordle from
     :return: (string) the mystery word in uppercase
     """
-    with open(filename, 'r', encoding='UTF-8') as input_file:
-        file_output = input_file.read()
-
-        word_list = [(word.strip(string.punctuation)) for word in
-                     file_output.split()]
-
-        five_letter_words = [word for word in word_list if len(word) == 5 and
-                             word.isalpha()]
-        return random.choice(five_letter_words).upper()
+    return wordindex.WordIndex(filename).choose()
 
 
 def check(wordle, guess):
@@ -77,6 +74,17 @@ def check(wordle, guess):
     return ''.join(output)
 
 
+def pattern_from_check(colored):
+    """
+    Convert the colored string returned by check to R, Y and G letters.
+    :param colored: (string) the result of check
+    :return: (string) one letter per color, for example 'GRRYG'
+    """
+    size = len(RED)  # each letter follows its color code
+    return ''.join(COLOR_LETTERS[colored[position:position + size]]
+                   for position in range(0, len(colored), size + 1))
+
+
 def feedback(attempt):
     """
     Print the feedback corresponding to the number of attempts
@@ -84,42 +92,46 @@ def feedback(attempt):
     :param attempt: (integer) number of attempts needed to guess
     :return: None
     """
-    match attempt:
-        case 1:
-            print(DEFAULT + "Genius!")
-        case 2:
-            print(DEFAULT + "Magnificent!")
-        case 3:
-            print(DEFAULT + "Impressive!")
-        case 4:
-            print(DEFAULT + "Splendid!")
-        case 5:
-            print(DEFAULT + "Great!")
-        case 6:
-            print(DEFAULT + "Phew!")
-
-
-def prompt_guess():
+    if attempt in FEEDBACK:
+        print(DEFAULT + FEEDBACK[attempt])
+
+
+def prompt_guess(hint=None):
     """
     Prompt the user repeatedly for a valid 5 letter guess that contains
     only letters.  Guess may be in lower or upper case.
+    :param hint: (function) called without arguments to suggest a guess
+                 when the user enters ?, or None to disable hints
     :return: (string) the user's valid guess in upper case
     """
     user_guess = input(DEFAULT + "Please enter your 5 letter guess: ")
     # checks if there are no numbers using isalpha and
     # that the user is inputting a 5-letter word
     while not (user_guess.isalpha() and len(user_guess) == 5):
+        if user_guess.strip() == '?' and hint:
+            suggestion = hint()
+            if suggestion:
+                print(DEFAULT + "Hint: try", suggestion)
+            else:
+                print(DEFAULT + "No word of the list fits the feedback")
         user_guess = input("Please enter your 5 letter guess: ")
 
     return user_guess.upper()
 
 
-def play(wordle):
+def play(wordle, hint=None, guesser=None, verbose=True):
     """
     Implement the wordle game with all 6 attempts.
     :param wordle: (string) word to be guessed in upper case
-    :return: (boolean) True if player guesses within 6 attempts
-             False otherwise
+    :param hint: (function) called with the list of (guess, colored
+                 feedback) tuples so far to suggest a guess when the
+                 player enters ?, or None to disable hints
+    :param guesser: (function) called like hint to make each guess in
+                    place of the player, or None to prompt the player
+    :param verbose: (boolean) False to play without printing anything
+    :return: (integer) the number of attempts needed, or None if the
+             wordle was not guessed within 6 attempts
+    :raises ValueError: if the guesser returns an invalid guess
     """
     # enter your code below and take out the pass statement
     # call the prompt_guess function to prompt the user for each attempt
@@ -127,20 +139,61 @@ def play(wordle):
     # call the feedback function to print the final feedback if the user
     # guesses within 6 attempts
 
+    history = []  # the guesses so far with their colored feedback
+
+    def suggest():
+        return hint(history)
+
     # gives the user 6 tries of guessing the word through a for loop,
     # if the user doesn't guess in the 6th try,
     # it outputs the wordle
-    for attempt in range(1, 7):
-        print(DEFAULT + "Attempt", attempt)
-        curr_guess = prompt_guess()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if verbose:
+            print(DEFAULT + "Attempt", attempt)
+        if guesser:
+            curr_guess = guesser(history)
+            if not (curr_guess.isalpha() and len(curr_guess) == 5):
+                raise ValueError(f'invalid guess: {curr_guess!r}')
+            curr_guess = curr_guess.upper()
+        else:
+            curr_guess = prompt_guess(suggest if hint else None)
         check_guess = check(wordle, curr_guess)
-        print(check_guess)
+        history.append((curr_guess, check_guess))
+        if verbose:
+            print(check_guess)
         if curr_guess == wordle:
-            feedback(attempt)
-            break
+            if verbose:
+                feedback(attempt)
+            return attempt
 
-    if curr_guess != wordle:
+    if verbose:
         print(DEFAULT + "The correct answer is", wordle)
+    return None
+
+
+def make_hint(index):
+    """
+    Create the hint function of a game, if the solver can be used.
+    :param index: (WordIndex) the words the wordle was chosen from
+    :return: (function) the hint function expected by play, or None if
+             NumPy is not installed
+    """
+    # Imported here: the solver needs NumPy and imports this module
+    try:
+        import feedbackmatrix
+        import solver
+    except ImportError:
+        return None
+    game_solver = None
+
+    def hint(history):
+        nonlocal game_solver
+        if game_solver is None:
+            matrix = feedbackmatrix.FeedbackMatrix(index.words(),
+                                                   index.folder)
+            game_solver = solver.Solver(matrix)
+        return game_solver.hint(history)
+    return hint
 
 
 def main():
@@ -156,8 +209,9 @@ def main():
     filename = input(
         "Please enter the filename: ")  # prompts the user for a filename
 
-    mystery_word = choose_wordle(filename)
-    play(mystery_word)
+    index = wordindex.WordIndex(filename)
+    mystery_word = index.choose()
+    play(mystery_word, make_hint(index))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,75 @@
+# ----------------------------------------------------------------------
+# Name:      benchsongstats
+# Purpose:   benchmark compute_stats against the original stat functions
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Benchmarks the single pass compute_stats against the original functions
+
+A tally with a large vocabulary and Zipf-like counts is generated, then
+the statistics are computed the original way (sorting the whole tally
+for most_common, repeats, a copy of the tally into a set and max) and with
+compute_stats, and the two results are compared.
+
+usage: benchsongstats.py [-h] [-w WORDS] [-r ROUNDS]
+"""
+import argparse
+import random
+import timeit
+import songstats
+
+
+def random_tally(count, seed=122):
+    """
+    Generate a tally of random words with Zipf-like counts.
+    :param count: (integer) number of words to draw
+    :param seed: (integer) seed of the random generator
+    :return: (dictionary) word: count
+    """
+    generator = random.Random(seed)
+    word_count = {}
+    for word in range(count):
+        letters = generator.choices('etaoinshrdlu', k=generator.randint(1, 12))
+        word_count[''.join(letters)] = int(generator.paretovariate(1.2))
+    return word_count
+
+
+def original_stats(word_count):
+    """
+    Compute the statistics the way most_common, repeats and the
+    original get_stats do, without printing them.
+    :param word_count: dictionary with items of the form word: count
+    :return: (Stats) the statistics of the tally
+    """
+    top = sorted(word_count, key=word_count.get, reverse=True)[:8]
+    repeated = sorted({word for word in word_count if len(word) >= 4 and
+                       word_count[word] > 3})
+    return songstats.Stats([(word, word_count[word]) for word in top],
+                           sum(word_count.values()), len(set(word_count)),
+                           repeated, max(word_count, key=len))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', '--words', type=int, default=1000000,
+                        help='number of words drawn for the tally')
+    parser.add_argument('-r', '--rounds', type=int, default=3,
+                        help='number of timed rounds')
+    arguments = parser.parse_args()
+    word_count = random_tally(arguments.words)
+    expected = original_stats(word_count)
+    actual = songstats.compute_stats(word_count)
+    # Fastest of the rounds, each timing a single call
+    original = min(timeit.repeat(lambda: original_stats(word_count),
+                                 number=1, repeat=arguments.rounds))
+    single = min(timeit.repeat(lambda: songstats.compute_stats(word_count),
+                               number=1, repeat=arguments.rounds))
+    print(f'{len(word_count)} distinct words')
+    print(f'  original functions: {original * 1000:8.1f} ms')
+    print(f'  compute_stats:      {single * 1000:8.1f} ms  '
+          f'speedup {original / single:4.1f}x')
+    print(f'  results {"match" if actual == expected else "DIFFER"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# ----------------------------------------------------------------------
+# Name:      corpus
+# Purpose:   song statistics over a whole corpus of lyric files
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Batch mode of songstats for thousands of lyric files
+
+The files are tallied in parallel by a pool of processes (the map step)
+and their tallies are merged into a corpus tally as they come back (the
+reduce step).  While merging, an inverted index maps every 4-letter or
+longer word to the songs using it.  The words two songs have in common
+are counted from the index instead of intersecting the word sets of
+every pair of songs: a word used by a few songs adds one to each pair
+of these songs, and the words used by many songs are recorded in a bit
+mask per song, so that two songs are compared with a single AND.
+
+With --cache, the tally of each file is saved between runs by
+tallycache, so only the files edited since the last run are tallied.
+
+usage: corpus.py [-h] [-P PROCESSES] [-s] [-p PAIRS] [-c CACHE]
+                 [--cache-size MB] path [path ...]
+"""
+import argparse
+import collections
+import concurrent.futures
+import glob
+import heapq
+import itertools
+import math
+import os
+import songstats
+import tallycache
+
+MIN_LENGTH = 4  # shortest word counted in the overlaps
+
+
+def tally_song(filename):
+    """
+    Tally one song in a worker process.
+    :param filename: (string) Name of the file containing song lyrics
+    :return: a tuple (filename, Counter of the words)
+    """
+    return filename, songstats.tally_file(filename)
+
+
+def tally_songs(filenames, processes=None, chunksize=8, cache=None):
+    """
+    Tally the songs with a pool of processes.
+    :param filenames: (list of strings) the lyric files
+    :param processes: (integer) number of processes, None for one per
+                      core or 0 to tally in this process
+    :param chunksize: (integer) files sent to a process at a time
+    :param cache: (TallyCache) the tallies of the files tallied before,
+                  or None to tally every file
+    :return: (generator) tuples (filename, tally) in the order of the
+             filenames
+    """
+    found = {}  # filename: digest of its saved tally
+    if cache is not None:
+        for filename in filenames:
+            digest = cache.find(filename)
+            if digest:
+                found[filename] = digest
+    misses = [filename for filename in filenames if filename not in found]
+    if processes == 0 or not misses:
+        yield from merge_cached(filenames, found, map(tally_song, misses),
+                                cache)
+        return
+    with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+        yield from merge_cached(filenames, found, pool.map(
+            tally_song, misses, chunksize=chunksize), cache)
+
+
+def merge_cached(filenames, found, results, cache):
+    """
+    Interleave the cached tallies with the tallies computed.
+    :param filenames: (list of strings) the lyric files
+    :param found: (dictionary) filename: digest of its cached tally
+    :param results: (iterator) tuples (filename, tally) of the other
+                     files, in order
+    :param cache: (TallyCache) the cache to update or None
+    :return: (generator) tuples (filename, tally) in the order of the
+             filenames
+    """
+    for filename in filenames:
+        if filename in found:
+            tally = cache.load(found[filename])
+            if tally is not None:
+                yield filename, tally
+                continue
+            # The saved tally has gone missing: tally the file again
+            tally = songstats.tally_file(filename)
+        else:
+            name, tally = next(results)
+        if cache is not None:
+            cache.misses += 1
+            cache.store(filename, tally)
+        yield filename, tally
+
+
+class Corpus:
+    """
+    The merged tally of many songs and the index of their words.
+
+    Attributes:
+    names (list of strings): the filename of each song
+    total (Counter): word: count over every song
+    index (dictionary): word: list of the numbers of the songs using
+                        the word, for the 4-letter or longer words
+    """
+
+    def __init__(self):
+        self.names = []
+        self.total = collections.Counter()
+        self.index = collections.defaultdict(list)
+
+    def add(self, name, tally):
+        """
+        Merge the tally of one song into the corpus.
+        :param name: (string) the filename of the song
+        :param tally: dictionary with items of the form word: count
+        :return: None
+        """
+        song = len(self.names)
+        self.names.append(name)
+        self.total.update(tally)
+        for word in tally:
+            if len(word) >= MIN_LENGTH:
+                self.index[word].append(song)
+
+    def overlaps(self):
+        """
+        Count the words common to each pair of songs.
+
+        The pairs of songs sharing a rare word are counted from the
+        index.  Words used by many songs would make the pairs too many
+        to count one at a time, so each song gets a bit mask of the
+        frequent words it uses, and the frequent words common to two
+        songs are counted with one AND of their masks.
+        :return: (generator) tuples ((song number, song number), number
+                 of words the two songs have in common) for the pairs of
+                 songs having at least one word in common
+        """
+        songs_count = len(self.names)
+        frequent = math.isqrt(songs_count)  # more songs than this
+        rare = collections.Counter()
+        masks = [0] * songs_count
+        bits = 0
+        for songs in self.index.values():
+            if len(songs) > frequent:
+                for song in songs:
+                    masks[song] |= 1 << bits
+                bits += 1
+            else:
+                rare.update(itertools.combinations(songs, 2))
+        if not bits:
+            yield from sorted(rare.items())
+            return
+        for song1, mask in enumerate(masks):
+            for song2 in range(song1 + 1, songs_count):
+                count = (mask & masks[song2]).bit_count() + \
+                        rare.get((song1, song2), 0)
+                if count:
+                    yield (song1, song2), count
+
+    def common_words(self, song1, song2):
+        """
+        Return the words two songs have in common.
+        :param song1: (integer) the number of the first song
+        :param song2: (integer) the number of the second song
+        :return: (list of strings) the 4-letter or longer words used in
+                 both songs, in alphabetical order
+        """
+        return sorted(word for word, songs in self.index.items()
+                      if song1 in songs and song2 in songs)
+
+
+def find_songs(paths):
+    """
+    List the lyric files of the paths specified.
+    :param paths: (list of strings) files, folders (for their .txt
+                  files) or glob patterns
+    :return: (list of strings) the filenames
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(glob.glob(os.path.join(path, '*.txt'))))
+        elif os.path.exists(path):
+            filenames.append(path)
+        else:
+            filenames.extend(sorted(glob.glob(path)))
+    return filenames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', metavar='path', nargs='+',
+                        help='lyric file, folder of .txt files or pattern')
+    parser.add_argument('-P', '--processes', type=int,
+                        help='tally processes (default: one per core, '
+                             '0 for none)')
+    parser.add_argument('-s', '--songs', action='store_true',
+                        help='print the statistics of every song')
+    parser.add_argument('-p', '--pairs', type=int, default=10,
+                        help='number of most similar pairs to print')
+    parser.add_argument('-c', '--cache', metavar='FOLDER',
+                        help='folder keeping the tallies between runs')
+    parser.add_argument('--cache-size', type=int, metavar='MB',
+                        default=tallycache.MAX_BYTES // 2 ** 20,
+                        help='maximum size of the saved tallies')
+    arguments = parser.parse_args()
+    cache = None
+    if arguments.cache:
+        cache = tallycache.TallyCache(arguments.cache,
+                                      arguments.cache_size * 2 ** 20)
+    corpus = Corpus()
+    for name, tally in tally_songs(find_songs(arguments.paths),
+                                   arguments.processes, cache=cache):
+        if arguments.songs:
+            print(f"Song Statistics: {name}")
+            songstats.tally_stats(tally)
+        corpus.add(name, tally)
+    if cache is not None:
+        cache.save()
+        print(f"Tally cache: {cache.hits} files loaded, "
+              f"{cache.misses} tallied")
+
+    print(f"Corpus Statistics: {len(corpus.names)} songs")
+    stats = songstats.compute_stats(corpus.total)
+    songstats.print_most_common(stats.most_common)
+    print(f"There are {stats.total} total words in the corpus.")
+    print(f"There are {stats.distinct} distinct words in the corpus.")
+    print("-" * 80)
+    print(f"The {arguments.pairs} pairs of songs with the most words "
+          f"(4-letter or longer) in common:")
+    for (song1, song2), count in heapq.nlargest(
+            arguments.pairs, corpus.overlaps(), key=lambda item: item[1]):
+        print(f"  {corpus.names[song1]} & {corpus.names[song2]}: "
+              f"{count} words")
+        print(f"    {' '.join(corpus.common_words(song1, song2))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -19,9 +19,29 @@ number of times they appear in descending order, the number of distinct
 words in each song, the words that are 4-letter or longer and that
 appear more than 3 times sorted alphabetically, and the longest word
 in each song.
+
+Large files are read in chunks by iter_words and tallied as they are
+read, so memory use grows with the number of distinct words rather than
+with the size of the file.  compute_stats then gathers all the
+statistics of a tally in a single pass.
 """
+import collections
+import heapq
 import string
 
+CHUNK_SIZE = 2 ** 20  # characters read at a time by iter_words
+TOP_WORDS = 8  # number of most common words reported
+
+# most_common: (list of tuples) (word, count) of the most common words
+#              in descending order of count, ties in order of appearance
+# total: (integer) number of words
+# distinct: (integer) number of distinct words
+# repeats: (list of strings) the words (4-letter or longer) appearing
+#          more than 3 times, sorted alphabetically
+# longest: (string) the first of the longest words, None if no word
+Stats = collections.namedtuple('Stats',
+                               'most_common total distinct repeats longest')
+
 
 def tally(words):
     """
@@ -48,9 +68,18 @@ def most_common(word_count):
     """
     # Enter your code below and take out the pass statement
     desc_word_count = sorted(word_count, key=word_count.get, reverse=True)[:8]
-    print("The 8 most common words are: ")
-    for word in desc_word_count:
-        print(f"  {word}: appears {word_count[word]} times.")
+    print_most_common([(word, word_count[word]) for word in desc_word_count])
+
+
+def print_most_common(top_words):
+    """
+    Print the most common words with the number of times they appear.
+    :param top_words: (list of tuples) (word, count) in descending order
+    :return: None
+    """
+    print(f"The {TOP_WORDS} most common words are: ")
+    for word, count in top_words:
+        print(f"  {word}: appears {count} times.")
 
 
 def repeats(word_count):
@@ -63,11 +92,53 @@ def repeats(word_count):
     # Enter your code below and take out the pass statement
     sorted_words = sorted({word for word in word_count if len(word) >= 4 and
                            word_count[word] > 3})
+    print_repeats(sorted_words)
+
+
+def print_repeats(sorted_words):
+    """
+    Print the words (4-letter or longer) that appear more than 3 times.
+    :param sorted_words: (list of strings) the words in alphabetical order
+    :return: None
+    """
     print("The following (4-letter or longer) words appear more than 3 times:")
     for word in sorted_words:
         print(f"  {word}")
 
 
+def compute_stats(word_count, top=TOP_WORDS):
+    """
+    Compute the statistics of a tally in a single pass over its items.
+    The most common words are kept in a heap of at most top entries
+    instead of sorting the whole tally.
+    :param word_count: dictionary with items of the form word: count
+    :param top: (integer) number of most common words to keep
+    :return: (Stats) the statistics of the tally
+    """
+    # Heap entries (count, -position, word): the root is the least common
+    # word kept, the last one to appear among equal counts, which is the
+    # one a stable sort in descending order would drop first
+    heap = []
+    total = 0
+    repeated = []
+    longest = None
+    longest_length = -1
+    for position, (word, count) in enumerate(word_count.items()):
+        total += count
+        if count > 3 and len(word) >= 4:
+            repeated.append(word)
+        if len(word) > longest_length:
+            longest = word
+            longest_length = len(word)
+        if len(heap) < top:
+            heapq.heappush(heap, (count, -position, word))
+        elif count > heap[0][0]:
+            heapq.heapreplace(heap, (count, -position, word))
+    heap.sort(reverse=True)
+    return Stats([(word, count) for count, position, word in heap], total,
+                 len(word_count), sorted(repeated), longest)
+
+
 def get_words(filename):
     """
     Read the file specified, and return a list of all the words,
@@ -83,6 +154,40 @@ def get_words(filename):
     return word_list
 
 
+def iter_words(filename, chunk_size=CHUNK_SIZE):
+    """
+    Read the file specified in chunks and generate its words, converted
+    to lowercase and stripped of punctuation like get_words.
+    :param filename: (string) Name of the file containing song lyrics
+    :param chunk_size: (integer) number of characters read at a time
+    :return: (generator) the words in lowercase, in file order
+    """
+    with open(filename, 'r', encoding='UTF-8') as input_file:
+        partial = ''
+        while True:
+            chunk = input_file.read(chunk_size)
+            if not chunk:
+                break
+            tokens = (partial + chunk).split()
+            # The last word may continue in the next chunk
+            partial = tokens.pop() if tokens and not chunk[-1].isspace() \
+                else ''
+            for word in tokens:
+                yield word.strip(string.punctuation).lower()
+        if partial:
+            yield partial.strip(string.punctuation).lower()
+
+
+def tally_file(filename):
+    """
+    Count the words of the file specified without keeping a word list.
+    :param filename: (string) Name of the file containing song lyrics
+    :return: (Counter) a tally with items of the form word: count, in
+             the order the words first appear like tally
+    """
+    return collections.Counter(iter_words(filename))
+
+
 def get_stats(words):
     """
     Print the statistics corresponding to the list of words specified.
@@ -98,22 +203,31 @@ def get_stats(words):
     # 4. The words that are 4-letter or longer and that appear more
     #    than 3 times sorted alphabetically.
     # 5. The longest word.
-    words_dict = tally(words)
-    most_common(words_dict)
-    print(f"There are {len(words)} total words in the song.")
-    print(f"There are {len(set(words_dict))} distinct words in the song.")
-    repeats(words_dict)
-    longest_word = max(words_dict, key=len)
-    print(f"The longest word in the song is: {longest_word}")
+    tally_stats(tally(words))
+
+
+def tally_stats(words_dict):
+    """
+    Print the statistics corresponding to the tally specified.
+    :param words_dict: dictionary with items of the form word: count
+    :return: (Stats) the statistics printed
+    """
+    stats = compute_stats(words_dict)
+    print_most_common(stats.most_common)
+    print(f"There are {stats.total} total words in the song.")
+    print(f"There are {stats.distinct} distinct words in the song.")
+    print_repeats(stats.repeats)
+    print(f"The longest word in the song is: {stats.longest}")
     print("-" * 80)
+    return stats
 
 
 def common_words(words1, words2):
     """
     Print the words (4-letter or longer) that appear in both word lists
     in alphabetical order.
-    :param words1: (list of stings)
-    :param words2: (list of stings)
+    :param words1: (list of stings) or a tally dictionary of the words
+    :param words2: (list of stings) or a tally dictionary of the words
     :return: None
     """
     # Enter your code below and take out the pass statement
@@ -135,15 +249,15 @@ def main():
     # Call common_words to report on the words common to both songs.
     # Enter your code below and take out the pass statement
     file_list = []
-    word_list = []
+    tally_list = []
     for i in range(2):
         file_list.append(input(f"Please enter the filename containing song "
                                f"{i + 1}:"))
-        word_list.append(get_words(file_list[i]))
-    for i in range(len(word_list)):
+        tally_list.append(tally_file(file_list[i]))
+    for i in range(len(tally_list)):
         print(f"Song Statistics: {file_list[i]}")
-        get_stats(word_list[i])
-    common_words(word_list[0], word_list[1])
+        tally_stats(tally_list[i])
+    common_words(tally_list[0], tally_list[1])
 
 
 if __name__ == '__main__':
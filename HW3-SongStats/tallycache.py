@@ -0,0 +1,248 @@
+# ----------------------------------------------------------------------
+# Name:      tallycache
+# Purpose:   keep the tally of each lyric file on disk between runs
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Persistent cache of the tallies of lyric files
+
+The tally of a file is saved in the cache folder in a compact form, the
+counts as an array of 64-bit integers followed by the words separated by
+newlines, compressed with zlib, in a file named after the sha1 of the
+content of the lyric file.
+A manifest records for each lyric file its size, modification time and
+content hash, and for each saved tally its size on disk in least
+recently used order.  A file whose size and modification time have not
+changed is loaded from the cache without reading it; a file that was
+touched but not edited is recognized by its content hash.  When the
+saved tallies take more room than allowed, the least recently used are
+deleted.
+"""
+import array
+import collections
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+import songstats
+
+CACHE_FOLDER = '.tally_cache'
+MAX_BYTES = 64 * 2 ** 20
+MANIFEST = 'manifest.json'
+LENGTH = struct.Struct('<Q')  # number of words in a packed tally
+
+
+def file_digest(filename):
+    """
+    Hash the content of a file.
+    :param filename: (string) name of the file
+    :return: (string) the hexadecimal sha1 of the file
+    """
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(2 ** 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pack(tally):
+    """
+    Serialize a tally in the compact form saved in the cache.
+    :param tally: dictionary with items of the form word: count
+    :return: (bytes) the compressed tally
+    """
+    counts = array.array('Q', tally.values())
+    if sys.byteorder == 'big':
+        counts.byteswap()
+    words = '\n'.join(tally).encode('UTF-8')
+    # The fastest level: tallies are written once per edit of the file
+    return zlib.compress(LENGTH.pack(len(counts)) + counts.tobytes() +
+                         words, 1)
+
+
+def unpack(data):
+    """
+    Deserialize a tally packed by pack.
+    :param data: (bytes) the compressed tally
+    :return: (Counter) the tally, in the order it was packed
+    """
+    data = zlib.decompress(data)
+    length, = LENGTH.unpack_from(data)
+    end = LENGTH.size + length * 8
+    counts = array.array('Q', data[LENGTH.size:end])
+    if sys.byteorder == 'big':
+        counts.byteswap()
+    words = data[end:].decode('UTF-8').split('\n') if length else []
+    if len(words) != length:
+        raise ValueError('corrupted tally')
+    return collections.Counter(dict(zip(words, counts)))
+
+
+class TallyCache:
+    """
+    On-disk cache of file tallies with least recently used eviction.
+
+    Arguments:
+    folder (string): the folder holding the cache files
+    max_bytes (integer): maximum size of the saved tallies
+
+    Attributes:
+    folder (string): the folder holding the cache files
+    max_bytes (integer): maximum size of the saved tallies
+    files (dictionary): absolute filename: [size, mtime in ns, digest]
+    tallies (OrderedDict): digest: size of the saved tally in bytes, the
+                           least recently used first
+    size (integer): total size of the saved tallies in bytes
+    hashed (dictionary): absolute filename: [size, mtime in ns, digest]
+                         of the files hashed by find without a match
+    hits (integer): number of tallies loaded from the cache
+    misses (integer): number of files that had to be tallied
+    """
+
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.files = {}
+        self.tallies = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with open(os.path.join(folder, MANIFEST),
+                      encoding='UTF-8') as manifest:
+                saved = json.load(manifest)
+            self.files = saved['files']
+            self.tallies.update(saved['tallies'])
+        except (OSError, ValueError, KeyError):
+            pass
+        self.size = sum(self.tallies.values())
+        self.hashed = {}
+
+    def path(self, digest):
+        """
+        Return the path of the saved tally of the digest specified.
+        :param digest: (string) the content hash of a lyric file
+        :return: (string) the path of the tally file
+        """
+        return os.path.join(self.folder, digest + '.tally')
+
+    def write(self, path, data):
+        """
+        Atomically replace the file specified with the bytes specified.
+        :param path: (string) the path of the file
+        :param data: (bytes) the new content of the file
+        :return: None
+        """
+        descriptor, temp_path = tempfile.mkstemp(dir=self.folder)
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    def find(self, filename):
+        """
+        Look for a saved tally of the current content of a file.
+        :param filename: (string) name of the lyric file
+        :return: (string) the digest of the saved tally or None
+        """
+        key = os.path.abspath(filename)
+        status = os.stat(filename)
+        entry = self.files.get(key)
+        if entry and entry[:2] == [status.st_size, status.st_mtime_ns] \
+                and entry[2] in self.tallies:
+            return entry[2]
+        # Touched or copied files keep the tally of the same content
+        digest = file_digest(filename)
+        entry = [status.st_size, status.st_mtime_ns, digest]
+        if digest not in self.tallies:
+            self.hashed[key] = entry  # saves hashing it again in store
+            return None
+        self.files[key] = entry
+        return digest
+
+    def load(self, digest):
+        """
+        Load a saved tally, marking it as recently used.
+        :param digest: (string) the digest returned by find
+        :return: (Counter) the tally, or None if it could not be read
+        """
+        try:
+            with open(self.path(digest), 'rb') as tally_file:
+                tally = unpack(tally_file.read())
+        except (OSError, ValueError, struct.error, zlib.error):
+            self.size -= self.tallies.pop(digest, 0)
+            return None
+        self.tallies.move_to_end(digest)
+        self.hits += 1
+        return tally
+
+    def store(self, filename, tally):
+        """
+        Save the tally of a file and evict the least recently used
+        tallies if the cache is over its size limit.
+        :param filename: (string) name of the lyric file
+        :param tally: dictionary with items of the form word: count
+        :return: None
+        """
+        key = os.path.abspath(filename)
+        status = os.stat(filename)
+        entry = self.hashed.pop(key, None)
+        if not entry or entry[:2] != [status.st_size, status.st_mtime_ns]:
+            entry = [status.st_size, status.st_mtime_ns,
+                     file_digest(filename)]
+        digest = entry[2]
+        data = pack(tally)
+        self.write(self.path(digest), data)
+        self.files[key] = entry
+        self.size += len(data) - self.tallies.get(digest, 0)
+        self.tallies[digest] = len(data)
+        self.tallies.move_to_end(digest)
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used tallies until the cache fits.
+        :return: None
+        """
+        if self.size <= self.max_bytes:
+            return
+        while self.size > self.max_bytes and len(self.tallies) > 1:
+            digest, size = self.tallies.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self.path(digest))
+            except OSError:
+                pass
+        self.files = {key: entry for key, entry in self.files.items()
+                      if entry[2] in self.tallies}
+
+    def tally_file(self, filename):
+        """
+        Return the tally of a file, from the cache if it is unchanged.
+        :param filename: (string) Name of the file containing song lyrics
+        :return: (Counter) the tally of the file
+        """
+        digest = self.find(filename)
+        tally = self.load(digest) if digest else None
+        if tally is None:
+            self.misses += 1
+            tally = songstats.tally_file(filename)
+            self.store(filename, tally)
+        return tally
+
+    def save(self):
+        """
+        Save the manifest of the cache.
+        :return: None
+        """
+        manifest = {'files': self.files, 'tallies': self.tallies}
+        self.write(os.path.join(self.folder, MANIFEST),
+                   json.dumps(manifest).encode('UTF-8'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.save()
@@ -0,0 +1,230 @@
+import contextlib
+import io
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+import corpus
+import songstats
+import tallycache
+
+SONGS = ['poem.txt', 'scientist.txt', 'stars.txt']
+
+# The reports printed by get_stats before it called tally_stats
+EXPECTED_STATS = {
+    'poem.txt': (
+        'The 8 most common words are: \n'
+        '  the: appears 13 times.\n'
+        '  from: appears 7 times.\n'
+        '  halfway: appears 6 times.\n'
+        '  down: appears 6 times.\n'
+        '  view: appears 5 times.\n'
+        '  a: appears 5 times.\n'
+        '  i: appears 5 times.\n'
+        '  to: appears 3 times.\n'
+        'There are 159 total words in the song.\n'
+        'There are 106 distinct words in the song.\n'
+        'The following (4-letter or longer) words appear more than 3 times:\n'
+        '  down\n'
+        '  from\n'
+        '  halfway\n'
+        '  view\n'
+        'The longest word in the song is: teeter-totter\n'
+        '----------------------------------------'
+        '----------------------------------------\n'),
+    'scientist.txt': (
+        'The 8 most common words are: \n'
+        '  you: appears 10 times.\n'
+        '  to: appears 8 times.\n'
+        '  me: appears 6 times.\n'
+        '  said: appears 6 times.\n'
+        '  it: appears 6 times.\n'
+        '  tell: appears 5 times.\n'
+        '  i: appears 5 times.\n'
+        '  and: appears 5 times.\n'
+        'There are 182 total words in the song.\n'
+        'There are 84 distinct words in the song.\n'
+        'The following (4-letter or longer) words appear more than 3 times:\n'
+        '  back\n'
+        '  easy\n'
+        '  nobody\n'
+        '  said\n'
+        '  start\n'
+        '  tell\n'
+        'The longest word in the song is: questions\n'
+        '----------------------------------------'
+        '----------------------------------------\n'),
+}
+
+
+def printed(function, *args):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        function(*args)
+    return output.getvalue()
+
+
+class StreamingTestCase(unittest.TestCase):
+    def test_iter_words_chunks(self):
+        """Test that words cut across chunks are read like get_words"""
+        for song in SONGS:
+            expected = songstats.get_words(song)
+            for chunk_size in (1, 2, 7, 64, 4096):
+                actual = list(songstats.iter_words(song, chunk_size))
+                self.assertEqual(actual, expected, (song, chunk_size))
+
+    def test_tally_file(self):
+        """Test that tally_file counts like tally, in the same order"""
+        for song in SONGS:
+            expected = songstats.tally(songstats.get_words(song))
+            actual = songstats.tally_file(song)
+            self.assertEqual(list(actual.items()), list(expected.items()))
+
+    def test_tally_stats(self):
+        """Test that tally_stats prints the report get_stats printed"""
+        for song, expected in EXPECTED_STATS.items():
+            self.assertEqual(printed(songstats.tally_stats,
+                                     songstats.tally_file(song)), expected)
+            self.assertEqual(printed(songstats.get_stats,
+                                     songstats.get_words(song)), expected)
+
+
+class ComputeStatsTestCase(unittest.TestCase):
+    def test_compute_stats_ties(self):
+        """Test compute_stats against the original functions with ties"""
+        generator = random.Random(122)
+        for size in (0, 1, 5, 8, 9, 300):
+            word_count = {f'w{number:03d}{"x" * generator.randint(0, 4)}':
+                          generator.randint(1, 6) for number in range(size)}
+            top = sorted(word_count, key=word_count.get, reverse=True)[:8]
+            stats = songstats.compute_stats(word_count)
+            self.assertEqual(stats.most_common,
+                             [(word, word_count[word]) for word in top])
+            self.assertEqual(stats.repeats, sorted(
+                word for word in word_count
+                if len(word) >= 4 and word_count[word] > 3))
+            self.assertEqual(stats.total, sum(word_count.values()))
+            self.assertEqual(stats.distinct, size)
+            if word_count:
+                self.assertEqual(stats.longest, max(word_count, key=len))
+
+
+class CorpusTestCase(unittest.TestCase):
+    def overlaps(self, tallies):
+        song_corpus = corpus.Corpus()
+        for number, tally in enumerate(tallies):
+            song_corpus.add(f'song{number}', tally)
+        return song_corpus, dict(song_corpus.overlaps())
+
+    def intersections(self, tallies):
+        sets = [{word for word in tally if len(word) >= 4}
+                for tally in tallies]
+        pairs = {}
+        for song1, song2 in itertools.combinations(range(len(sets)), 2):
+            if sets[song1] & sets[song2]:
+                pairs[song1, song2] = len(sets[song1] & sets[song2])
+        return pairs
+
+    def test_overlaps_songs(self):
+        """Test the overlaps of the songs against set intersections"""
+        tallies = [songstats.tally_file(song) for song in SONGS]
+        song_corpus, actual = self.overlaps(tallies)
+        self.assertEqual(actual, self.intersections(tallies))
+        self.assertEqual(song_corpus.common_words(0, 1),
+                         ['back', "it's", 'this', 'would'])
+
+    def test_overlaps_rare_and_frequent(self):
+        """Test the overlaps of rare and frequent words"""
+        generator = random.Random(122)
+        vocabulary = [f'word{number}' for number in range(60)]
+        tallies = [{word: 1 for word in generator.sample(
+            vocabulary, generator.randint(0, 20))} for song in range(50)]
+        tallies[3]['everywhere'] = 2
+        self.assertEqual(self.overlaps(tallies)[1],
+                         self.intersections(tallies))
+
+    def test_tally_processes(self):
+        """Test that the pool tallies the songs in order"""
+        expected = [(song, songstats.tally_file(song)) for song in SONGS]
+        actual = list(corpus.tally_songs(SONGS, processes=2, chunksize=1))
+        self.assertEqual(actual, expected)
+
+
+class TallyCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.cache_folder = os.path.join(self.folder.name, 'cache')
+        self.songs = []
+        for song in SONGS:
+            self.songs.append(os.path.join(self.folder.name, song))
+            shutil.copy(song, self.songs[-1])
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_pack_order(self):
+        """Test that a packed tally keeps its counts and order"""
+        for tally in ({}, {'': 2}, songstats.tally_file('stars.txt')):
+            actual = tallycache.unpack(tallycache.pack(tally))
+            self.assertEqual(list(actual.items()), list(tally.items()))
+
+    def test_unchanged_files_loaded(self):
+        """Test that only the edited files are tallied again"""
+        with tallycache.TallyCache(self.cache_folder) as cache:
+            expected = [cache.tally_file(song) for song in self.songs]
+        os.utime(self.songs[0], ns=(0, 0))  # touched, not edited
+        with open(self.songs[1], 'a', encoding='UTF-8') as song_file:
+            song_file.write(' encore')
+        cache = tallycache.TallyCache(self.cache_folder)
+        with unittest.mock.patch('songstats.tally_file',
+                                 wraps=songstats.tally_file) as tally_file:
+            actual = [cache.tally_file(song) for song in self.songs]
+        tally_file.assert_called_once_with(self.songs[1])
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertEqual(actual[0], expected[0])
+        self.assertEqual(actual[1]['encore'], 1)
+
+    def test_least_recently_used_evicted(self):
+        """Test that the least recently used tallies are evicted"""
+        cache = tallycache.TallyCache(self.cache_folder)
+        for song in self.songs[:2]:
+            cache.tally_file(song)
+        cache.tally_file(self.songs[0])  # now more recent than song 1
+        third = tallycache.pack(songstats.tally_file(self.songs[2]))
+        cache.max_bytes = cache.size - cache.tallies[
+            cache.find(self.songs[1])] + len(third)
+        cache.tally_file(self.songs[2])
+        self.assertEqual(cache.find(self.songs[1]), None)
+        self.assertIsNotNone(cache.find(self.songs[0]))
+        self.assertLessEqual(cache.size, cache.max_bytes)
+        self.assertEqual(len(os.listdir(self.cache_folder)), 2)
+
+    def test_corpus_cache(self):
+        """Test that cached tallies reach the corpus in file order"""
+        expected = list(corpus.tally_songs(self.songs, processes=0))
+        cache = tallycache.TallyCache(self.cache_folder)
+        list(corpus.tally_songs(self.songs[1:], processes=0, cache=cache))
+        actual = list(corpus.tally_songs(self.songs, processes=0,
+                                         cache=cache))
+        self.assertEqual(actual, expected)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+    def test_corpus_missing_tally(self):
+        """Test that a tally deleted from the cache is saved again"""
+        cache = tallycache.TallyCache(self.cache_folder)
+        expected = list(corpus.tally_songs(self.songs, processes=0,
+                                           cache=cache))
+        path = cache.path(cache.find(self.songs[1]))
+        os.remove(path)
+        actual = list(corpus.tally_songs(self.songs, processes=0,
+                                         cache=cache))
+        self.assertEqual(actual, expected)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------
+# Name:      benchchat
+# Purpose:   benchmark the rule index as the number of rules grows
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Benchmarks the compiled rule index against scanning the rules in order
+
+Tables of synthetic rules are generated, each rule expecting a random
+first word, a random keyword or a question mark, with a rule replying
+to anything at the end like rule 12 of the chatbot.  The same random
+utterances are then answered by scanning the table in order and by the
+compiled index, and the mean time per turn is printed for each size of
+table along with whether both found the same rules.
+
+usage: benchchat.py [-h] [-r RULES [RULES ...]] [-t TURNS] [-w WORDS]
+"""
+import argparse
+import random
+import time
+import chat
+import rules
+
+
+def random_rules(count, vocabulary, generator):
+    """
+    Generate a table of synthetic rules.
+    :param count: (integer) number of rules
+    :param vocabulary: (list of strings) the words the rules expect
+    :param generator: (Random) the random number generator to use
+    :return: (list of Rules) the rules, the last one replying to anything
+    """
+    table = []
+    for number in range(1, count):
+        kind = generator.random()
+        if kind < 0.6:
+            rule = rules.Rule(number, ('{first} {text}',),
+                              first=set(generator.sample(vocabulary, 2)),
+                              question=kind < 0.2)
+        elif kind < 0.95:
+            rule = rules.Rule(number, ('{topic}',),
+                              keywords={generator.choice(vocabulary)})
+        else:
+            rule = rules.Rule(number, ('?',), question=True,
+                              test=lambda words: len(words) > 3)
+        table.append(rule)
+    table.append(rules.Rule(count, ("That's interesting.",)))
+    return table
+
+
+def scan(table, words, question):
+    """
+    Find the rule of an utterance by checking every rule in order.
+    :param table: (list of Rules) the rules in the order of their numbers
+    :param words: (list of strings) the lowercase words of the utterance
+    :param question: (Boolean) True if the utterance ends with '?'
+    :return: (Rule) the first matching rule, or None
+    """
+    for rule in table:
+        if rules.matches(rule, words, question):
+            return rule
+    return None
+
+
+def time_turns(function, table, utterances):
+    """
+    Time the answer of the utterances.
+    :param function: (function) finds the rule of (table, words,
+                     question)
+    :param table: the rules or the index of the rules
+    :param utterances: (list of strings) the utterances to answer
+    :return: a tuple (seconds per turn, list of the rule numbers found)
+    """
+    numbers = []
+    start = time.perf_counter()
+    for text in utterances:
+        words, question = chat.tokenize(text)
+        numbers.append(function(table, words, question).number)
+    return (time.perf_counter() - start) / len(utterances), numbers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--rules', type=int, nargs='+',
+                        default=[12, 100, 1000, 10000],
+                        help='numbers of rules in the tables')
+    parser.add_argument('-t', '--turns', type=int, default=2000,
+                        help='utterances answered per table')
+    parser.add_argument('-w', '--words', type=int, default=5000,
+                        help='size of the vocabulary')
+    arguments = parser.parse_args()
+    generator = random.Random(122)
+    vocabulary = [f'word{number}' for number in range(arguments.words)]
+    utterances = [' '.join(generator.choices(vocabulary,
+                                             k=generator.randint(1, 15)))
+                  + generator.choice(['', '.', '?'])
+                  for turn in range(arguments.turns)]
+    print(f'{"rules":>8}{"scan us/turn":>14}{"index us/turn":>15}'
+          f'{"speedup":>9}')
+    for count in arguments.rules:
+        table = random_rules(count, vocabulary, generator)
+        start = time.perf_counter()
+        index = rules.RuleIndex(table)
+        compiled = time.perf_counter() - start
+        scanned, expected = time_turns(scan, table, utterances)
+        indexed, actual = time_turns(rules.RuleIndex.find, index,
+                                     utterances)
+        print(f'{count:8d}{scanned * 1e6:14.1f}{indexed * 1e6:15.1f}'
+              f'{scanned / indexed:8.1f}x  compiled in '
+              f'{compiled * 1000:.1f} ms, results '
+              f'{"match" if actual == expected else "DIFFER"}')
+
+
+if __name__ == '__main__':
+    main()
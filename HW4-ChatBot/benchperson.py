@@ -0,0 +1,81 @@
+# ----------------------------------------------------------------------
+# Name:      benchperson
+# Purpose:   benchmark change_person on long pasted paragraphs
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Benchmarks change_person against the original word by word version
+
+Long utterances are generated from a vocabulary of plain words, then
+with the pronouns I and you that may start a phrase, then with all the
+words of the phrases of chat.PHRASES.  Each is rewritten by the
+original list comprehension over PRONOUNS_DICT and by change_person,
+and the throughput in words per second is printed, along with whether
+the results match where they should (the utterances without phrases).
+
+usage: benchperson.py [-h] [-w WORDS] [-r ROUNDS]
+"""
+import argparse
+import random
+import timeit
+import chat
+
+PLAIN = ['the', 'cat', 'said', 'that', 'my', 'me', 'your', 'think', 'it',
+         'is', 'home', 'really', 'and', 'then', 'we', 'left', 'early']
+PRONOUNS = ['i', 'you', 'am', 'are', 'was', 'were']
+
+
+def original_change_person(words):
+    """
+    Change the pronouns one word at a time like the original function.
+    :param words: (list of strings) the words to change
+    :return: (string) the words changed, separated by spaces
+    """
+    return ' '.join([chat.PRONOUNS_DICT.get(word, word) for word in words])
+
+
+def random_words(count, vocabulary, generator):
+    """
+    Generate a long utterance.
+    :param count: (integer) number of words
+    :param vocabulary: (list of strings) the words to draw from
+    :param generator: (Random) the random number generator to use
+    :return: (list of strings) the words
+    """
+    return generator.choices(vocabulary, k=count)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', '--words', type=int, default=100000,
+                        help='number of words of the utterances')
+    parser.add_argument('-r', '--rounds', type=int, default=5,
+                        help='number of timed rounds')
+    arguments = parser.parse_args()
+    generator = random.Random(122)
+    cases = [('no pronoun starting a phrase', PLAIN, True),
+             ('pronouns but no phrase', PLAIN + ['i', 'you'], True),
+             ('phrases', PLAIN + PRONOUNS, False)]
+    for label, vocabulary, same in cases:
+        words = random_words(arguments.words, vocabulary, generator)
+        expected = original_change_person(words)
+        actual = chat.change_person(words)
+        # Fastest of the rounds, each timing a single call
+        original = min(timeit.repeat(lambda: original_change_person(words),
+                                     number=1, repeat=arguments.rounds))
+        rewritten = min(timeit.repeat(lambda: chat.change_person(words),
+                                      number=1, repeat=arguments.rounds))
+        print(f'{label}: {len(words)} words')
+        print(f'  original:      {len(words) / original / 1e6:6.2f} '
+              f'M words/s')
+        print(f'  change_person: {len(words) / rewritten / 1e6:6.2f} '
+              f'M words/s  ({rewritten / original:.2f}x the time)', end='')
+        if same:
+            print(f', results {"match" if actual == expected else "DIFFER"}')
+        else:
+            print(f', {actual.count(" I am ")} "you are" changed to '
+                  f'"I am"')
+
+
+if __name__ == '__main__':
+    main()
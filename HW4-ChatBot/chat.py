@@ -9,100 +9,118 @@ This is a simple chatbot program that talks with the user
 
 In this program, the user is prompted to enter their name and what they
 want to say to the chatbot. There are a total of 12 cases that the
-program chooses from based on the user's responses. There are 2
-functions called chat_with and change_person. The chat_with contains
-the 12 cases the program will choose based on the user's responses. The
+program chooses from based on the user's responses. The 12 cases are
+declared in the RULES table, which is compiled once by the rules module
+into an index so that each response only checks the cases that may
+apply. The reply function returns the response to an utterance and the
+chat_with function reads the utterances of the user. The
 change_person function is used only in cases 3 and 7 where the pronouns
 in the user's response gets changed and returns a string with the
 changed pronouns and the rest of the words
 """
 import random
 import string
+import time
+import rewrite
+import rules
 
+SPECIAL_TOPICS = {'family', 'friend', 'friends', 'mom', 'dad', 'brother',
+                  'sister', 'girlfriend', 'boyfriend', 'children', 'son',
+                  'daughter', 'child', 'wife', 'husband', 'home', 'dog',
+                  'cat', 'pet'}
+PRONOUNS_DICT = {'i': 'you', 'am': 'are', 'my': 'your', 'your': 'my',
+                 'me': 'you', 'you': 'me'}
+# Phrases changed as a whole, taking precedence over PRONOUNS_DICT
+PHRASES = {('i', 'am'): 'you are', ('i', 'was'): 'you were',
+           ('am', 'i'): 'are you', ('was', 'i'): 'were you',
+           ('you', 'are'): 'I am', ('you', 'were'): 'I was',
+           ('are', 'you'): 'am I', ('were', 'you'): 'was I'}
+PERSON_REWRITER = rewrite.PhraseRewriter(PRONOUNS_DICT, PHRASES)
 
-# Enter your constant assignments below
-# Enter the function definition & docstring for the change_person
-# function below
-# Enter function definitions & docstrings for any other helper functions
-def chat_with(name):
-    """
-    Takes user's name and responds to the user's input
-    :param name: string
-    :return: Boolean
-    """
-    SPECIAL_TOPICS = {'family', 'friend', 'friends', "mom", 'dad',
-                      'brother', 'sister',
-                      'girlfriend', 'boyfriend', 'children', 'son', 'daughter',
-                      'child', 'wife', 'husband', 'home', 'dog', 'cat', 'pet'}
-    user_input = input("Talk to me please>")
-    has_question_mark = user_input.endswith("?")
-    stripped_words = user_input.lower().strip(string.punctuation).split()
-    match stripped_words:
-        # Rule 1
-        case ["bye"]:
-            print(f"Bye {name}.", "\nHave a great day!")
-            return True
-        # Rule 2
-        case [*words] if set(words) & SPECIAL_TOPICS:
-            print(f"Tell me more about your "
-                  f"{(set(words) & SPECIAL_TOPICS).pop()},"
-                  f" {name}.")
-        # Rule 3
-        case [("do" | "can" | "will" | "would") as verb, "you", *words]:
-            prompt_1 = f"No {name}, I {verb} not " \
-                       f"{(change_person(words))}."
-            prompt_2 = f"yes I {verb}."
-            print(random.choice([prompt_1, prompt_2]))
-        # Rule 4
-        case ["why", *words] if has_question_mark:
-            print("Why not?")
-        # Rule 5
-        case ["how", *words] if has_question_mark:
-            prompt_1 = f"{name}, why do you ask?"
-            prompt_2 = f"{name}, how would an answer to that help you?"
-            print(random.choice([prompt_1, prompt_2]))
-        # Rule 6
-        case ["what", *words] if has_question_mark:
-            prompt_1 = f"What do you think {name}?"
-            prompt_2 = f"Why is that important {name}?"
-            print(random.choice([prompt_1, prompt_2]))
-        # Rule 7
-        case ["i", ("need" | "think" | "have" | "want") as verb, *words]:
-            print(f"Why do you {verb} "
-                  f"{(change_person(words))}?")
-        # Rule 8
-        case ["i", *words] if words[-1] != "too":
-            print(f"I {' '.join(words)} too.")
-        # Rule 9
-        case [("tell" | "give" | "say") as verb, *words]:
-            print(f"You {verb} {' '.join(words)}.")
-        # Rule 10
-        case [*words] if has_question_mark:
-            prompt_1 = "I have no clue."
-            prompt_2 = "Maybe."
-            print(random.choice([prompt_1, prompt_2]))
-        # Rule 11
-        case [*words] if "because" in words:
-            print("Is that the real reason?")
-        # Rule 12
-        case _:
-            prompt_1 = "That's interesting."
-            prompt_2 = "That's nice!"
-            prompt_3 = "Can you elaborate on that?"
-            print(random.choice([prompt_1, prompt_2, prompt_3]))
+# The 12 cases, the lowest number replying first when several apply
+RULES = [
+    rules.Rule(1, ("Bye {name}. \nHave a great day!",), first={'bye'},
+               test=lambda words: len(words) == 1, done=True),
+    rules.Rule(2, ("Tell me more about your {topic}, {name}.",),
+               keywords=SPECIAL_TOPICS),
+    rules.Rule(3, ("No {name}, I {first} not {person}.", "yes I {first}."),
+               first={'do', 'can', 'will', 'would'}, second={'you'}),
+    rules.Rule(4, ("Why not?",), first={'why'}, question=True),
+    rules.Rule(5, ("{name}, why do you ask?",
+                   "{name}, how would an answer to that help you?"),
+               first={'how'}, question=True),
+    rules.Rule(6, ("What do you think {name}?",
+                   "Why is that important {name}?"),
+               first={'what'}, question=True),
+    rules.Rule(7, ("Why do you {second} {person}?",), first={'i'},
+               second={'need', 'think', 'have', 'want'}),
+    rules.Rule(8, ("I {text} too.",), first={'i'},
+               test=lambda words: len(words) > 1 and words[-1] != 'too'),
+    rules.Rule(9, ("You {first} {text}.",), first={'tell', 'give', 'say'}),
+    rules.Rule(10, ("I have no clue.", "Maybe."), question=True),
+    rules.Rule(11, ("Is that the real reason?",), keywords={'because'}),
+    rules.Rule(12, ("That's interesting.", "That's nice!",
+                    "Can you elaborate on that?")),
+]
 
 
 def change_person(words):
     """
-    Takes pronouns in words list and changes them accordingly
+    Takes pronouns in words list and changes them accordingly, the
+    phrases of PHRASES as a whole
     :param words: list
     :return: string
     """
-    PRONOUNS_DICT = {'i': 'you', 'am': 'are', 'my': 'your', 'your': 'my',
-                     'me': 'you', 'you': 'me'}
-    new_words = [PRONOUNS_DICT.get(word, word) for word in
-                 words]
-    return " ".join(new_words)
+    return PERSON_REWRITER.rewrite(words)
+
+
+RULE_INDEX = rules.RuleIndex(RULES, change_person)
+
+
+def tokenize(text):
+    """
+    Split an utterance into the words the rules look at
+    :param text: string
+    :return: tuple (list of lowercase words, Boolean: ends with '?')
+    """
+    return text.lower().strip(string.punctuation).split(), \
+        text.endswith("?")
+
+
+def reply(name, text, generator=random, index=RULE_INDEX, metrics=None):
+    """
+    Takes user's name and an utterance and returns the chatbot's reply
+    :param name: string
+    :param text: string
+    :param generator: Random choosing among the possible replies
+    :param index: RuleIndex of the rules to apply
+    :param metrics: ChatMetrics recording the turn, or None
+    :return: Reply (text, number of the rule, Boolean: conversation over)
+    """
+    if metrics is None:
+        words, has_question_mark = tokenize(text)
+        rule = index.find(words, has_question_mark)
+        return index.respond(rule, name, words, generator)
+    start = time.perf_counter()
+    words, has_question_mark = tokenize(text)
+    tokenized = time.perf_counter()
+    rule = index.find(words, has_question_mark)
+    matched = time.perf_counter()
+    answer = index.respond(rule, name, words, generator)
+    metrics.record(rule.number, tokenized - start, matched - tokenized,
+                   time.perf_counter() - matched)
+    return answer
+
+
+def chat_with(name):
+    """
+    Takes user's name and responds to the user's input
+    :param name: string
+    :return: Boolean
+    """
+    answer = reply(name, input("Talk to me please>"))
+    print(answer.text)
+    return answer.done
 
 
 def main():
@@ -0,0 +1,189 @@
+# ----------------------------------------------------------------------
+# Name:      loadchat
+# Purpose:   load test the chatbot server with many concurrent sessions
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Load test client for server.py
+
+Opens idle conversations that only give their name and stay connected,
+then holds many active conversations at once, each sending random
+utterances of UTTERANCES and checking that every reply is one of the
+replies the rules allow.  The latency of every request is recorded and
+the throughput and latency percentiles are printed at the end, then the
+idle conversations say bye to check that they were kept all along.
+
+usage: loadchat.py [-h] [-c CONNECTIONS] [-t TURNS] [-i IDLE]
+                   [--host HOST] [-p PORT | -u UNIX]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import chat
+import server
+
+WAVE = 500  # idle conversations opened at a time
+UTTERANCES = ['Hello there', 'I love my mom!', 'Do you like music',
+              'Why is the sky blue?', 'How does it work?',
+              'What is your name?', 'I need a vacation',
+              'I like long walks', 'Tell me a story', 'Is it late?',
+              'I left because it rained', 'Can you help me with my code',
+              'I think you are right', 'Give me a break']
+
+
+def possible_replies(name, text):
+    """
+    List the replies the rules allow for an utterance.
+    :param name: (string) the name of the user
+    :param text: (string) the utterance
+    :return: (set of strings) the possible replies
+    """
+    words, question = chat.tokenize(text)
+    rule = chat.RULE_INDEX.find(words, question)
+    return {chat.RULE_INDEX.respond(rule._replace(replies=(template,)),
+                                    name, words).text
+            for template in rule.replies}
+
+
+async def connect(open_connection, name, latencies):
+    """
+    Open a conversation and give the name of the user.
+    :param open_connection: (function) opens a connection to the server
+    :param name: (string) the name of the user
+    :param latencies: (list of floats) receives the latency in seconds
+    :return: a tuple (StreamReader, StreamWriter) of the connection
+    """
+    reader, writer = await open_connection()
+    await reader.readline()  # the greeting is sent right away
+    if await request(reader, writer, name, latencies) != server.PROMPT:
+        raise ConnectionError('the server did not ask to talk')
+    return reader, writer
+
+
+async def say_bye(reader, writer, name):
+    """
+    End a conversation.
+    :param reader: (StreamReader) the replies of the server
+    :param writer: (StreamWriter) the requests to the server
+    :param name: (string) the name of the user
+    :return: (Boolean) True if the goodbye was the expected one
+    """
+    try:
+        writer.write(b'bye\n')
+        goodbye = (await reader.read()).decode('UTF-8').rstrip('\n')
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:  # the server may have closed the socket first
+            pass
+    return goodbye in possible_replies(name, 'bye')
+
+
+async def play_session(open_connection, name, turns, latencies):
+    """
+    Hold one conversation, checking and timing each reply.
+    :param open_connection: (function) opens a connection to the server
+    :param name: (string) the name of the user
+    :param turns: (integer) number of utterances sent before bye
+    :param latencies: (list of floats) receives the latencies in seconds
+    :return: (integer) number of unexpected replies
+    """
+    reader, writer = await connect(open_connection, name, latencies)
+    wrong = 0
+    for turn in range(turns):
+        text = random.choice(UTTERANCES)
+        reply = await request(reader, writer, text, latencies)
+        wrong += reply not in possible_replies(name, text)
+    return wrong + (not await say_bye(reader, writer, name))
+
+
+async def request(reader, writer, line, latencies):
+    """
+    Send one request and wait for its reply.
+    :param reader: (StreamReader) the replies of the server
+    :param writer: (StreamWriter) the requests to the server
+    :param line: (string) the request
+    :param latencies: (list of floats) receives the latency in seconds
+    :return: (string) the reply
+    """
+    start = time.perf_counter()
+    writer.write(f'{line}\n'.encode('UTF-8'))
+    reply = await reader.readline()
+    latencies.append(time.perf_counter() - start)
+    if not reply:
+        raise ConnectionError('the server closed the connection')
+    return reply.decode('UTF-8').rstrip('\n')
+
+
+async def load_test(open_connection, connections, turns, idle=0):
+    """
+    Hold many conversations at once while others stay idle.
+    :param open_connection: (function) opens a connection to the server
+    :param connections: (integer) number of concurrent conversations
+    :param turns: (integer) utterances sent in each conversation
+    :param idle: (integer) number of conversations kept open without
+                 talking during the test
+    :return: a tuple (unexpected replies, idle conversations still
+             connected at the end, list of latencies in seconds,
+             seconds taken by the active conversations)
+    """
+    idle_latencies = []
+    idlers = []
+    for start in range(0, idle, WAVE):  # not to overflow the backlog
+        idlers.extend(await asyncio.gather(*(
+            connect(open_connection, f'Idle{number}', idle_latencies)
+            for number in range(start, min(start + WAVE, idle)))))
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        play_session(open_connection, f'User{number}', turns, latencies)
+        for number in range(connections)))
+    elapsed = time.perf_counter() - start
+    kept = await asyncio.gather(*(
+        say_bye(reader, writer, f'Idle{number}')
+        for number, (reader, writer) in enumerate(idlers)))
+    return sum(results), sum(kept), latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--connections', type=int, default=1000,
+                        help='number of concurrent conversations')
+    parser.add_argument('-t', '--turns', type=int, default=20,
+                        help='utterances sent in each conversation')
+    parser.add_argument('-i', '--idle', type=int, default=0,
+                        help='conversations kept open without talking')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address of the server')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-p', '--port', type=int, default=server.PORT,
+                       help='TCP port of the server')
+    group.add_argument('-u', '--unix', help='Unix socket of the server')
+    arguments = parser.parse_args()
+
+    def open_connection():
+        if arguments.unix:
+            return asyncio.open_unix_connection(arguments.unix,
+                                                limit=server.LINE_LIMIT)
+        return asyncio.open_connection(arguments.host, arguments.port,
+                                       limit=server.LINE_LIMIT)
+
+    wrong, kept, latencies, elapsed = asyncio.run(load_test(
+        open_connection, arguments.connections, arguments.turns,
+        arguments.idle))
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f'{arguments.connections} sessions, {len(latencies)} requests '
+          f'in {elapsed:.2f} s ({len(latencies) / elapsed:.0f} '
+          f'requests/s), {wrong} unexpected replies')
+    print(f'{kept} of {arguments.idle} idle sessions kept')
+    print(f'latency ms: p50 {percentiles[49] * 1000:.2f}  '
+          f'p90 {percentiles[89] * 1000:.2f}  '
+          f'p99 {percentiles[98] * 1000:.2f}  '
+          f'max {max(latencies) * 1000:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+# ----------------------------------------------------------------------
+# Name:      metrics
+# Purpose:   count the rules the chatbot uses and time its turns
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Records which rules of the chatbot reply and how long each turn takes
+
+A ChatMetrics object counts the replies of every rule, including the
+turns falling through to the catch-all rule, and keeps a latency
+histogram for each step of a turn: tokenizing the utterance, matching it
+to a rule and writing the reply, plus the whole turn.  A turn of the
+chatbot takes microseconds, so the histograms have fixed microsecond
+buckets; summaries from several processes can therefore be merged by
+adding them up.  The summary can be printed as a table or exported as
+JSON whenever needed.
+
+The Histogram is a copy of the one of HW8-WebScraping/metrics.py with
+microsecond instead of millisecond buckets.  It is copied rather than
+imported because every homework folder is run on its own, from its own
+folder, with no package or path shared between the folders.
+"""
+import bisect
+import collections
+import json
+
+# Upper bounds of the latency histogram buckets in microseconds
+BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+              100000, float('inf'))
+STEPS = ('tokenize', 'match', 'respond', 'turn')
+
+
+class Histogram:
+    """
+    Latency histogram with fixed microsecond buckets.
+
+    Attributes:
+    counts (list of integers): number of samples in each bucket
+    count (integer): number of samples
+    total (float): sum of the samples in microseconds
+    maximum (float): largest sample in microseconds
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_US)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, microseconds):
+        """
+        Add a sample to the histogram.
+        :param microseconds: (float) the latency of the sample
+        :return: None
+        """
+        self.counts[bisect.bisect_left(BUCKETS_US, microseconds)] += 1
+        self.count += 1
+        self.total += microseconds
+        if microseconds > self.maximum:
+            self.maximum = microseconds
+
+    def percentile(self, fraction):
+        """
+        Return the upper bound of the bucket holding the percentile.
+        :param fraction: (float) 0.5 for the median, 0.9, 0.99...
+        :return: (float) the percentile in microseconds
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_US, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, round(self.maximum, 3))
+        return 0.0
+
+    def summary(self):
+        """
+        Return the histogram as a JSON compatible dictionary.
+        :return: (dictionary) count, total, mean, percentiles and buckets
+        """
+        return {'count': self.count,
+                'total_us': round(self.total, 3),
+                'mean_us': round(self.total / self.count, 3)
+                if self.count else 0.0,
+                'p50_us': self.percentile(0.5),
+                'p90_us': self.percentile(0.9),
+                'p99_us': self.percentile(0.99),
+                'max_us': round(self.maximum, 3),
+                'buckets': {f'<={bound}': count for bound, count in
+                            zip(BUCKETS_US, self.counts) if count}}
+
+    def merge(self, summary):
+        """
+        Add the samples of a histogram summary from another process.
+        :param summary: (dictionary) the result of summary()
+        :return: None
+        """
+        for bound, count in summary['buckets'].items():
+            index = BUCKETS_US.index(float(bound[2:]))
+            self.counts[index] += count
+        self.count += summary['count']
+        self.total += summary['total_us']
+        self.maximum = max(self.maximum, summary['max_us'])
+
+
+class ChatMetrics:
+    """
+    Rule counters and step latencies of the turns of the chatbot.
+
+    Arguments:
+    fallback (integer): the number of the rule replying to anything
+
+    Attributes:
+    fallback (integer): the number of the rule replying to anything
+    rules (Counter): rule number: number of replies of the rule
+    steps (dictionary): step name: Histogram of its latencies
+    """
+
+    def __init__(self, fallback=12):
+        self.fallback = fallback
+        self.rules = collections.Counter()
+        self.steps = {step: Histogram() for step in STEPS}
+
+    def record(self, rule, tokenize, match, respond):
+        """
+        Record one turn.
+        :param rule: (integer) the number of the rule that replied
+        :param tokenize: (float) seconds taken to split the utterance
+        :param match: (float) seconds taken to find the rule
+        :param respond: (float) seconds taken to write the reply
+        :return: None
+        """
+        self.rules[rule] += 1
+        self.steps['tokenize'].add(tokenize * 1e6)
+        self.steps['match'].add(match * 1e6)
+        self.steps['respond'].add(respond * 1e6)
+        self.steps['turn'].add((tokenize + match + respond) * 1e6)
+
+    def reset(self):
+        """
+        Forget every turn recorded.
+        :return: None
+        """
+        self.rules.clear()
+        self.steps = {step: Histogram() for step in STEPS}
+
+    def summary(self):
+        """
+        Return the counters and histograms as a JSON compatible dict.
+        :return: (dictionary) {'turns': ..., 'fall_through': ...,
+                 'rules': {...}, 'steps': {...}}, the rules listed from
+                 the most used
+        """
+        turns = sum(self.rules.values())
+        return {'turns': turns,
+                'fall_through': self.rules[self.fallback],
+                'fall_through_share': round(
+                    self.rules[self.fallback] / turns, 4) if turns else 0.0,
+                'rules': {str(rule): count for rule, count
+                          in self.rules.most_common() if count},
+                'steps': {step: histogram.summary()
+                          for step, histogram in self.steps.items()}}
+
+    def merge(self, summary):
+        """
+        Add a summary recorded by another process.
+        :param summary: (dictionary) the result of summary()
+        :return: None
+        """
+        self.rules.update({int(rule): count
+                           for rule, count in summary['rules'].items()})
+        for step, histogram in summary['steps'].items():
+            self.steps[step].merge(histogram)
+
+    def export(self, filename):
+        """
+        Write the summary to a JSON file.
+        :param filename: (string) name of the JSON file
+        :return: None
+        """
+        with open(filename, 'w', encoding='UTF-8') as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def report(self):
+        """
+        Print the rule counters and step latencies as a table.
+        :return: None
+        """
+        summary = self.summary()
+        print(f'{summary["turns"]} turns, {summary["fall_through"]} fell '
+              f'through to rule {self.fallback} '
+              f'({summary["fall_through_share"] * 100:.1f}%)')
+        for rule, count in summary['rules'].items():
+            print(f'  rule {rule:>4}{count:10d}'
+                  f'{count / summary["turns"] * 100:7.1f}%')
+        print(f'{"step":10}{"count":>10}{"mean us":>10}{"p50 us":>9}'
+              f'{"p90 us":>9}{"p99 us":>9}{"max us":>11}')
+        for step, histogram in summary['steps'].items():
+            print(f'{step:10}{histogram["count"]:10d}'
+                  f'{histogram["mean_us"]:10.2f}{histogram["p50_us"]:9.0f}'
+                  f'{histogram["p90_us"]:9.0f}{histogram["p99_us"]:9.0f}'
+                  f'{histogram["max_us"]:11.1f}')
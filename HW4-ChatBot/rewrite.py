@@ -0,0 +1,101 @@
+# ----------------------------------------------------------------------
+# Name:      rewrite
+# Purpose:   replace the words and phrases of a list of words
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Word and phrase rewriting for change_person
+
+The replacements of single words are applied with one dictionary lookup
+per word, as change_person always did.  The phrases of several words
+are compiled once into a trie of words, and the words starting a phrase
+are looked up to a (replacement, trie node) tuple instead of a string.
+Every utterance is first joined straight from map over the lookup
+table; a tuple among the words makes the join fail, and only then are
+the words rewritten again by a loop that follows the trie from each
+first word, keeping the longest phrase starting there.  Phrases never
+overlap: the words of a phrase that was replaced cannot start another
+one.  An utterance without the first word of any phrase so costs one
+lookup per word, as fast as the original change_person.  Handling the
+phrases costs throughput: an utterance with such a word takes a second
+pass in the interpreter, two to three and a half times as long as the
+original word by word replacement, which never looked for phrases.
+"""
+PHRASE_END = None  # key of the replacement in a node of the trie
+
+
+class PhraseRewriter:
+    """
+    Replaces words and phrases of several words.
+
+    Arguments:
+    words (dictionary): word: replacement
+    phrases (dictionary): tuple of words: replacement of the phrase
+
+    Attributes:
+    words (dictionary): word: replacement
+    trie (dictionary): first word: node of the trie, each node mapping
+                       the next word to a node and PHRASE_END to the
+                       replacement of the phrase ending there
+    lookup (dictionary): word: replacement of the word, or a tuple
+                         (replacement, node of the trie of the phrases
+                         it starts) for the first words of phrases
+    """
+
+    def __init__(self, words, phrases=None):
+        self.words = dict(words)
+        self.trie = {}
+        for phrase, replacement in (phrases or {}).items():
+            if len(phrase) == 1:
+                self.words[phrase[0]] = replacement
+                continue
+            node = self.trie
+            for word in phrase:
+                node = node.setdefault(word, {})
+            node[PHRASE_END] = replacement
+        self.lookup = dict(self.words)
+        for word, node in self.trie.items():
+            self.lookup[word] = (self.words.get(word, word), node)
+
+    def rewrite(self, words):
+        """
+        Replace the words and phrases of a list of words.
+        :param words: (list of strings) the words to rewrite
+        :return: (string) the words rewritten, separated by spaces
+        """
+        lookup = self.lookup.get
+        try:
+            return ' '.join(map(lookup, words, words))
+        except TypeError:  # a tuple: some word starts a phrase
+            pass
+        pieces = []
+        append = pieces.append
+        last = len(words) - 1
+        skip = 0  # words of the last phrase replaced still to pass
+        for position, word in enumerate(words):
+            if skip:
+                skip -= 1
+                continue
+            entry = lookup(word, word)
+            if type(entry) is not tuple:
+                append(entry)
+                continue
+            replacement, node = entry
+            if position < last:
+                node = node.get(words[position + 1])
+                end = position + 1
+                found = 0
+                while node is not None:
+                    if PHRASE_END in node:  # the longest phrase so far
+                        found = end
+                        phrase = node[PHRASE_END]
+                    end += 1
+                    if end > last:
+                        break
+                    node = node.get(words[end])
+                if found:
+                    append(phrase)
+                    skip = found - position
+                    continue
+            append(replacement)
+        return ' '.join(pieces)
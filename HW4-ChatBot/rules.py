@@ -0,0 +1,193 @@
+# ----------------------------------------------------------------------
+# Name:      rules
+# Purpose:   compile a table of chatbot rules into an index
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Declarative rules of the chatbot and the index they are compiled into
+
+A rule is declared by what it expects of the words of an utterance (its
+first word, its second word, a keyword anywhere, a question mark at the
+end, an extra test) and by the replies it may give.  The replies are
+format strings using the fields:
+
+    {name}    the name of the user
+    {first}   the first word of the utterance
+    {second}  the second word of the utterance
+    {text}    the words after the ones matched by first and second
+    {person}  the same words with the pronouns changed
+    {topic}   the first word of the utterance among the keywords
+
+The table is compiled once into an index: each rule is listed under the
+words it expects first, or else under its keywords, or else with the
+rules only expecting a question mark, or else with the rules expecting
+nothing.  A turn looks up its first word, each of its distinct words and
+its question mark, and tests only these candidate rules, in the order of
+their numbers.  The first one matching replies, so the rules keep the
+priority of their numbers however many there are.
+"""
+import collections
+import heapq
+import operator
+import random
+import string
+
+# number: (integer) the priority of the rule, the lowest first
+# replies: (tuple of strings) the format strings of the possible replies
+# first: (set of strings) the possible first words, None for any
+# second: (set of strings) the possible second words, None for any
+# keywords: (set of strings) words one of which must be used, None for
+#           no such condition
+# question: (Boolean) True if the utterance must end with '?'
+# test: (function) extra condition on the list of words, None for none
+# done: (Boolean) True if the reply ends the conversation
+Rule = collections.namedtuple(
+    'Rule', 'number replies first second keywords question test done',
+    defaults=(None, None, None, False, None, False))
+
+# text: (string) the reply of the chatbot
+# rule: (integer) the number of the rule that replied
+# done: (Boolean) True if the conversation is over
+Reply = collections.namedtuple('Reply', 'text rule done')
+
+by_number = operator.attrgetter('number')
+
+
+def matches(rule, words, question):
+    """
+    Check whether a rule applies to an utterance.
+    :param rule: (Rule) the rule to check
+    :param words: (list of strings) the lowercase words of the utterance
+    :param question: (Boolean) True if the utterance ends with '?'
+    :return: (Boolean) True if the rule applies
+    """
+    if rule.question and not question:
+        return False
+    if rule.first is not None and (not words or words[0] not in rule.first):
+        return False
+    if rule.second is not None and (len(words) < 2 or
+                                    words[1] not in rule.second):
+        return False
+    if rule.keywords is not None and rule.keywords.isdisjoint(words):
+        return False
+    return rule.test is None or rule.test(words)
+
+
+class RuleIndex:
+    """
+    A table of rules compiled for finding the rule of an utterance.
+
+    Arguments:
+    rules (iterable of Rules): the rules, with distinct numbers
+    change_person (function): changes the pronouns of a list of words
+                              for the {person} field
+
+    Attributes:
+    rules (list of Rules): the rules in the order of their numbers
+    change_person (function): changes the pronouns of a list of words
+    fields (dictionary): reply: set of the names of its fields
+    by_first (dictionary): first word: rules expecting it first
+    by_keyword (dictionary): keyword: rules expecting it and no first
+                             word
+    tails (tuple of lists of Rules): the rules expecting none of the
+                                     above, then these rules and the
+                                     rules only expecting a question mark
+    """
+
+    def __init__(self, rules, change_person=' '.join):
+        self.rules = sorted(rules, key=by_number)
+        self.change_person = change_person
+        self.fields = {}
+        self.by_first = collections.defaultdict(list)
+        self.by_keyword = collections.defaultdict(list)
+        questions = []
+        always = []
+        numbers = set()
+        for rule in self.rules:
+            if rule.number in numbers:
+                raise ValueError(f'rule {rule.number} is declared twice')
+            numbers.add(rule.number)
+            for template in rule.replies:
+                self.fields[template] = {
+                    field for text, field, spec, conversion
+                    in string.Formatter().parse(template) if field}
+            if rule.first is not None:
+                for word in rule.first:
+                    self.by_first[word].append(rule)
+            elif rule.keywords is not None:
+                for word in rule.keywords:
+                    self.by_keyword[word].append(rule)
+            elif rule.question:
+                questions.append(rule)
+            else:
+                always.append(rule)
+        # Indexed by the question mark flag: False or True
+        self.tails = (always, sorted(always + questions, key=by_number))
+
+    def candidates(self, words, question):
+        """
+        List the rules that may apply to an utterance.
+        :param words: (list of strings) the lowercase words of the
+                      utterance
+        :param question: (Boolean) True if the utterance ends with '?'
+        :return: (list of lists of Rules) the candidate rules, each list
+                 in the order of their numbers
+        """
+        lists = [self.tails[question]]
+        if words and words[0] in self.by_first:
+            lists.append(self.by_first[words[0]])
+        if self.by_keyword:
+            lists.extend(self.by_keyword[word]
+                         for word in self.by_keyword.keys() & words)
+        return lists
+
+    def find(self, words, question):
+        """
+        Find the rule of an utterance.
+        :param words: (list of strings) the lowercase words of the
+                      utterance
+        :param question: (Boolean) True if the utterance ends with '?'
+        :return: (Rule) the matching rule with the lowest number, or
+                 None if no rule matches
+        """
+        lists = self.candidates(words, question)
+        if len(lists) > 1:
+            lists[0] = heapq.merge(*lists, key=by_number)
+        for rule in lists[0]:
+            if matches(rule, words, question):
+                return rule
+        return None
+
+    def respond(self, rule, name, words, generator=random):
+        """
+        Write the reply of a rule to an utterance.
+        :param rule: (Rule) the rule matching the utterance
+        :param name: (string) the name of the user
+        :param words: (list of strings) the lowercase words of the
+                      utterance
+        :param generator: (Random) chooses among the possible replies
+        :return: (Reply) the reply
+        """
+        template = rule.replies[0]
+        if len(rule.replies) > 1:  # draws like random.choice did
+            template = generator.choice(rule.replies)
+        needed = self.fields[template]
+        fields = {'name': name}
+        if rule.second is not None:
+            rest = words[2:]
+        elif rule.first is not None:
+            rest = words[1:]
+        else:
+            rest = words
+        if 'first' in needed:
+            fields['first'] = words[0]
+        if 'second' in needed:
+            fields['second'] = words[1]
+        if 'text' in needed:
+            fields['text'] = ' '.join(rest)
+        if 'person' in needed:
+            fields['person'] = self.change_person(rest)
+        if 'topic' in needed:
+            fields['topic'] = next(word for word in words
+                                   if word in rule.keywords)
+        return Reply(template.format_map(fields), rule.number, rule.done)
@@ -0,0 +1,195 @@
+# ----------------------------------------------------------------------
+# Name:      server
+# Purpose:   host many chatbot conversations over TCP or a local socket
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Asyncio chatbot server
+
+Every connection is one conversation with its own name and state, the
+replies being written by chat.reply, so the rules never wait on the
+network and one process serves all the conversations.  The protocol is
+one line of UTF-8 text per request and per reply:
+
+    server: Hello. What is your name please?
+    client: Ann                         the name of the user
+    server: Talk to me please>
+    client: I need my dog               an utterance
+    server: Tell me more about your dog, Ann.
+    client: bye
+    server: Bye Ann.                    the goodbye takes two lines, then
+    server: Have a great day!           the server closes the connection
+
+Thousands of conversations can be served by one process as long as the
+limit on open files (ulimit -n) allows that many sockets.
+
+With --metrics, the rules used and the latency of the turns are
+recorded by a ChatMetrics object and exported as JSON when the server
+stops, or at any time on the signal SIGUSR1 (kill -USR1 <pid>).
+
+usage: server.py [-h] [--host HOST] [-p PORT | -u UNIX] [-m METRICS]
+"""
+import argparse
+import asyncio
+import random
+import signal
+import chat
+import metrics
+import rules
+
+LINE_LIMIT = 2 ** 16  # longest utterance accepted, in bytes
+PORT = 12300
+GREETING = "Hello. What is your name please?"
+PROMPT = "Talk to me please>"
+
+
+class ChatSession:
+    """
+    The conversation held over one connection.
+
+    Arguments:
+    generator (Random): chooses among the possible replies
+    metrics (ChatMetrics): records the turns, or None
+
+    Attributes:
+    generator (Random): chooses among the possible replies
+    metrics (ChatMetrics): records the turns, or None
+    name (string): the name of the user, None until it is given
+    turns (integer): number of utterances answered
+    """
+
+    def __init__(self, generator=random, metrics=None):
+        self.generator = generator
+        self.metrics = metrics
+        self.name = None
+        self.turns = 0
+
+    def respond(self, line):
+        """
+        Handle one request line.
+        :param line: (string) the request without its line ending
+        :return: (Reply) the reply, done if the conversation is over
+        """
+        if self.name is None:
+            self.name = line
+            return rules.Reply(PROMPT, None, False)
+        self.turns += 1
+        return chat.reply(self.name, line, self.generator,
+                          metrics=self.metrics)
+
+
+class ChatServer:
+    """
+    Serves chatbot conversations.
+
+    Arguments:
+    metrics (ChatMetrics): records the turns of every session, or None
+
+    Attributes:
+    metrics (ChatMetrics): records the turns of every session, or None
+    sessions (integer): number of conversations currently connected
+    turns (integer): number of utterances answered since the start
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.sessions = 0
+        self.turns = 0
+
+    async def handle(self, reader, writer):
+        """
+        Hold the conversation of one connection until it is over.
+        :param reader: (StreamReader) the requests of the client
+        :param writer: (StreamWriter) the replies to the client
+        :return: None
+        """
+        session = ChatSession(metrics=self.metrics)
+        self.sessions += 1
+        try:
+            writer.write(f'{GREETING}\n'.encode('UTF-8'))
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # the line is longer than LINE_LIMIT
+                    writer.write(b'Please say that in fewer words.\n')
+                    break
+                if not line:
+                    break
+                reply = session.respond(
+                    line.decode('UTF-8', 'replace').rstrip('\r\n'))
+                writer.write(f'{reply.text}\n'.encode('UTF-8'))
+                if reply.done:
+                    break
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            self.turns += session.turns
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=PORT, path=None):
+        """
+        Start listening for connections.
+        :param host: (string) the address to listen on
+        :param port: (integer) the TCP port, 0 for any free port
+        :param path: (string) name of a Unix socket to listen on instead
+                     of TCP, or None
+        :return: (asyncio.Server) the listening server
+        """
+        if path:
+            return await asyncio.start_unix_server(self.handle, path,
+                                                   limit=LINE_LIMIT,
+                                                   backlog=1024)
+        return await asyncio.start_server(self.handle, host, port,
+                                          limit=LINE_LIMIT, backlog=1024)
+
+
+async def serve(host, port, path, metrics_file=None):
+    """
+    Serve conversations until interrupted.
+    :param host: (string) the address to listen on
+    :param port: (integer) the TCP port
+    :param path: (string) name of a Unix socket or None
+    :param metrics_file: (string) name of the JSON file the metrics are
+                         exported to, or None not to record them
+    :return: None
+    """
+    chat_metrics = metrics.ChatMetrics() if metrics_file else None
+    chat_server = ChatServer(chat_metrics)
+    server = await chat_server.start(host, port, path)
+    address = path or '{}:{}'.format(*server.sockets[0].getsockname())
+    print(f'chatting on {address}')
+    if chat_metrics:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR1, chat_metrics.export, metrics_file)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if chat_metrics:
+            chat_metrics.export(metrics_file)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-p', '--port', type=int, default=PORT,
+                       help='TCP port to listen on')
+    group.add_argument('-u', '--unix', help='Unix socket to listen on')
+    parser.add_argument('-m', '--metrics',
+                        help='JSON file to export the rule counters and '
+                             'latencies to')
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, arguments.unix,
+                          arguments.metrics))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+import asyncio
+import io
+import json
+import random
+import string
+import unittest
+import chat
+import metrics
+import rewrite
+import rules
+import server
+import transcript
+
+VOCABULARY = ['bye', 'do', 'can', 'will', 'would', 'you', 'why', 'how',
+              'what', 'i', 'need', 'think', 'have', 'want', 'tell', 'give',
+              'say', 'too', 'because', 'dog', 'mom', 'my', 'me', 'am',
+              'your', 'cake', 'like', 'the']
+
+
+def original_reply(name, user_input, generator):
+    """
+    The 12 cases as the match statement of the original chat_with wrote
+    them, returning (reply, rule number) instead of printing.
+    """
+    has_question_mark = user_input.endswith("?")
+    stripped_words = user_input.lower().strip(string.punctuation).split()
+    match stripped_words:
+        case ["bye"]:
+            return f"Bye {name}. \nHave a great day!", 1
+        case [*words] if set(words) & chat.SPECIAL_TOPICS:
+            topic = next(word for word in words
+                         if word in chat.SPECIAL_TOPICS)
+            return f"Tell me more about your {topic}, {name}.", 2
+        case [("do" | "can" | "will" | "would") as verb, "you", *words]:
+            return generator.choice([
+                f"No {name}, I {verb} not {chat.change_person(words)}.",
+                f"yes I {verb}."]), 3
+        case ["why", *words] if has_question_mark:
+            return "Why not?", 4
+        case ["how", *words] if has_question_mark:
+            return generator.choice([
+                f"{name}, why do you ask?",
+                f"{name}, how would an answer to that help you?"]), 5
+        case ["what", *words] if has_question_mark:
+            return generator.choice([f"What do you think {name}?",
+                                     f"Why is that important {name}?"]), 6
+        case ["i", ("need" | "think" | "have" | "want") as verb, *words]:
+            return f"Why do you {verb} {chat.change_person(words)}?", 7
+        case ["i", *words] if words and words[-1] != "too":
+            return f"I {' '.join(words)} too.", 8
+        case [("tell" | "give" | "say") as verb, *words]:
+            return f"You {verb} {' '.join(words)}.", 9
+        case [*words] if has_question_mark:
+            return generator.choice(["I have no clue.", "Maybe."]), 10
+        case [*words] if "because" in words:
+            return "Is that the real reason?", 11
+        case _:
+            return generator.choice(["That's interesting.", "That's nice!",
+                                     "Can you elaborate on that?"]), 12
+
+
+class ReplyTestCase(unittest.TestCase):
+    def test_rules(self):
+        """Test one utterance for each of the 12 rules"""
+        cases = [('Bye', 1), ('I love my mom!', 2), ('Do you sing', 3),
+                 ('why is that?', 4), ('How are you?', 5),
+                 ('What now?', 6), ('I need my keys', 7),
+                 ('I like cake', 8), ('Tell me a story', 9),
+                 ('Is it late?', 10), ('because it is', 11),
+                 ('hello', 12)]
+        for text, number in cases:
+            self.assertEqual(chat.reply('Ann', text).rule, number, text)
+
+    def test_replies(self):
+        """Test the replies of the rules without random choice"""
+        self.assertEqual(chat.reply('Ann', 'bye.'),
+                         ('Bye Ann. \nHave a great day!', 1, True))
+        self.assertEqual(chat.reply('Ann', 'I want you to stay').text,
+                         'Why do you want me to stay?')
+        self.assertEqual(chat.reply('Ann', 'Say cheese').text,
+                         'You say cheese.')
+        self.assertEqual(chat.reply('Ann', 'i am here').text,
+                         'I am here too.')
+
+    def test_lone_i(self):
+        """Test that 'I' alone falls through rule 8 instead of failing"""
+        self.assertEqual(chat.reply('Ann', 'I').rule, 12)
+        self.assertEqual(chat.reply('Ann', 'I?').rule, 10)
+        self.assertEqual(chat.reply('Ann', 'I too').rule, 12)
+
+    def test_original_priority(self):
+        """Test random utterances against the original match statement"""
+        generator = random.Random(122)
+        for round_number in range(5000):
+            words = generator.choices(VOCABULARY, k=generator.randint(0, 6))
+            text = ' '.join(words) + generator.choice(['', '.', '?', '!'])
+            seed = generator.random()
+            expected = original_reply('Ann', text, random.Random(seed))
+            actual = chat.reply('Ann', text, random.Random(seed))
+            self.assertEqual((actual.text, actual.rule), expected, text)
+
+
+class RuleIndexTestCase(unittest.TestCase):
+    def test_duplicate_numbers(self):
+        """Test that two rules with the same number are rejected"""
+        with self.assertRaises(ValueError):
+            rules.RuleIndex([rules.Rule(1, ('a',)), rules.Rule(1, ('b',))])
+
+    def test_candidates_match_scan(self):
+        """Test that the index finds the rule a scan of the table finds"""
+        generator = random.Random(5)
+        table = [rules.Rule(number, (str(number),),
+                            first=generator.choice(
+                                [None, set(generator.sample(VOCABULARY, 2))]),
+                            keywords=generator.choice(
+                                [None, {generator.choice(VOCABULARY)}]),
+                            question=generator.random() < 0.3)
+                 for number in range(1, 300)]
+        index = rules.RuleIndex(table)
+        for round_number in range(2000):
+            words = generator.choices(VOCABULARY, k=generator.randint(0, 5))
+            question = generator.random() < 0.5
+            expected = next((rule for rule in table
+                             if rules.matches(rule, words, question)), None)
+            self.assertEqual(index.find(words, question), expected)
+
+
+class ServerTestCase(unittest.TestCase):
+    async def converse(self, requests):
+        chat_server = server.ChatServer()
+        listener = await chat_server.start(port=0)
+        host, port = listener.sockets[0].getsockname()
+        reader, writer = await asyncio.open_connection(host, port)
+        replies = [await reader.readline()]
+        for line in requests:
+            writer.write(line.encode('UTF-8') + b'\n')
+            replies.append(await reader.readline())
+        replies.append(await reader.read())
+        writer.close()
+        await writer.wait_closed()
+        listener.close()
+        await listener.wait_closed()
+        self.assertEqual((chat_server.sessions, chat_server.turns), (0, 3))
+        return [reply.decode('UTF-8').rstrip('\n') for reply in replies]
+
+    def test_conversation(self):
+        """Test a conversation held over a connection to the server"""
+        actual = asyncio.run(self.converse(['Zoë', 'I want my cat',
+                                            'Say hi', 'bye']))
+        expected = [server.GREETING, server.PROMPT,
+                    'Tell me more about your cat, Zoë.', 'You say hi.',
+                    'Bye Zoë. ', 'Have a great day!']
+        self.assertEqual(actual, expected)
+
+    def test_sessions_apart(self):
+        """Test that each session keeps its own name"""
+        first = server.ChatSession()
+        second = server.ChatSession()
+        first.respond('Ann')
+        second.respond('Bob')
+        self.assertEqual(first.respond('tell me').text, 'You tell me.')
+        self.assertEqual(second.respond('bye').text,
+                         'Bye Bob. \nHave a great day!')
+        self.assertEqual((first.turns, second.turns), (1, 1))
+
+
+class TranscriptTestCase(unittest.TestCase):
+    def test_rules_and_escapes(self):
+        """Test that each line gets its rule and a one-line reply"""
+        output = io.StringIO()
+        count = transcript.reply_transcript(
+            io.StringIO('Tell me more\r\nI like tea\n\nbye\n'), output,
+            'Ann', processes=0)
+        self.assertEqual(count, 4)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], '9\tYou tell me more.')
+        self.assertEqual(lines[1], '8\tI like tea too.')
+        self.assertTrue(lines[2].startswith('12\t'))
+        self.assertEqual(lines[3], '1\tBye Ann. \\nHave a great day!')
+
+    def test_seeded(self):
+        """Test that the replies only depend on the seed, not the pool"""
+        utterances = ''.join(f'how about {number}?\n'
+                             for number in range(500))
+        outputs = []
+        for seed, processes in [(1, 0), (1, 2), (2, 0)]:
+            output = io.StringIO()
+            transcript.reply_transcript(io.StringIO(utterances), output,
+                                        seed=seed, batch=64,
+                                        processes=processes)
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertNotEqual(outputs[0], outputs[2])
+        self.assertEqual(len(outputs[0].splitlines()), 500)
+
+
+class MetricsTestCase(unittest.TestCase):
+    def test_rule_counters(self):
+        """Test that each turn counts its rule and its latencies"""
+        chat_metrics = metrics.ChatMetrics()
+        for text in ['hello', 'hi', 'why?', 'I like tea', 'hey']:
+            chat.reply('Ann', text, metrics=chat_metrics)
+        summary = chat_metrics.summary()
+        self.assertEqual(summary['rules'], {'12': 3, '4': 1, '8': 1})
+        self.assertEqual(list(summary['rules']), ['12', '4', '8'])
+        self.assertEqual((summary['turns'], summary['fall_through']),
+                         (5, 3))
+        self.assertEqual(summary['fall_through_share'], 0.6)
+        for step in metrics.STEPS:
+            self.assertEqual(summary['steps'][step]['count'], 5)
+
+    def test_merge(self):
+        """Test that a summary merged adds up to the turns of both"""
+        first = metrics.ChatMetrics()
+        second = metrics.ChatMetrics()
+        first.record(2, 1e-6, 3e-6, 2e-6)
+        second.record(2, 4e-6, 1e-4, 1e-6)
+        second.record(12, 1e-6, 1e-6, 1e-6)
+        first.merge(json.loads(json.dumps(second.summary())))
+        summary = first.summary()
+        self.assertEqual(summary['rules'], {'2': 2, '12': 1})
+        self.assertEqual(summary['steps']['turn']['count'], 3)
+        self.assertEqual(summary['steps']['match']['p99_us'], 100)
+        self.assertEqual(summary['steps']['tokenize']['buckets'],
+                         {'<=1': 2, '<=5': 1})
+
+    def test_transcript_metrics(self):
+        """Test that the metrics of the chunks of a pool are merged"""
+        utterances = ''.join(f'how about {number}?\n' if number % 3
+                             else 'hello\n' for number in range(300))
+        rules_used = []
+        for processes in [0, 2]:
+            chat_metrics = metrics.ChatMetrics()
+            transcript.reply_transcript(io.StringIO(utterances),
+                                        io.StringIO(), batch=64,
+                                        processes=processes,
+                                        chat_metrics=chat_metrics)
+            rules_used.append(chat_metrics.summary()['rules'])
+        self.assertEqual(rules_used[0], {'5': 200, '12': 100})
+        self.assertEqual(rules_used[1], rules_used[0])
+
+
+class RewriteTestCase(unittest.TestCase):
+    def test_single_words(self):
+        """Test that utterances without phrases change like before"""
+        generator = random.Random(25)
+        vocabulary = ['i', 'my', 'me', 'you', 'your', 'am', 'cat', 'is']
+        for round_number in range(2000):
+            words = generator.choices(vocabulary, k=generator.randint(0, 9))
+            if any(phrase == tuple(words[position:position + 2])
+                   for phrase in chat.PHRASES
+                   for position in range(len(words))):
+                continue
+            expected = ' '.join(chat.PRONOUNS_DICT.get(word, word)
+                                for word in words)
+            self.assertEqual(chat.change_person(words), expected)
+
+    def test_phrases(self):
+        """Test that the phrases are changed as a whole"""
+        cases = [('you are my friend', 'I am your friend'),
+                 ('i am sure you are', 'you are sure I am'),
+                 ('are you with me', 'am I with you'),
+                 ('i was told you were late', 'you were told I was late'),
+                 ('you are you', 'I am me'), ('love you', 'love me')]
+        for text, expected in cases:
+            self.assertEqual(chat.change_person(text.split()), expected)
+        self.assertEqual(chat.reply('Ann', 'I think you are right').text,
+                         'Why do you think I am right?')
+
+    def test_longest_phrase(self):
+        """Test that the longest phrase wins and phrases do not overlap"""
+        rewriter = rewrite.PhraseRewriter(
+            {'a': 'A'}, {('a', 'b'): 'X', ('a', 'b', 'c'): 'Y',
+                         ('b', 'c'): 'Z', ('d',): 'D'})
+        self.assertEqual(rewriter.rewrite('a b c'.split()), 'Y')
+        self.assertEqual(rewriter.rewrite('a b a b c d'.split()), 'X Y D')
+        self.assertEqual(rewriter.rewrite('a a b'.split()), 'A X')
+        self.assertEqual(rewriter.rewrite('b a'.split()), 'b A')
+        self.assertEqual(rewriter.rewrite([]), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
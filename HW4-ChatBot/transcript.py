@@ -0,0 +1,181 @@
+# ----------------------------------------------------------------------
+# Name:      transcript
+# Purpose:   reply to a whole transcript of utterances offline
+# Author(s): Timothy Phan and Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Batch mode of the chatbot for logs of utterances
+
+The transcript is read one line at a time, each line being an utterance
+of the user, and the number of the rule that replied and the reply are
+written for each line, separated by a tab, with the line break of the
+goodbye written as \\n.  The lines are answered in chunks, each chunk
+with its own random number generator seeded from the seed and the
+number of its first line, so the output depends on the seed and the
+size of the chunks but not on the number of processes.  With a pool of
+processes, only a few chunks per process are in flight at a time, so
+memory stays the same however long the transcript is.  With --metrics,
+each chunk also records the rules used and the latency of its turns,
+and the summaries of the chunks are merged and exported as JSON.
+
+usage: transcript.py [-h] [-o OUTPUT] [-n NAME] [--seed SEED]
+                     [-b BATCH] [-P PROCESSES] [-m METRICS] filename
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import random
+import sys
+import time
+import chat
+import metrics
+
+
+def read_chunks(lines, batch):
+    """
+    Split the lines of a transcript into chunks.
+    :param lines: (iterable of strings) the lines of the transcript
+    :param batch: (integer) number of lines in a chunk
+    :return: (generator) tuples (number of the first line, list of the
+             utterances of the chunk)
+    """
+    lines = iter(lines)
+    start = 0
+    while True:
+        chunk = [line.rstrip('\r\n') for line in itertools.islice(lines,
+                                                                 batch)]
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def escape(text):
+    """
+    Keep a reply on one line of the output.
+    :param text: (string) the reply
+    :return: (string) the reply with its line breaks written as \\n
+    """
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def reply_chunk(name, seed, utterances, measure=False):
+    """
+    Reply to a chunk of utterances, possibly in a worker process.
+    :param name: (string) the name of the user
+    :param seed: the seed of the random number generator of the chunk
+    :param utterances: (list of strings) the utterances of the chunk
+    :param measure: (Boolean) True to record the metrics of the turns
+    :return: a tuple (list of the output line of each utterance, summary
+             of the ChatMetrics of the chunk or None)
+    """
+    generator = random.Random(seed)
+    chat_metrics = metrics.ChatMetrics() if measure else None
+    output = []
+    for text in utterances:
+        reply = chat.reply(name, text, generator, metrics=chat_metrics)
+        output.append(f'{reply.rule}\t{escape(reply.text)}\n')
+    return output, chat_metrics and chat_metrics.summary()
+
+
+def write_chunk(output_file, result, chat_metrics):
+    """
+    Write the replies of a chunk and merge its metrics.
+    :param output_file: (file) receives the replies
+    :param result: (tuple) the result of reply_chunk
+    :param chat_metrics: (ChatMetrics) receives the metrics or None
+    :return: None
+    """
+    output, summary = result
+    output_file.writelines(output)
+    if chat_metrics is not None:
+        chat_metrics.merge(summary)
+
+
+def reply_transcript(lines, output_file, name='User', seed=0, batch=1000,
+                     processes=0, chat_metrics=None):
+    """
+    Reply to every utterance of a transcript.
+    :param lines: (iterable of strings) the lines of the transcript
+    :param output_file: (file) receives the rule and reply of each line
+    :param name: (string) the name of the user
+    :param seed: the seed making the replies reproducible
+    :param batch: (integer) number of lines answered at a time
+    :param processes: (integer) number of processes, None for one per
+                      core or 0 to answer in this process
+    :param chat_metrics: (ChatMetrics) receives the metrics of the turns,
+                         or None not to record them
+    :return: (integer) number of lines answered
+    """
+    count = 0
+    chunks = read_chunks(lines, batch)
+    measure = chat_metrics is not None
+    if processes == 0:
+        for start, utterances in chunks:
+            write_chunk(output_file, reply_chunk(name, f'{seed}-{start}',
+                                                 utterances, measure),
+                        chat_metrics)
+            count += len(utterances)
+        return count
+    workers = processes or os.cpu_count()
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for start, utterances in chunks:
+            pending.append(pool.submit(reply_chunk, name, f'{seed}-{start}',
+                                       utterances, measure))
+            count += len(utterances)
+            if len(pending) > 2 * workers:  # bounds the chunks in memory
+                write_chunk(output_file, pending.popleft().result(),
+                            chat_metrics)
+        while pending:
+            write_chunk(output_file, pending.popleft().result(),
+                        chat_metrics)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename',
+                        help='transcript of utterances, - for stdin')
+    parser.add_argument('-o', '--output',
+                        help='file of the replies (default: stdout)')
+    parser.add_argument('-n', '--name', default='User',
+                        help='name of the user in the replies')
+    parser.add_argument('--seed', default=0,
+                        help='seed of the random replies')
+    parser.add_argument('-b', '--batch', type=int, default=1000,
+                        help='lines answered at a time')
+    parser.add_argument('-P', '--processes', type=int, default=0,
+                        help='reply processes, 0 for none')
+    parser.add_argument('-m', '--metrics',
+                        help='JSON file to export the rule counters and '
+                             'latencies to')
+    arguments = parser.parse_args()
+    chat_metrics = metrics.ChatMetrics() if arguments.metrics else None
+    input_file = sys.stdin
+    output_file = sys.stdout
+    try:
+        if arguments.filename != '-':
+            input_file = open(arguments.filename, encoding='UTF-8')
+        if arguments.output:
+            output_file = open(arguments.output, 'w', encoding='UTF-8')
+        start = time.perf_counter()
+        count = reply_transcript(input_file, output_file, arguments.name,
+                                 arguments.seed, arguments.batch,
+                                 arguments.processes, chat_metrics)
+        elapsed = time.perf_counter() - start
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    print(f'{count} lines in {elapsed:.2f} s '
+          f'({count / max(elapsed, 1e-9):.0f} lines/s)', file=sys.stderr)
+    if chat_metrics:
+        chat_metrics.export(arguments.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# ----------------------------------------------------------------------
+# Name:        benchparse.py
+# Purpose:     Benchmark the page parsing and extraction of scrape.py
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Benchmarks parsing and extraction over saved faculty/staff html pages
+
+Every .html file of the fixture folder (or every page of a snapshot
+archive recorded by scrape.py --snapshot) is parsed repeatedly, first the
+original way (html.parser and the four extract_* functions, each of
+which walks the whole document) and then with the single-pass
+extract_all on every parser that is installed.  The parse and extract
+time per page are printed along with a check that every variant
+extracts the same info.  Finally the email and telephone patterns are
+run over every string of every page, once as plain compiled regular
+expressions and once through the pre-filtered scrape.PATTERNS.
+
+usage: benchparse.py [-h] [-n REPEAT] [pages]
+"""
+import argparse
+import glob
+import os
+import re
+import time
+import bs4
+import scrape
+import snapshot
+
+PARSERS = ('html.parser', 'lxml')
+
+
+def separate_passes(soup):
+    """
+    Extract the info the original way, one document walk per field.
+    :param soup: (Beautiful Soup object) the parsed page
+    :return: a tuple in the format returned by get_info
+    """
+    return (scrape.extract_name(soup), scrape.extract_email(soup),
+            scrape.extract_phone(soup), scrape.extract_education(soup))
+
+
+def time_per_page(function, items, repeat):
+    """
+    Time the function specified over every item.
+    :param function: (function) the function to time
+    :param items: (list) the pages or soups to call it on
+    :param repeat: (integer) how many times to go over the items
+    :return: a tuple (milliseconds per item, list of results)
+    """
+    start = time.perf_counter()
+    for count in range(repeat):
+        results = [function(item) for item in items]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (repeat * len(items)), results
+
+
+def pattern_cost(soups, repeat):
+    """
+    Time the email and telephone patterns over every string of the
+    pages, with and without the substring pre-filter.
+    :param soups: (list of Beautiful Soup objects) the parsed pages
+    :param repeat: (integer) how many times to go over the pages
+    :return: a tuple (plain ms per page, pre-filtered ms per page)
+    """
+    strings = [[str(text) for text in soup.find_all(string=True)]
+               for soup in soups]
+    plain = [re.compile(pattern.regex.pattern, pattern.regex.flags)
+             for pattern in (scrape.PATTERNS['email'],
+                             scrape.PATTERNS['telephone'])]
+    filtered = [scrape.PATTERNS['email'], scrape.PATTERNS['telephone']]
+
+    def run(patterns):
+        def search_page(page_strings):
+            return [pattern.search(text) is not None
+                    for text in page_strings for pattern in patterns]
+        return time_per_page(search_page, strings, repeat)
+
+    plain_time, plain_results = run(plain)
+    filtered_time, filtered_results = run(filtered)
+    assert plain_results == filtered_results
+    return plain_time, filtered_time
+
+
+def load_pages(source):
+    """
+    Read the saved pages from a folder of .html files or a snapshot.
+    :param source: (string) the folder or snapshot archive name
+    :return: (list of bytes) the html pages
+    """
+    if os.path.isfile(source):
+        reader = snapshot.SnapshotReader(source)
+        pages = [body for url, body in reader.pages()]
+        reader.close()
+        return pages
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(source, '*.html'))):
+        with open(filename, 'rb') as page_file:
+            pages.append(page_file.read())
+    return pages
+
+
+def installed(parser):
+    """
+    Check whether the Beautiful Soup parser specified is installed.
+    :param parser: (string) name of the Beautiful Soup parser
+    :return: (boolean) True if the parser can be used
+    """
+    try:
+        bs4.BeautifulSoup('', parser)
+    except bs4.FeatureNotFound:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('pages', nargs='?', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'fixtures'),
+                        help='folder of saved .html pages or a snapshot')
+    parser.add_argument('-n', '--repeat', type=int, default=20,
+                        help='how many times to go over the pages')
+    arguments = parser.parse_args()
+    pages = load_pages(arguments.pages)
+    if not pages:
+        print(f'No pages in {arguments.pages}')
+        return
+
+    print(f'{len(pages)} pages x {arguments.repeat}, ms per page:')
+    baseline = expected = None
+    for name in PARSERS:
+        if not installed(name):
+            print(f'  {name}: not installed')
+            continue
+        parse_time, soups = time_per_page(
+            lambda page: bs4.BeautifulSoup(page, name), pages,
+            arguments.repeat)
+        if baseline is None:
+            extract_time, expected = time_per_page(separate_passes, soups,
+                                                   arguments.repeat)
+            baseline = parse_time + extract_time
+            print(f'  {name:11} separate passes: parse {parse_time:6.2f} '
+                  f'+ extract {extract_time:5.2f} = {baseline:6.2f}')
+        extract_time, results = time_per_page(scrape.extract_all, soups,
+                                              arguments.repeat)
+        total = parse_time + extract_time
+        print(f'  {name:11} single pass:     parse {parse_time:6.2f} '
+              f'+ extract {extract_time:5.2f} = {total:6.2f}  '
+              f'speedup {baseline / total:4.2f}x  '
+              f'{"same info" if results == expected else "INFO DIFFERS"}')
+
+    plain, filtered = pattern_cost([bs4.BeautifulSoup(page, 'html.parser')
+                                    for page in pages], arguments.repeat)
+    print(f'  email + telephone patterns over every string: plain regex '
+          f'{plain:5.3f}, pre-filtered {filtered:5.3f} '
+          f'({plain / filtered:4.1f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# ----------------------------------------------------------------------
+# Name:        benchscrape.py
+# Purpose:     Benchmark the scraping pipeline against a local server
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Benchmarks the serial and concurrent harvest against a local server
+
+The local stand-in directory server answers every request after a
+configurable delay, which simulates the round-trip time to sjsu.edu.
+The harvest function is timed once serially and once for each worker
+count requested, and the csv files produced are compared to make sure
+the concurrent harvest writes the same rows in the same order.
+Then a cold and a warm run through the on-disk response cache are
+timed to show the cost of a re-harvest when no page has changed.
+Finally the crawl is recorded to a snapshot and replayed with each
+number of extract processes requested, which shows how parsing scales
+with the cores once the network is out of the way.
+
+usage: benchscrape.py [-h] [-p PEOPLE] [-d DELAY] [-m MENU]
+                      [-w WORKERS ...] [-P PROCESSES ...]
+"""
+import argparse
+import filecmp
+import httpclient
+import os
+import tempfile
+import time
+import localserver
+import scrape
+import snapshot
+
+
+def time_harvest(url, filename, workers, processes=0):
+    """
+    Time a single harvest run.
+    :param url: (string) the directory index url
+    :param filename: (string) name of the output csv file
+    :param workers: (integer) number of pages to fetch concurrently
+    :param processes: (integer) number of extract processes
+    :return: (float) the wall-clock time in seconds
+    """
+    start = time.perf_counter()
+    scrape.harvest(url, filename, workers, processes=processes)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--people', type=int, default=200,
+                        help='number of person pages to serve')
+    parser.add_argument('-d', '--delay', type=float, default=0.02,
+                        help='seconds the server waits before answering')
+    parser.add_argument('-w', '--workers', type=int, nargs='+',
+                        default=[4, 8, 16], help='worker counts to time')
+    parser.add_argument('-m', '--menu', type=int, default=300,
+                        help='navigation links padding each person page')
+    parser.add_argument('-P', '--processes', type=int, nargs='+',
+                        default=[1, 2, 4], help='extract process counts to '
+                                                'time on the replayed crawl')
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder, \
+            localserver.serve(arguments.people, arguments.delay,
+                              menu_items=arguments.menu) as url:
+        serial_file = os.path.join(folder, 'serial.csv')
+        serial = time_harvest(url, serial_file, 1)
+        print(f'{arguments.people} pages, {arguments.delay * 1000:.0f} ms '
+              f'delay per request')
+        print(f'  serial:     {serial:7.2f} s')
+        for workers in arguments.workers:
+            concurrent_file = os.path.join(folder, f'workers{workers}.csv')
+            elapsed = time_harvest(url, concurrent_file, workers)
+            same = filecmp.cmp(serial_file, concurrent_file, shallow=False)
+            print(f'  {workers:2d} workers: {elapsed:7.2f} s  '
+                  f'speedup {serial / elapsed:5.1f}x  '
+                  f'{"same rows" if same else "ROWS DIFFER"}')
+
+        workers = max(arguments.workers)
+        scrape.use_client(httpclient.HttpClient(os.path.join(folder,
+                                                             'cache')))
+        for run in ('cold cache', 'warm cache'):
+            cached_file = os.path.join(folder, 'cached.csv')
+            elapsed = time_harvest(url, cached_file, workers)
+            same = filecmp.cmp(serial_file, cached_file, shallow=False)
+            print(f'  {run}: {elapsed:7.2f} s  ({workers} workers)  '
+                  f'{"same rows" if same else "ROWS DIFFER"}')
+
+        archive = os.path.join(folder, 'crawl.snapshot')
+        scrape.use_client(snapshot.RecordingClient(httpclient.HttpClient(),
+                                                   archive))
+        time_harvest(url, os.path.join(folder, 'recorded.csv'), workers)
+        scrape.client.close()
+        scrape.use_client(snapshot.SnapshotReader(archive))
+        print('  replayed crawl, pages parsed per second:')
+        for processes in [0] + arguments.processes:
+            replay_file = os.path.join(folder, f'processes{processes}.csv')
+            elapsed = time_harvest(url, replay_file, workers, processes)
+            same = filecmp.cmp(serial_file, replay_file, shallow=False)
+            label = f'{processes} processes' if processes else 'in threads'
+            print(f'  {label:>12}: {arguments.people / elapsed:7.0f}  '
+                  f'{"same rows" if same else "ROWS DIFFER"}')
+        scrape.client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# ----------------------------------------------------------------------
+# Name:        csvsink.py
+# Purpose:     Streaming csv writer that can resume after a crash
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+A streaming csv writer with a checkpoint of the completed urls
+
+Rows are written with the csv module, so fields containing commas or
+quotes are quoted properly, and are flushed to disk in batches.  After
+each batch the urls whose rows are now safely on disk are appended to a
+checkpoint file together with the size of the csv file at that point.
+When a harvest is resumed, the csv file is truncated back to the last
+checkpointed size, which drops any row written after the checkpoint,
+and the checkpointed urls are skipped.
+"""
+import csv
+import os
+
+
+class CsvSink:
+    """
+    Csv file writer recording a checkpoint of the completed urls.
+
+    Arguments:
+    filename (string): name of the output csv file
+    header (list of strings): the column headers
+    resume (boolean): continue the harvest recorded in the checkpoint
+    batch_size (integer): how many urls to complete between flushes
+
+    Attributes:
+    filename (string): name of the output csv file
+    checkpoint_name (string): name of the checkpoint file
+    batch_size (integer): how many urls to complete between flushes
+    done (set of strings): urls completed by the interrupted harvest
+    pending (list of strings): urls completed since the last flush
+    file (file): the open csv file
+    writer (csv writer): writes the rows to the csv file
+    checkpoint (file): the open checkpoint file
+    """
+
+    def __init__(self, filename, header, resume=False, batch_size=50):
+        self.filename = filename
+        self.checkpoint_name = filename + '.checkpoint'
+        self.batch_size = batch_size
+        self.done = set()
+        self.pending = []
+        size = None
+        if resume:
+            size = self.load_checkpoint()
+        if size is None:
+            self.file = open(filename, 'w', newline='', encoding='UTF-8')
+            self.checkpoint = open(self.checkpoint_name, 'w',
+                                   encoding='UTF-8')
+        else:
+            self.file = open(filename, 'r+', newline='', encoding='UTF-8')
+            self.file.truncate(size)
+            self.file.seek(size)
+            self.checkpoint = open(self.checkpoint_name, 'a',
+                                   encoding='UTF-8')
+        self.writer = csv.writer(self.file, lineterminator='\n')
+        if size is None:
+            self.writer.writerow(header)
+            self.flush()
+
+    def load_checkpoint(self):
+        """
+        Read the urls completed by the interrupted harvest.
+        :return: (integer) the size of the csv file at the last
+                 checkpoint, or None if there is nothing to resume
+        """
+        if not (os.path.exists(self.checkpoint_name) and
+                os.path.exists(self.filename)):
+            return None
+        size = None
+        with open(self.checkpoint_name, encoding='UTF-8') as checkpoint:
+            for line in checkpoint:
+                # A line cut short by the crash has no newline
+                if not line.endswith('\n'):
+                    break
+                offset, url = line.rstrip('\n').split('\t', 1)
+                size = int(offset)
+                if url:
+                    self.done.add(url)
+        return size
+
+    def write(self, url, row=None):
+        """
+        Record that the url is complete, writing its row if it has one.
+        :param url: (string) the address of the completed page
+        :param row: (list of strings) the csv row or None for no row
+        :return: None
+        """
+        if row is not None:
+            self.writer.writerow(row)
+        self.pending.append(url)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Force the rows to disk, then checkpoint the pending urls.
+        :return: None
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        size = self.file.tell()
+        lines = [f'{size}\t{url}\n' for url in self.pending] or \
+                [f'{size}\t\n']
+        self.checkpoint.writelines(lines)
+        self.checkpoint.flush()
+        self.pending = []
+
+    def close(self, finished=True):
+        """
+        Flush the remaining rows and close the files.
+        :param finished: (boolean) True if every url has been written, in
+                         which case the checkpoint file is removed
+        :return: None
+        """
+        self.flush()
+        self.file.close()
+        self.checkpoint.close()
+        if finished:
+            os.remove(self.checkpoint_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(finished=exc_type is None)
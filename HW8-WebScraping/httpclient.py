@@ -0,0 +1,420 @@
+# ----------------------------------------------------------------------
+# Name:        httpclient.py
+# Purpose:     Keep-alive HTTP client with an on-disk response cache
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+A small HTTP client that reuses connections and caches responses
+
+Opening a new connection for every person page costs a TCP (and TLS)
+handshake per page.  The HttpClient keeps a pool of open keep-alive
+connections per host and hands them out to the threads fetching pages.
+When given a cache folder, every response body is saved to disk along
+with its ETag and Last-Modified headers, so that the next run sends a
+conditional request and reuses the saved body when the server answers
+304 Not Modified.  The cache can also remember the information that
+was extracted from a page so unchanged pages need not be parsed again.
+A FetchPolicy sets the socket timeout, the number of retries with
+exponential backoff after errors and 429/5xx answers, and an optional
+token bucket limiting the request rate.
+"""
+import collections
+import hashlib
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+
+USER_AGENT = f'Python-urllib/{sys.version_info[0]}.{sys.version_info[1]}'
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+RETRY_CODES = {429, 500, 502, 503, 504}
+
+# url: the final url after redirects
+# body: (bytes) the response body
+# not_modified: True if the body was reused from the cache after a 304
+Response = collections.namedtuple('Response', 'url body not_modified')
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the average rate of requests across threads.
+
+    Arguments:
+    rate (float): requests allowed per second on average
+    burst (integer): requests allowed back to back after an idle period
+
+    Attributes:
+    rate (float): requests allowed per second on average
+    burst (integer): the capacity of the bucket
+    tokens (float): tokens available, negative when requests are queued
+    updated (float): time of the last refill
+    lock (Lock): protects tokens and updated
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, sleeping until one becomes available.
+        :return: None
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens +
+                              (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        time.sleep(wait)
+
+
+class FetchPolicy:
+    """
+    How patiently and how fast pages are fetched.
+
+    Arguments:
+    timeout (float): socket timeout in seconds, or None to wait forever
+    retries (integer): how many times to retry a failed request
+    backoff (float): seconds to wait before the first retry, doubled
+                     before each following retry
+    rate (float): maximum requests per second, or None for no limit
+    max_delay (float): longest wait before a retry in seconds, or None
+                       for 4 times the longest backoff
+
+    Attributes:
+    timeout (float): socket timeout in seconds
+    retries (integer): how many times to retry a failed request
+    backoff (float): seconds to wait before the first retry
+    bucket (TokenBucket): the rate limiter or None
+    max_delay (float): longest wait before a retry, even when the
+                       server asks for more with Retry-After
+    """
+
+    def __init__(self, timeout=30, retries=3, backoff=0.5, rate=None,
+                 max_delay=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate) if rate else None
+        if max_delay is None:
+            max_delay = 4 * backoff * 2 ** retries
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Return how long to wait before retrying.
+        :param attempt: (integer) 0 for the first retry, 1 for the next...
+        :param retry_after: (string) the Retry-After header, if any
+        :return: (float) the delay in seconds, at most max_delay
+        """
+        if retry_after and retry_after.isdigit():
+            # A worker waiting a day on Retry-After would stall the harvest
+            return min(int(retry_after), self.max_delay)
+        return min(self.backoff * 2 ** attempt, self.max_delay)
+
+    def wait_turn(self):
+        """
+        Wait until the rate limit allows another request.
+        :return: None
+        """
+        if self.bucket:
+            self.bucket.acquire()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of idle keep-alive connections, one list per host.
+
+    Arguments:
+    max_idle (integer): maximum idle connections kept for each host
+    timeout (float): socket timeout of new connections in seconds
+
+    Attributes:
+    max_idle (integer): maximum idle connections kept for each host
+    timeout (float): socket timeout of new connections in seconds
+    idle (dictionary): (scheme, host): list of idle connections
+    lock (Lock): protects the idle dictionary
+    """
+
+    def __init__(self, max_idle=16, timeout=None):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.idle = collections.defaultdict(list)
+        self.lock = threading.Lock()
+
+    def get(self, scheme, host):
+        """
+        Return an idle connection to the host or open a new one.
+        :param scheme: (string) 'http' or 'https'
+        :param host: (string) the host name with an optional port
+        :return: (HTTPConnection) a connection to the host
+        """
+        with self.lock:
+            connections = self.idle[scheme, host]
+            if connections:
+                return connections.pop()
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, timeout=self.timeout)
+        return http.client.HTTPConnection(host, timeout=self.timeout)
+
+    def put(self, scheme, host, connection):
+        """
+        Return a connection to the pool once its response has been read.
+        :param scheme: (string) 'http' or 'https'
+        :param host: (string) the host name with an optional port
+        :param connection: (HTTPConnection) the connection to keep
+        :return: None
+        """
+        with self.lock:
+            connections = self.idle[scheme, host]
+            if len(connections) < self.max_idle:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """
+        Close every idle connection.
+        :return: None
+        """
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+
+class ResponseCache:
+    """
+    On-disk cache of response bodies and their validators, keyed by url.
+
+    Each url is stored as two files named after the sha1 of the url: a
+    .json file with the url, ETag, Last-Modified and extracted info,
+    and a .body file with the raw response body.
+
+    Arguments:
+    folder (string): the folder holding the cache files
+
+    Attributes:
+    folder (string): the folder holding the cache files
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, url, extension):
+        """
+        Return the path of a cache file for the url specified.
+        :param url: (string) the address of the web page
+        :param extension: (string) '.json' or '.body'
+        :return: (string) the path of the cache file
+        """
+        key = hashlib.sha1(url.encode('UTF-8')).hexdigest()
+        return os.path.join(self.folder, key + extension)
+
+    def write(self, path, data):
+        """
+        Atomically replace the file specified with the bytes specified.
+        :param path: (string) the path of the file
+        :param data: (bytes) the new content of the file
+        :return: None
+        """
+        descriptor, temp_path = tempfile.mkstemp(dir=self.folder)
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, url):
+        """
+        Return the cached metadata of the url specified.
+        :param url: (string) the address of the web page
+        :return: (dictionary) the metadata or None if it is not cached
+        """
+        try:
+            with open(self.path(url, '.json'), encoding='UTF-8') as meta:
+                return json.load(meta)
+        except (OSError, ValueError):
+            return None
+
+    def body(self, url):
+        """
+        Return the cached body of the url specified.
+        :param url: (string) the address of the web page
+        :return: (bytes) the body or None if it is not cached
+        """
+        try:
+            with open(self.path(url, '.body'), 'rb') as body_file:
+                return body_file.read()
+        except OSError:
+            return None
+
+    def put(self, url, headers, body):
+        """
+        Save a fresh response, forgetting any previously extracted info.
+        :param url: (string) the address of the web page
+        :param headers: (HTTPMessage) the response headers
+        :param body: (bytes) the response body
+        :return: None
+        """
+        meta = {'url': url, 'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'info': None}
+        self.write(self.path(url, '.body'), body)
+        self.write(self.path(url, '.json'), json.dumps(meta).encode())
+
+    def info(self, url):
+        """
+        Return the information previously extracted from the url.
+        :param url: (string) the address of the web page
+        :return: the saved info (JSON compatible) or None
+        """
+        meta = self.get(url)
+        return meta['info'] if meta else None
+
+    def remember(self, url, info):
+        """
+        Save the information extracted from the cached body of the url.
+        :param url: (string) the address of the web page
+        :param info: the extracted info (JSON compatible)
+        :return: None
+        """
+        meta = self.get(url)
+        if meta is not None:
+            meta['info'] = info
+            self.write(self.path(url, '.json'), json.dumps(meta).encode())
+
+
+class HttpClient:
+    """
+    Fetches web pages over pooled keep-alive connections.
+
+    Arguments:
+    cache_folder (string): folder for the response cache or None to
+                           disable caching
+    max_redirects (integer): how many redirects to follow
+    policy (FetchPolicy): timeout, retry and rate settings, or None for
+                          the defaults
+
+    Attributes:
+    policy (FetchPolicy): timeout, retry and rate settings
+    pool (ConnectionPool): the pool of idle connections
+    cache (ResponseCache): the response cache or None
+    max_redirects (integer): how many redirects to follow
+    """
+
+    def __init__(self, cache_folder=None, max_redirects=5, policy=None):
+        self.policy = policy or FetchPolicy()
+        self.pool = ConnectionPool(timeout=self.policy.timeout)
+        self.cache = ResponseCache(cache_folder) if cache_folder else None
+        self.max_redirects = max_redirects
+
+    def request(self, url, headers):
+        """
+        Send one GET request, retrying once if a reused connection has
+        been closed by the server in the meantime.
+        :param url: (string) the address of the web page
+        :param headers: (dictionary) the request headers
+        :return: a tuple (status, response headers, body)
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = urllib.parse.urlunsplit(('', '', parts.path or '/',
+                                        parts.query, ''))
+        for attempt in range(2):
+            connection = self.pool.get(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError):
+                connection.close()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.pool.put(parts.scheme, parts.netloc, connection)
+            return response.status, response.headers, body
+
+    def send(self, url, headers):
+        """
+        Send a GET request following the fetch policy: wait for the rate
+        limiter, and retry with exponential backoff after a network
+        error, a timeout or a 429/5xx answer.
+        :param url: (string) the address of the web page
+        :param headers: (dictionary) the request headers
+        :return: a tuple (status, response headers, body)
+        """
+        for attempt in range(self.policy.retries + 1):
+            last_attempt = attempt == self.policy.retries
+            self.policy.wait_turn()
+            try:
+                status, response_headers, body = self.request(url, headers)
+            except (OSError, http.client.HTTPException):
+                if last_attempt:
+                    raise
+                delay = self.policy.delay(attempt)
+            else:
+                if status not in RETRY_CODES or last_attempt:
+                    return status, response_headers, body
+                delay = self.policy.delay(attempt,
+                                          response_headers.get('Retry-After'))
+            time.sleep(delay)
+
+    def fetch(self, url):
+        """
+        Fetch the url specified, following redirects and using the cache.
+        :param url: (string) the address of the web page
+        :return: (Response) the final url, the body and whether it was
+                 reused from the cache
+        :raises urllib.error.HTTPError: if the server answers with an
+                error status
+        """
+        for redirect in range(self.max_redirects + 1):
+            headers = {'User-Agent': USER_AGENT}
+            meta = self.cache.get(url) if self.cache else None
+            if meta:
+                if meta['etag']:
+                    headers['If-None-Match'] = meta['etag']
+                if meta['last_modified']:
+                    headers['If-Modified-Since'] = meta['last_modified']
+            status, response_headers, body = self.send(url, headers)
+            if status in REDIRECT_CODES and 'Location' in response_headers:
+                url = urllib.parse.urljoin(url, response_headers['Location'])
+                continue
+            if status == 304 and meta:
+                cached_body = self.cache.body(url)
+                if cached_body is not None:
+                    return Response(url, cached_body, True)
+            if status >= 400 or status == 304:
+                raise urllib.error.HTTPError(url, status,
+                                             http.client.responses.get(
+                                                 status, ''),
+                                             response_headers, None)
+            if self.cache:
+                self.cache.put(url, response_headers, body)
+            return Response(url, body, False)
+        raise urllib.error.URLError(f'too many redirects: {url}')
+
+    def close(self):
+        """
+        Close the pooled connections.
+        :return: None
+        """
+        self.pool.close()
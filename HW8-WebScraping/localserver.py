@@ -0,0 +1,190 @@
+# ----------------------------------------------------------------------
+# Name:        localserver.py
+# Purpose:     Local stand-in for the faculty directory web site
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+A local stand-in HTTP server that mimics the sjsu.edu people directory
+
+The server generates an index page at /people/ that links to a given
+number of person pages, and serves each person page with a name,
+email, telephone and education section laid out like the real
+profile pages.  An optional delay is added to every response so that
+benchmarks can simulate the round-trip time of the real web site.
+Every page carries an ETag, and conditional requests for unchanged
+pages are answered with 304 Not Modified.  The FlakyHandler answers
+the first requests for each page with 503 Service Unavailable, to test
+how the scraper copes with an unreliable server.
+"""
+import collections
+import contextlib
+import hashlib
+import http.server
+import threading
+import time
+
+INDEX_PATH = '/people/'
+
+PERSON_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{first} {last}</title></head>
+<body>
+<nav><a href="/">Home</a> <a href="/people/">People</a>{menu}</nav>
+<main>
+<h1>{heading}</h1>
+<div class="contact">
+<p>{first_lower}.{last_lower}@sjsu.edu</p>
+<h3>Telephone</h3>
+<p>(408) 924-{number:04d}</p>
+</div>
+<h2>Education</h2>
+<ul><li>Ph.D., University of California, Campus {number}</li></ul>
+</main>
+</body>
+</html>
+"""
+
+
+def person_name(number):
+    """
+    Return a deterministic made-up name for the given person number.
+    :param number: (integer) the person number
+    :return: a tuple of strings representing the first and last names
+    """
+    return f'First{number}', f'Last{number}'
+
+
+def person_page(number, menu_items=0):
+    """
+    Build the html text of a single person page.
+    :param number: (integer) the person number
+    :param menu_items: (integer) number of extra navigation links, to
+                       make the page as costly to parse as a real one
+    :return: (string) the html text of the page
+    """
+    first, last = person_name(number)
+    # Alternate between the two heading styles used by the real site
+    heading = f'{last}, {first}' if number % 2 else f'{first} {last}'
+    menu = ''.join(f'\n<li><a href="/section/{item}.php">Section '
+                   f'{item}</a></li>' for item in range(menu_items))
+    return PERSON_PAGE.format(first=first, last=last, heading=heading,
+                              first_lower=first.lower(),
+                              last_lower=last.lower(), number=number,
+                              menu=menu)
+
+
+def index_page(people):
+    """
+    Build the html text of the directory index page.
+    :param people: (integer) number of person pages to link to
+    :return: (string) the html text of the page
+    """
+    links = '\n'.join(f'<li><a href="/people/person{number}/">Person '
+                      f'{number}</a></li>' for number in range(people))
+    return f'<html><body><a href="/">Home</a><ul>\n{links}\n</ul>' \
+           f'</body></html>'
+
+
+class DirectoryHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Request handler serving the stand-in directory pages.
+
+    Class attributes (set by serve):
+    people (integer): number of person pages available
+    delay (float): seconds to wait before answering each request
+    menu_items (integer): extra navigation links on each person page
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes on keep-alive
+    # connections, so Nagle would add a delayed-ACK stall to each page
+    disable_nagle_algorithm = True
+    people = 0
+    delay = 0.0
+    menu_items = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        page = self.page_for(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        body = page.encode('UTF-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'text/html; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def page_for(self, path):
+        """
+        Return the html text for the path specified.
+        :param path: (string) the request path
+        :return: (string) the page text or None if there is no such page
+        """
+        if path == INDEX_PATH:
+            return index_page(self.people)
+        if path.startswith('/people/person'):
+            number = path[len('/people/person'):].strip('/')
+            if number.isdigit() and int(number) < self.people:
+                return person_page(int(number), self.menu_items)
+        return None
+
+    def log_message(self, format, *args):
+        # Keep benchmark and test output quiet
+        pass
+
+
+class FlakyHandler(DirectoryHandler):
+    """
+    Request handler failing the first requests for every person page.
+
+    Class attributes:
+    failures (integer): how many 503 answers each page gets first
+    attempts (Counter): path: number of requests received so far
+    lock (Lock): protects attempts across the server threads
+    """
+    failures = 2
+    attempts = collections.Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.startswith('/people/person'):
+            with self.lock:
+                self.attempts[self.path] += 1
+                failing = self.attempts[self.path] <= self.failures
+            if failing:
+                self.send_error(503)
+                return
+        super().do_GET()
+
+
+@contextlib.contextmanager
+def serve(people=20, delay=0.0, handler=DirectoryHandler, menu_items=0):
+    """
+    Run the stand-in server on a free localhost port in the background.
+    :param people: (integer) number of person pages to serve
+    :param delay: (float) seconds to wait before answering each request
+    :param handler: (class) the request handler class to use
+    :param menu_items: (integer) extra navigation links on each person page
+    :return: (string) yields the url of the directory index page
+    """
+    handler_class = type('Handler', (handler,),
+                         {'people': people, 'delay': delay,
+                          'menu_items': menu_items})
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}{INDEX_PATH}'
+    finally:
+        server.shutdown()
+        server.server_close()
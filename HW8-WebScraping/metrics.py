@@ -0,0 +1,219 @@
+# ----------------------------------------------------------------------
+# Name:        metrics.py
+# Purpose:     Per-stage timing and counters for the scraping pipeline
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Records how long each stage of a harvest takes and counts its events
+
+A Metrics object keeps a latency histogram for every named stage
+(fetching, parsing, each extract function...) and a set of counters
+(bytes downloaded, pages parsed, extraction misses...).  Functions are
+timed with the timed decorator or context manager, and the summary can
+be printed as a table or exported as JSON at the end of a run.  The
+histograms use fixed buckets, so summaries from several processes can
+be merged by adding them up.
+"""
+import bisect
+import collections
+import contextlib
+import functools
+import json
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+              float('inf'))
+
+
+class Histogram:
+    """
+    Latency histogram with fixed millisecond buckets.
+
+    Attributes:
+    counts (list of integers): number of samples in each bucket
+    count (integer): number of samples
+    total (float): sum of the samples in milliseconds
+    maximum (float): largest sample in milliseconds
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, milliseconds):
+        """
+        Add a sample to the histogram.
+        :param milliseconds: (float) the latency of the sample
+        :return: None
+        """
+        self.counts[bisect.bisect_left(BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+
+    def percentile(self, fraction):
+        """
+        Return the upper bound of the bucket holding the percentile.
+        :param fraction: (float) 0.5 for the median, 0.9, 0.99...
+        :return: (float) the percentile in milliseconds
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.maximum)
+        return 0.0
+
+    def summary(self):
+        """
+        Return the histogram as a JSON compatible dictionary.
+        :return: (dictionary) count, total, mean, percentiles and buckets
+        """
+        return {'count': self.count,
+                'total_ms': round(self.total, 3),
+                'mean_ms': round(self.total / self.count, 3)
+                if self.count else 0.0,
+                'p50_ms': self.percentile(0.5),
+                'p90_ms': self.percentile(0.9),
+                'p99_ms': self.percentile(0.99),
+                'max_ms': round(self.maximum, 3),
+                'buckets': {f'<={bound}': count for bound, count in
+                            zip(BUCKETS_MS, self.counts) if count}}
+
+    def merge(self, summary):
+        """
+        Add the samples of a histogram summary from another process.
+        :param summary: (dictionary) the result of summary()
+        :return: None
+        """
+        for bound, count in summary['buckets'].items():
+            index = BUCKETS_MS.index(float(bound[2:]))
+            self.counts[index] += count
+        self.count += summary['count']
+        self.total += summary['total_ms']
+        self.maximum = max(self.maximum, summary['max_ms'])
+
+
+class Metrics:
+    """
+    Thread-safe collection of stage histograms and counters.
+
+    Attributes:
+    stages (dictionary): stage name: Histogram
+    counters (Counter): counter name: value
+    lock (Lock): protects stages and counters
+    """
+
+    def __init__(self):
+        self.stages = collections.defaultdict(Histogram)
+        self.counters = collections.Counter()
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """
+        Record the duration of one run of a stage.
+        :param stage: (string) name of the stage
+        :param seconds: (float) how long the stage took
+        :return: None
+        """
+        with self.lock:
+            self.stages[stage].add(seconds * 1000)
+
+    def count(self, name, amount=1):
+        """
+        Add to a counter.
+        :param name: (string) name of the counter
+        :param amount: (integer) how much to add
+        :return: None
+        """
+        with self.lock:
+            self.counters[name] += amount
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """
+        Context manager recording how long its block takes.
+        :param stage: (string) name of the stage
+        :return: None
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def timed(self, stage):
+        """
+        Decorator recording how long each call of a function takes.
+        :param stage: (string) name of the stage
+        :return: (function) the decorator
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        """
+        Forget every sample and counter.
+        :return: None
+        """
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def summary(self):
+        """
+        Return every histogram and counter as a JSON compatible dict.
+        :return: (dictionary) {'stages': {...}, 'counters': {...}}
+        """
+        with self.lock:
+            return {'stages': {stage: histogram.summary() for
+                               stage, histogram in self.stages.items()},
+                    'counters': dict(self.counters)}
+
+    def merge(self, summary):
+        """
+        Add a summary recorded by another process.
+        :param summary: (dictionary) the result of summary()
+        :return: None
+        """
+        with self.lock:
+            for stage, histogram in summary['stages'].items():
+                self.stages[stage].merge(histogram)
+            self.counters.update(summary['counters'])
+
+    def export(self, filename):
+        """
+        Write the summary to a JSON file.
+        :param filename: (string) name of the JSON file
+        :return: None
+        """
+        with open(filename, 'w', encoding='UTF-8') as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def report(self):
+        """
+        Print the stage latencies and counters as a table.
+        :return: None
+        """
+        summary = self.summary()
+        print(f'{"stage":20}{"count":>8}{"total s":>10}{"mean ms":>10}'
+              f'{"p50 ms":>9}{"p90 ms":>9}{"p99 ms":>9}{"max ms":>10}')
+        for stage, histogram in sorted(summary['stages'].items()):
+            print(f'{stage:20}{histogram["count"]:8d}'
+                  f'{histogram["total_ms"] / 1000:10.2f}'
+                  f'{histogram["mean_ms"]:10.2f}{histogram["p50_ms"]:9.2f}'
+                  f'{histogram["p90_ms"]:9.2f}{histogram["p99_ms"]:9.2f}'
+                  f'{histogram["max_ms"]:10.2f}')
+        for name, value in sorted(summary['counters'].items()):
+            print(f'{name:20}{value:8d}')
@@ -8,64 +8,303 @@
 Scrapes information from multiple webpages and saves it to a csv file
 
 This program scrapes information from multiple webpages, saving the info
-to a csv file. The urllib module is used to read the base url that is
-"https://sjsu.edu/people/" which contains links to multiple webpages.
+to a csv file. The httpclient module is used to read the base url that
+is "https://sjsu.edu/people/" which contains links to multiple webpages.
 The beautifulsoup module is then used to parse the url bytes as
 html text, so we can begin scraping info from it. We first get all the
 people links that are on the index webpage and store them into a list.
 After, we extract the name,email,phone number and education of each
 person using the people links list and save to a csv file on the user's
 computer
+
+usage: scrape.py [-h] [-w WORKERS] [--per-host PER_HOST] [-P PROCESSES]
+                 [--cache CACHE] [-i | --resume] [--timeout TIMEOUT]
+                 [--retries RETRIES] [--rate RATE]
+                 [--snapshot SNAPSHOT | --replay REPLAY]
+                 [--stats STATS] [--parser PARSER] filename
+positional arguments:
+  filename              name of the output csv file
+
+optional arguments:
+  -h, --help            show this help message and exit
+  -w, --workers         number of pages to fetch concurrently
+  --per-host            maximum concurrent requests to a single host
+  -P, --processes       number of processes parsing the pages
+  --cache               folder of the on-disk response cache
+  -i, --incremental     only re-extract pages changed since the last
+                        incremental run and write a _delta.csv report
+  --resume              skip the links completed by an interrupted harvest
+  --timeout             seconds to wait for a server to answer
+  --retries             how many times to retry a failed page
+  --rate                maximum requests per second
+  --snapshot            record every fetched page into this archive
+  --replay              read every page from this archive instead of
+                        the network
+  --stats               export the stage timings and counters to this
+                        JSON file (a summary table is always printed)
+  --parser              Beautiful Soup parser, lxml when installed
 """
-import urllib.request
+import argparse
+import collections
+import concurrent.futures
+import csv
+import csvsink
+import threading
 import urllib.error
 import urllib.parse
 import bs4
+import hashlib
+import httpclient
+import importlib.util
+import json
+import metrics
+import multiprocessing
 import re
-import sys
 import os
+import snapshot
 
 # Enter your constants here
 faculty_url = "https://sjsu.edu/people/"
+HEADER = ['Last Name', 'First Name', 'Email', 'Phone Number', 'Education']
+BATCH_SIZE = 50  # links completed between flushes of the csv file
 
 
-def read_url(url):
+class Pattern:
     """
-    Open the given url and return the corresponding soup object.
+    Compiled regular expression guarded by a cheap substring check.
+
+    The regular expression only runs on text containing the required
+    substring, which every match must contain, so most strings of a page
+    are rejected without entering the regex engine.
+
+    Arguments:
+    expression (string): the regular expression
+    required (string): substring every match contains, or '' if none
+    ignore_case (boolean): match regardless of case
+
+    Attributes:
+    regex (Pattern): the compiled regular expression
+    required (string): substring every match contains (lowercase when
+                       ignoring case)
+    ignore_case (boolean): lowercase the text before looking for the
+                           required substring, only when it has letters
+    """
+
+    def __init__(self, expression, required='', ignore_case=False):
+        self.regex = re.compile(expression,
+                                re.IGNORECASE if ignore_case else 0)
+        self.required = required.lower() if ignore_case else required
+        # Case cannot matter to a substring without letters, like '@'
+        self.ignore_case = ignore_case and required.lower() != \
+            required.upper()
+
+    def possible(self, text):
+        """
+        Check whether the text could contain a match.
+        :param text: (string) the text to check
+        :return: (boolean) False if the text certainly has no match
+        """
+        if self.ignore_case:
+            text = text.lower()
+        return self.required in text
+
+    def search(self, text):
+        """
+        Search the text like re.search once the pre-filter has passed.
+        :param text: (string) the text to search
+        :return: (Match) the first match or None
+        """
+        if self.possible(text):
+            return self.regex.search(text)
+        return None
+
+    def match(self, text):
+        """
+        Match the start of the text like re.match once the pre-filter
+        has passed.
+        :param text: (string) the text to match
+        :return: (Match) the match or None
+        """
+        if self.possible(text):
+            return self.regex.match(text)
+        return None
+
+
+# Registry of the patterns shared by get_people_links and the extract
+# functions, compiled once when the module is loaded
+PATTERNS = {
+    'people_link': Pattern(r'/people/+\S+', '/people/'),
+    'email': Pattern(r'\S+@\S+\.\S+(?: \(.+\))?', '@', ignore_case=True),
+    'telephone': Pattern(r'telephone', 'telephone', ignore_case=True),
+    'phone': Pattern(r"\(?\d{3}\)?\W?\d{3}\W*\d{4}"),
+}
+
+# Fastest installed html parser, see make_soup and main
+if importlib.util.find_spec('lxml') is not None:
+    soup_parser = 'lxml'
+else:
+    soup_parser = 'html.parser'
+
+# Stage latencies and counters of the pipeline, see main for the report
+stats = metrics.Metrics()
+
+# Shared keep-alive client used by every fetch, see main for the cache
+client = httpclient.HttpClient()
+
+
+def use_client(new_client):
+    """
+    Replace the client used for every fetch, for example with a
+    snapshot recorder or reader.
+    :param new_client: an object with fetch, close and cache attributes
+    like httpclient.HttpClient
+    :return: None
+    """
+    global client
+    client = new_client
+
+
+def record_failure(url, failures):
+    """
+    Count a page that could not be fetched even after retrying.
+    :param url: (string) the address of the web page
+    :param failures: (set) receives the url, or None
+    :return: None
+    """
+    stats.count('fetch_failures')
+    if failures is not None:
+        failures.add(url)
+
+
+@stats.timed('fetch')
+def fetch_page(url, failures=None):
+    """
+    Fetch the given url through the shared keep-alive client.
     :param url:(string) - the address of the web page to be read
-    :return: (Beautiful Soup object) corresponding Beautiful Soup
-    object or None if an error is encountered.
+    :param failures: (set) receives the url if it cannot be fetched, or
+                     None
+    :return: (Response) the final url and body of the page or None if
+    an error is encountered.
     """
     try:
-        with urllib.request.urlopen(url) as url_file:
-            url_bytes = url_file.read()
+        response = client.fetch(url)
     except urllib.error.URLError as url_err:
         print(f'Error opening url: {url}\n{url_err}')
+        record_failure(url, failures)
     except Exception as other_err:  # safer on the web
         print(f'Other error with url: {url}\n{other_err}')
+        record_failure(url, failures)
     else:
-        soup = bs4.BeautifulSoup(url_bytes, 'html.parser')
+        stats.count('pages_fetched')
+        stats.count('bytes_downloaded', len(response.body))
+        if response.not_modified:
+            stats.count('pages_not_modified')
+        return response
+
+
+@stats.timed('read_url')
+def read_url(url, failures=None):
+    """
+    Open the given url and return the corresponding soup object.
+    :param url:(string) - the address of the web page to be read
+    :param failures: (set) receives the url if it cannot be fetched, or
+                     None
+    :return: (Beautiful Soup object) corresponding Beautiful Soup
+    object or None if an error is encountered.
+    """
+    response = fetch_page(url, failures)
+    if response is not None:
+        soup = make_soup(response.body)
         return soup
 
 
-def get_people_links(url):
+@stats.timed('get_people_links')
+def get_people_links(url, failures=None):
     """
     Read the given url and return the relevant referenced links.
     :param url:(string) - the address of the faculty index page
+    :param failures: (set) receives the url if it cannot be fetched, or
+                     None
     :return: (list of strings) - the relevant people links
     """
     # Enter your code below and remove the pass statement
-    soup = read_url(url)
+    soup = read_url(url, failures)
 
-    pattern = r'/people/+\S+'
-    people_links = [urllib.parse.urljoin(url,
-                                         anchor.get('href', None))
-                    for anchor in soup('a') if
-                    re.match(pattern, anchor.get('href', None))]
+    pattern = PATTERNS['people_link']
+    hrefs = (anchor['href'] for anchor in soup('a', href=True))
+    people_links = [urllib.parse.urljoin(url, href) for href in hrefs
+                    if pattern.match(href)]
 
     return people_links
 
 
+def use_parser(name):
+    """
+    Select the Beautiful Soup parser used for every page.
+    :param name: (string) 'lxml', 'html.parser' or 'html5lib'
+    :return: None
+    """
+    global soup_parser
+    soup_parser = name
+
+
+@stats.timed('parse')
+def make_soup(page):
+    """
+    Parse the html specified with the configured parser.
+    :param page: (bytes) the html of the web page
+    :return: (Beautiful Soup object) the parsed page
+    """
+    return bs4.BeautifulSoup(page, soup_parser)
+
+
+def name_from_heading(heading):
+    """
+    Split the text of the page heading into the first and last name
+    :param heading: (Tag) the first h1 tag of the page
+    :return: a tuple of strings representing the first and last names
+    """
+    if "," in heading.get_text():
+        names = heading.get_text().strip().split(', ')
+        return names[0].strip(), names[1].strip()
+    names = heading.get_text().strip().split()
+    return names[-1].strip(), names[0].strip()
+
+
+def phone_after_headers(phone_headers):
+    """
+    Find the phone number following the first telephone header that is
+    followed by one.
+    :param phone_headers: (list of NavigableStrings) telephone headers
+    :return: string
+    """
+    pattern = PATTERNS['phone']
+    for phone in phone_headers:
+        phone_header_next = phone.find_next()
+        if phone_header_next:
+            match = pattern.search(phone_header_next.get_text())
+            if not match:
+                phone_text = phone_header_next.find_next()
+                match = pattern.search(phone_text.get_text())
+            if match:
+                return match.group()
+    return ''
+
+
+def education_after_header(education_header):
+    """
+    Extract the first education entry following the Education header
+    :param education_header: (Tag) the Education h2 tag
+    :return: string
+    """
+    if education_header.find_next().name == "ul":
+        result = education_header.find_next().find("li").get_text()
+    else:
+        result = education_header.find_next().get_text()
+    return result.replace(',', '-').replace('\n', ' ').strip()
+
+
+@stats.timed('extract_name')
 def extract_name(soup):
     """
     Extract the first and last name from the soup object
@@ -78,18 +317,12 @@ def extract_name(soup):
     if soup is not None:
         h1 = soup('h1')
         if len(h1) > 0:
-            if "," in h1[0].get_text():
-                names = h1[0].get_text().strip().split(', ')
-                name = names[0].strip(), names[1].strip()
-            else:
-                names = h1[0].get_text().strip().split()
-                name = names[-1].strip(), names[0].strip()
-
-            return name
+            return name_from_heading(h1[0])
 
     return "", ""
 
 
+@stats.timed('extract_email')
 def extract_email(soup):
     """
     Extracts the faculty email from the soup object
@@ -99,14 +332,14 @@ def extract_email(soup):
     """
     # Enter your code below and remove the pass statement
     if soup is not None:
-        pattern = re.compile(r'\S+@\S+\.\S+(?: \(.+\))?', re.IGNORECASE)
-        emails = soup.find_all(string=pattern)
+        emails = soup.find_all(string=PATTERNS['email'].search)
         visible = [email.get_text() for email in emails if email.get_text()]
         if visible:
             return visible[0].strip()
     return ''
 
 
+@stats.timed('extract_phone')
 def extract_phone(soup):
     """
     Extracts the faculty phone number from the soup object
@@ -114,23 +347,13 @@ def extract_phone(soup):
                 web page
     :return: string
     """
-    pattern = r"\(?\d{3}\)?\W?\d{3}\W*\d{4}"
     if soup is not None:
-        regex = re.compile(r'telephone|telephone:', re.IGNORECASE)
-        phone_header = soup.find_all(string=regex)
-        for phone in phone_header:
-            phone_header_next = phone.find_next()
-            if phone_header_next:
-                if re.search(pattern, phone_header_next.get_text()):
-                    match = re.search(pattern, phone_header_next.get_text())
-                else:
-                    phone_text = phone_header_next.find_next()
-                    match = re.search(pattern, phone_text.get_text())
-                if match:
-                    return match.group()
+        telephone = PATTERNS['telephone'].search
+        return phone_after_headers(soup.find_all(string=telephone))
     return ''
 
 
+@stats.timed('extract_education')
 def extract_education(soup):
     """
     Extracts the faculty education from the soup object
@@ -142,17 +365,164 @@ def extract_education(soup):
     if soup is not None:
         education_header = soup.find("h2", string="Education")
         if education_header:
-            if education_header.find_next().name == "ul":
-                result = education_header.find_next().find("li").get_text()
-            else:
-                result = education_header.find_next().get_text()
-            results = result.replace(',', '-').replace('\n', ' ').strip()
-
-            return results
+            return education_after_header(education_header)
 
     return ''
 
 
+@stats.timed('extract_all')
+def extract_all(soup):
+    """
+    Extract the name, email, phone and education in a single traversal
+    of the soup object.  The result is the same as calling extract_name,
+    extract_email, extract_phone and extract_education, which each walk
+    the whole document.
+    :param soup: (Beautiful Soup object) representing the faculty/staff
+                web page
+    :return: a tuple containing: a (last name, first name) tuple, the
+    email, phone and education
+    """
+    if soup is None:
+        return ("", ""), '', '', ''
+    email_pattern = PATTERNS['email']
+    telephone_pattern = PATTERNS['telephone']
+    heading = email = education_header = None
+    phone_headers = []
+    for element in soup.descendants:
+        if isinstance(element, bs4.NavigableString):
+            if email is None and email_pattern.search(element):
+                # Comments match too but have no visible text
+                if element.get_text():
+                    email = element.get_text().strip()
+            if telephone_pattern.search(element):
+                phone_headers.append(element)
+        elif element.name == 'h1':
+            if heading is None:
+                heading = element
+        elif element.name == 'h2':
+            if education_header is None and element.string == 'Education':
+                education_header = element
+
+    name = name_from_heading(heading) if heading else ("", "")
+    education = ''
+    if education_header:
+        education = education_after_header(education_header)
+    return name, email or '', phone_after_headers(phone_headers), education
+
+
+def parse_info(page):
+    """
+    Extract the information from the html of a faculty/staff web page
+    :param page: (bytes) the html of the page or None
+    :return: a tuple containing: a (last name, first name) tuple, the
+    email, phone and education
+    """
+    if page is None:
+        return extract_all(None)
+    info = extract_all(make_soup(page))
+    stats.count('pages_parsed')
+    fields = {'name': info[0][0], 'email': info[1], 'phone': info[2],
+              'education': info[3]}
+    for field, value in fields.items():
+        if not value:
+            stats.count(f'missing_{field}')
+    return info
+
+
+def info_from_json(info):
+    """
+    Convert info saved as JSON lists back into the get_info format.
+    :param info: (list) the saved [[last, first], email, phone, education]
+    :return: a tuple in the format returned by get_info
+    """
+    name, email, phone, education = info
+    return tuple(name), email, phone, education
+
+
+def fetch_record(url, previous=None, limiter=None, failures=None):
+    """
+    Fetch a faculty/staff web page and look for info that can be reused
+    because the content of the page is unchanged.
+    :param url: (string) the address of the faculty/staff web page
+    :param previous: (dictionary) url: {'hash': page hash, 'info': info}
+                     from the previous harvest
+    :param limiter: (HostLimiter) holds a slot of the host while the
+                    page is fetched, or None for no limit
+    :param failures: (set) receives the url if it cannot be fetched, or
+                     None
+    :return: a tuple (info, hash of the page content, response), where
+    info is None if the page still has to be parsed
+    """
+    known = (previous or {}).get(url)
+    if limiter is None:
+        response = fetch_page(url, failures)
+    else:
+        response = limiter.call(
+            lambda address: fetch_page(address, failures), url)
+    if response is None:
+        # Keep the previous row rather than reporting the person removed
+        if known:
+            return info_from_json(known['info']), known['hash'], None
+        return parse_info(None), None, None
+
+    digest = hashlib.sha1(response.body).hexdigest()
+    if known and known['hash'] == digest:
+        stats.count('pages_unchanged')
+        return info_from_json(known['info']), digest, response
+    if response.not_modified and client.cache:
+        # The page has not changed since it was cached: reuse the info
+        # extracted last time instead of parsing it again
+        cached = client.cache.info(response.url)
+        if cached is not None:
+            stats.count('pages_unchanged')
+            return info_from_json(cached), digest, response
+    return None, digest, response
+
+
+def remember_info(response, info):
+    """
+    Save the info parsed from a response in the response cache.
+    :param response: (Response) the response that was parsed
+    :param info: a tuple in the format returned by get_info
+    :return: None
+    """
+    if client.cache:
+        client.cache.remember(response.url, info)
+
+
+def get_record(url, previous=None, limiter=None, failures=None):
+    """
+    Fetch a faculty/staff web page and extract its information, unless
+    the content of the page is unchanged since the previous harvest.
+    :param url: (string) the address of the faculty/staff web page
+    :param previous: (dictionary) url: {'hash': page hash, 'info': info}
+                     from the previous harvest
+    :param limiter: (HostLimiter) holds a slot of the host while the
+                    page is fetched, or None for no limit
+    :param failures: (set) receives the url if it cannot be fetched, or
+                     None
+    :return: a tuple (info, hash of the page content)
+    """
+    info, digest, response = fetch_record(url, previous, limiter,
+                                          failures)
+    if info is None:
+        info = parse_info(response.body)
+        remember_info(response, info)
+    return info, digest
+
+
+def parse_worker(page):
+    """
+    Parse a page in an extract process and return the info along with
+    the stage timings and counters recorded while parsing it.
+    :param page: (bytes) the html of the page
+    :return: a tuple (info, metrics summary)
+    """
+    stats.reset()
+    info = parse_info(page)
+    return info, stats.summary()
+
+
 def get_info(url):
     """
     Extract the information from a single faculty/staff web page
@@ -165,22 +535,294 @@ def get_info(url):
     # 2.  Call extract_name, extract_email, extract_phone, and
     #     extract_education to get the relevant information
     # 3.  Combine the info in one comma seperated string and return it.
+    info, digest = get_record(url)
+    return info
+
+
+class HostLimiter:
+    """
+    Caps the number of requests in flight to any single host.
+
+    Arguments:
+    per_host (integer): maximum concurrent requests per host, at least
+                        1, or None for no limit
+
+    Attributes:
+    per_host (integer): maximum concurrent requests per host
+    semaphores (dictionary): host name: semaphore guarding that host
+    lock (Lock): protects the creation of new semaphores
+    """
+
+    def __init__(self, per_host=None):
+        if per_host is not None and per_host < 1:
+            raise ValueError(f'per_host must be at least 1, not {per_host}')
+        self.per_host = per_host
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def semaphore(self, url):
+        """
+        Return the semaphore of the host the url specified belongs to.
+        :param url: (string) the address of the web page
+        :return: (BoundedSemaphore) the semaphore for that host
+        """
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(
+                    self.per_host)
+            return self.semaphores[host]
+
+    def call(self, function, url):
+        """
+        Call function(url) once a slot for the url's host is available.
+        :param function: (function) the function to call
+        :param url: (string) the address of the web page
+        :return: the result of function(url)
+        """
+        if self.per_host is None:
+            return function(url)
+        with self.semaphore(url):
+            return function(url)
+
+
+def get_all_records(links, workers=1, per_host=None, previous=None,
+                    processes=0, failures=None):
+    """
+    Extract the information from every faculty/staff web page specified.
+    The pages are fetched by a pool of worker threads when workers is
+    more than 1, and parsed by a pool of processes when processes is
+    more than 0, but the results are always produced in the same order
+    as the links.
+    :param links: (list of strings) addresses of the faculty/staff pages
+    :param workers: (integer) number of pages to fetch concurrently
+    :param per_host: (integer) maximum concurrent requests to a single
+                     host, or None for no limit
+    :param previous: (dictionary) the state of the previous harvest
+    :param processes: (integer) number of extract processes, or 0 to
+                      parse in the fetching threads
+    :param failures: (set) receives the links that cannot be fetched,
+                     or None
+    :return: (generator) the get_record result of each link, in order
+    """
+    if processes > 0:
+        yield from extract_in_processes(links, workers, per_host, previous,
+                                        processes, failures)
+        return
+
+    def record(link):
+        return get_record(link, previous, failures=failures)
+
+    if workers <= 1:
+        yield from map(record, links)
+        return
+    limiter = HostLimiter(per_host)
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        # Only the fetch holds a slot of the host, not the parsing
+        yield from executor.map(
+            lambda link: get_record(link, previous, limiter, failures),
+            links)
+
+
+def extract_in_processes(links, workers, per_host, previous, processes,
+                         failures=None):
+    """
+    Fetch the pages with a pool of threads and parse them with a pool of
+    processes, so parsing is not limited to one core by the GIL.
+    :param links: (list of strings) addresses of the faculty/staff pages
+    :param workers: (integer) number of pages to fetch concurrently
+    :param per_host: (integer) maximum concurrent requests to a single
+                     host, or None for no limit
+    :param previous: (dictionary) the state of the previous harvest
+    :param processes: (integer) number of extract processes
+    :param failures: (set) receives the links that cannot be fetched,
+                     or None
+    :return: (generator) the get_record result of each link, in order
+    """
+    # Forking while fetching threads hold locks could deadlock the
+    # children, so start the extract processes from a clean interpreter
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        'forkserver' if 'forkserver' in methods else 'spawn')
+    limiter = HostLimiter(per_host)
+    window = processes * 4  # pages being parsed at any time
+    pending = collections.deque()
+
+    def fetch(link):
+        return fetch_record(link, previous, limiter, failures)
+
+    def finish(info, digest, response, future):
+        if future is not None:
+            info, summary = future.result()
+            stats.merge(summary)
+            remember_info(response, info)
+        return info, digest
+
+    with concurrent.futures.ThreadPoolExecutor(max(workers, 1)) as fetchers, \
+            concurrent.futures.ProcessPoolExecutor(
+                processes, context, initializer=use_parser,
+                initargs=(soup_parser,)) as parsers:
+        for info, digest, response in fetchers.map(fetch, links):
+            future = None
+            if info is None:
+                future = parsers.submit(parse_worker, response.body)
+            pending.append((info, digest, response, future))
+            if len(pending) >= window:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+
+
+def is_person(info):
+    """
+    Check whether the info extracted from a page names a person.
+    :param info: a tuple in the format returned by get_info
+    :return: (boolean) True if the info should be written as a row
+    """
+    return len(info[0]) > 1 and info[0][0] != ''
+
+
+def format_row(info):
+    """
+    Arrange the info extracted from a page as the fields of a csv row.
+    :param info: a tuple in the format returned by get_info
+    :return: (list of strings) last name, first name, email, phone and
+    education
+    """
+    return [info[0][0], info[0][1], info[1], info[2], info[3]]
+
+
+def state_filename(filename):
+    """
+    Return the name of the file holding the incremental harvest state.
+    :param filename: (string) name of the output csv file
+    :return: (string) name of the state file
+    """
+    return filename + '.state'
+
+
+def delta_filename(filename):
+    """
+    Return the name of the delta report of an incremental harvest.
+    :param filename: (string) name of the output csv file
+    :return: (string) name of the delta report
+    """
+    return os.path.splitext(filename)[0] + '_delta.csv'
+
+
+def failed_filename(filename):
+    """
+    Return the name of the log of links that could not be fetched.
+    :param filename: (string) name of the output csv file
+    :return: (string) name of the failure log
+    """
+    return os.path.splitext(filename)[0] + '_failed.txt'
+
+
+def write_failures(filename, failures):
+    """
+    Write the links that failed during the harvest to the failure log,
+    in sorted order, or remove the log of a previous harvest if every
+    link succeeded.
+    :param filename: (string) name of the output csv file
+    :param failures: (set) the links that could not be fetched
+    :return: None
+    """
+    if not failures:
+        if os.path.exists(failed_filename(filename)):
+            os.remove(failed_filename(filename))
+        return
+    with open(failed_filename(filename), 'w', encoding='UTF-8') as file:
+        file.writelines(f'{link}\n' for link in sorted(failures))
+    print(f'{len(failures)} pages could not be fetched, see '
+          f'{failed_filename(filename)}')
 
-    soup = read_url(url)
-    name = extract_name(soup)
-    email = extract_email(soup)
-    phone = extract_phone(soup)
-    education = extract_education(soup)
 
-    return name, email, phone, education
+def load_state(filename):
+    """
+    Load the state saved by the previous incremental harvest.
+    :param filename: (string) name of the output csv file
+    :return: (dictionary) url: {'hash': page hash, 'info': info}, empty
+             if there was no previous incremental harvest
+    """
+    try:
+        with open(state_filename(filename), encoding='UTF-8') as state:
+            return json.load(state)
+    except FileNotFoundError:
+        return {}
 
 
-def harvest(url, filename):
+def save_state(filename, state):
+    """
+    Save the state of this harvest for the next incremental harvest.
+    :param filename: (string) name of the output csv file
+    :param state: (dictionary) url: {'hash': page hash, 'info': info}
+    :return: None
+    """
+    temp_name = state_filename(filename) + '.tmp'
+    with open(temp_name, 'w', encoding='UTF-8') as state_file:
+        json.dump(state, state_file)
+    os.replace(temp_name, state_filename(filename))
+
+
+def write_delta(filename, previous, state):
+    """
+    Write the people added, removed or changed since the previous
+    harvest to the delta report and print a one line summary.
+    :param filename: (string) name of the output csv file
+    :param previous: (dictionary) the state of the previous harvest
+    :param state: (dictionary) the state of this harvest
+    :return: (dictionary) change: number of rows with that change
+    """
+    changes = []
+    for link, record in state.items():
+        if link not in previous:
+            changes.append(('added', link, record['info']))
+        elif previous[link]['info'] != record['info']:
+            changes.append(('changed', link, record['info']))
+    for link, record in previous.items():
+        if link not in state:
+            changes.append(('removed', link, record['info']))
+
+    with open(delta_filename(filename), 'w', newline='',
+              encoding='UTF-8') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(['Change', 'Profile URL'] + HEADER)
+        for change, link, info in changes:
+            writer.writerow([change, link] + format_row(info))
+
+    counts = {change: 0 for change in ('added', 'removed', 'changed')}
+    for change, link, info in changes:
+        counts[change] += 1
+    print(f"{counts['added']} added, {counts['removed']} removed, "
+          f"{counts['changed']} changed")
+    return counts
+
+
+@stats.timed('harvest')
+def harvest(url, filename, workers=1, per_host=None, incremental=False,
+            resume=False, processes=0):
     """
     Harvest the information starting from the url specified and write
     that information to the file specified.
+    In incremental mode, pages whose content is unchanged since the
+    previous incremental harvest are not parsed again, and the people
+    added, removed or changed are listed in a delta report.
+    Rows are flushed to disk in batches along with a checkpoint of the
+    links completed, so an interrupted harvest can be resumed.  Links
+    that could not be fetched even after retrying are listed in a
+    _failed.txt log and left out of the checkpoint, so a resumed
+    harvest tries them again.
     :param url: (string)the main faculty index url
     :param filename: (string) name of the output csv file
+    :param workers: (integer) number of pages to fetch concurrently
+    :param per_host: (integer) maximum concurrent requests to a single
+                     host, or None for no limit
+    :param incremental: (boolean) reuse the previous harvest state
+    :param resume: (boolean) skip the links completed by an interrupted
+                   harvest of the same file
+    :param processes: (integer) number of extract processes parsing the
+                      pages, or 0 to parse in the fetching threads
     :return: None
     """
     # Enter your code below and remove the pass statement
@@ -189,32 +831,112 @@ def harvest(url, filename):
     # 3.  Write the column headers to the file
     # 4.  Iterate over the links and call get_info on each one.
     # 5.  Write that information in the file
-    people_links = get_people_links(url)
-
-    with open(filename, 'w', newline='', encoding='UTF-8') as file:
-        file.write('Last Name,First Name,Email,Phone Number,Education\n')
+    if incremental and resume:
+        raise ValueError('an incremental harvest cannot be resumed')
+    failures = set()  # links that still failed after every retry
+    people_links = get_people_links(url, failures)
+    previous = load_state(filename) if incremental else {}
+    state = {}
 
-        for link in people_links:
-            info = get_info(link)
-            if len(info[0]) > 1 and info[0][0] != '':
-                file.write(f'{info[0][0]},{info[0][1]},{info[1]},{info[2]},'
-                           f'{info[3]}\n')
+    try:
+        with csvsink.CsvSink(filename, HEADER, resume,
+                             BATCH_SIZE) as sink:
+            links = [link for link in people_links
+                     if link not in sink.done]
+            records = get_all_records(links, workers, per_host, previous,
+                                      processes, failures)
+            for link, (info, digest) in zip(links, records):
+                state[link] = {'hash': digest, 'info': info}
+                if link in failures and link not in previous:
+                    continue  # not checkpointed, so a resume fetches it
+                sink.write(link,
+                           format_row(info) if is_person(info) else None)
+    finally:  # the failures so far are logged even if the harvest stops
+        write_failures(filename, failures)
+
+    if incremental:
+        # Round trip through JSON so tuples compare equal to saved lists
+        state = json.loads(json.dumps(state))
+        write_delta(filename, previous, state)
+        save_state(filename, state)
+
+
+def positive_integer(text):
+    """
+    Check that a command line argument is a positive integer.
+    :param text: (string) the argument
+    :return: (integer) the value of the argument
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{text} is not an integer')
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'{text} must be at least 1')
+    return value
 
 
 def main():
     # Enter your code below and remove the pass statement
     # Check the command line argument then call the harvest function
-
-    if len(sys.argv) != 2:
-        print('Error: Invalid number of arguments')
-        print('Usage: scrape.py filename')
-    else:
-        filename = sys.argv[1]
-
-        if not os.path.splitext(filename)[1] == ".csv":
-            print('Please specify a csv filename')
-            return
-        harvest(faculty_url, filename)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', help='name of the output csv file')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of pages to fetch concurrently')
+    parser.add_argument('--per-host', type=positive_integer, default=None,
+                        help='maximum concurrent requests to a single host')
+    parser.add_argument('-P', '--processes', type=int, default=0,
+                        help='number of processes parsing the pages')
+    parser.add_argument('--cache', default=None,
+                        help='folder of the on-disk response cache')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('-i', '--incremental', action='store_true',
+                      help='only re-extract pages changed since the last '
+                           'incremental run')
+    mode.add_argument('--resume', action='store_true',
+                      help='skip the links completed by an interrupted '
+                           'harvest')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='seconds to wait for a server to answer')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='how many times to retry a failed page')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='maximum requests per second')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--snapshot', default=None,
+                        help='record every fetched page into this archive')
+    source.add_argument('--replay', default=None,
+                        help='read every page from this archive instead '
+                             'of the network')
+    parser.add_argument('--stats', default=None,
+                        help='export the stage timings and counters to '
+                             'this JSON file')
+    parser.add_argument('--parser', default=None,
+                        help=f'Beautiful Soup parser (default: {soup_parser})')
+    arguments = parser.parse_args()
+    filename = arguments.filename
+
+    if not os.path.splitext(filename)[1] == ".csv":
+        print('Please specify a csv filename')
+        return
+    if arguments.parser:
+        use_parser(arguments.parser)
+    policy = httpclient.FetchPolicy(arguments.timeout, arguments.retries,
+                                    rate=arguments.rate)
+    use_client(httpclient.HttpClient(arguments.cache, policy=policy))
+    if arguments.replay:
+        use_client(snapshot.SnapshotReader(arguments.replay))
+    elif arguments.snapshot:
+        use_client(snapshot.RecordingClient(client, arguments.snapshot))
+    try:
+        harvest(faculty_url, filename, arguments.workers,
+                arguments.per_host, arguments.incremental, arguments.resume,
+                arguments.processes)
+    finally:
+        client.close()
+        stats.report()
+        if arguments.stats:
+            stats.export(arguments.stats)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,172 @@
+# ----------------------------------------------------------------------
+# Name:        snapshot.py
+# Purpose:     Record a crawl into one archive file and replay it offline
+#
+# Author(s): Timothy Phan & Ibrahim Dobashi
+# ----------------------------------------------------------------------
+"""
+Records every page fetched by a harvest into a single archive file
+
+The archive starts with a magic line, followed by the zlib compressed
+body of each page one after the other.  When the archive is closed a
+compressed JSON index mapping each url to the offset and length of its
+body (and to the final url after redirects) is appended, followed by a
+fixed size trailer holding the offset of the index.  A SnapshotReader
+memory-maps the archive and serves the pages from it without using the
+network, so get_people_links and get_info can be run against the same
+pages again and again.
+"""
+import json
+import mmap
+import struct
+import threading
+import urllib.error
+import zlib
+import httpclient
+
+MAGIC = b'SCRAPE-SNAPSHOT 1\n'
+TRAILER = struct.Struct('<Q16s')  # index offset, magic end marker
+END_MARKER = b'END-OF-SNAPSHOT\n'
+
+
+class SnapshotWriter:
+    """
+    Appends fetched pages to a snapshot archive.
+
+    Arguments:
+    filename (string): name of the archive file to create
+
+    Attributes:
+    file (file): the open archive file
+    index (dictionary): url: [offset, length, final url]
+    lock (Lock): serializes writes from concurrent fetches
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, 'wb')
+        self.file.write(MAGIC)
+        self.index = {}
+        self.lock = threading.Lock()
+
+    def add(self, url, response):
+        """
+        Append the body of the response fetched for the url.
+        :param url: (string) the address that was requested
+        :param response: (Response) the response that was received
+        :return: None
+        """
+        data = zlib.compress(response.body)
+        with self.lock:
+            offset = self.file.tell()
+            self.file.write(data)
+            self.index[url] = [offset, len(data), response.url]
+
+    def close(self):
+        """
+        Write the index and trailer and close the archive.
+        :return: None
+        """
+        with self.lock:
+            index_offset = self.file.tell()
+            self.file.write(zlib.compress(json.dumps(self.index).encode()))
+            self.file.write(TRAILER.pack(index_offset, END_MARKER))
+            self.file.close()
+
+
+class RecordingClient:
+    """
+    Wraps an HttpClient and saves every page it fetches to a snapshot.
+
+    Arguments:
+    client (HttpClient): the client doing the actual fetching
+    filename (string): name of the archive file to create
+
+    Attributes:
+    client (HttpClient): the client doing the actual fetching
+    writer (SnapshotWriter): the archive being written
+    """
+
+    def __init__(self, client, filename):
+        self.client = client
+        self.writer = SnapshotWriter(filename)
+
+    @property
+    def cache(self):
+        return self.client.cache
+
+    def fetch(self, url):
+        """
+        Fetch the url specified and save the response to the snapshot.
+        :param url: (string) the address of the web page
+        :return: (Response) the response of the wrapped client
+        """
+        response = self.client.fetch(url)
+        self.writer.add(url, response)
+        return response
+
+    def close(self):
+        """
+        Finish the snapshot and close the wrapped client.
+        :return: None
+        """
+        self.writer.close()
+        self.client.close()
+
+
+class SnapshotReader:
+    """
+    Serves the pages of a snapshot archive in place of an HttpClient.
+
+    Arguments:
+    filename (string): name of the archive file to read
+
+    Attributes:
+    cache: always None, the archive needs no response cache
+    file (file): the open archive file
+    map (mmap): the memory-mapped archive
+    index (dictionary): url: [offset, length, final url]
+    """
+    cache = None
+
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{filename} is not a snapshot archive')
+        if len(self.map) < len(MAGIC) + TRAILER.size or \
+                self.map[-len(END_MARKER):] != END_MARKER:
+            self.close()
+            raise ValueError(f'{filename} is an unfinished snapshot')
+        index_offset, marker = TRAILER.unpack(self.map[-TRAILER.size:])
+        self.index = json.loads(zlib.decompress(
+            self.map[index_offset:-TRAILER.size]))
+
+    def fetch(self, url):
+        """
+        Return the recorded response for the url specified.
+        :param url: (string) the address of the web page
+        :return: (Response) the recorded final url and body
+        :raises urllib.error.URLError: if the url was not recorded
+        """
+        if url not in self.index:
+            raise urllib.error.URLError(f'not in the snapshot: {url}')
+        offset, length, final_url = self.index[url]
+        body = zlib.decompress(self.map[offset:offset + length])
+        return httpclient.Response(final_url, body, False)
+
+    def pages(self):
+        """
+        Iterate over the recorded pages in the order they were fetched.
+        :return: (generator) tuples (url, body)
+        """
+        for url in sorted(self.index, key=lambda url: self.index[url][0]):
+            yield url, self.fetch(url).body
+
+    def close(self):
+        """
+        Unmap and close the archive.
+        :return: None
+        """
+        self.map.close()
+        self.file.close()
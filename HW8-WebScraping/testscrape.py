@@ -0,0 +1,424 @@
+import argparse
+import glob
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+import urllib.error
+import csvsink
+import httpclient
+import localserver
+import metrics
+import scrape
+import snapshot
+
+
+def tearDownModule():
+    scrape.client.close()
+
+
+class HarvestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.old_client = scrape.client
+        scrape.client = httpclient.HttpClient()
+
+    def tearDown(self):
+        scrape.client.close()
+        scrape.client = self.old_client
+        self.folder.cleanup()
+
+    def harvest(self, url, name, workers=1, per_host=None):
+        filename = os.path.join(self.folder.name, name)
+        scrape.harvest(url, filename, workers, per_host)
+        with open(filename, encoding='UTF-8') as csv_file:
+            return csv_file.read()
+
+    def test_harvest_rows(self):
+        """Test that harvest writes one row per person page"""
+        with localserver.serve(3) as url:
+            actual = self.harvest(url, 'people.csv')
+        expected = ('Last Name,First Name,Email,Phone Number,Education\n'
+                    'Last0,First0,first0.last0@sjsu.edu,(408) 924-0000,'
+                    'Ph.D.- University of California- Campus 0\n'
+                    'Last1,First1,first1.last1@sjsu.edu,(408) 924-0001,'
+                    'Ph.D.- University of California- Campus 1\n'
+                    'Last2,First2,first2.last2@sjsu.edu,(408) 924-0002,'
+                    'Ph.D.- University of California- Campus 2\n')
+        self.assertEqual(actual, expected)
+
+    def test_harvest_concurrent_order(self):
+        """Test that the concurrent harvest keeps the serial row order"""
+        with localserver.serve(30) as url:
+            serial = self.harvest(url, 'serial.csv')
+            concurrent = self.harvest(url, 'concurrent.csv', 8, 4)
+        self.assertEqual(serial, concurrent)
+
+    def test_per_host_at_least_one(self):
+        """Test that a per-host limit below 1 is rejected up front"""
+        for per_host in (0, -1):
+            with self.assertRaises(ValueError):
+                scrape.HostLimiter(per_host)
+            with self.assertRaises(argparse.ArgumentTypeError):
+                scrape.positive_integer(str(per_host))
+        self.assertEqual(scrape.positive_integer('2'), 2)
+
+    def test_harvest_extract_processes(self):
+        """Test that parsing in extract processes keeps the rows"""
+        with localserver.serve(12) as url:
+            serial = self.harvest(url, 'serial.csv')
+            filename = os.path.join(self.folder.name, 'processes.csv')
+            scrape.harvest(url, filename, 4, processes=2)
+        with open(filename, encoding='UTF-8') as csv_file:
+            self.assertEqual(csv_file.read(), serial)
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        scrape.stats.reset()
+
+    def test_harvest_counters(self):
+        """Test the stage counts and counters recorded by a harvest"""
+        with localserver.serve(6) as url:
+            with tempfile.TemporaryDirectory() as folder:
+                scrape.harvest(url, os.path.join(folder, 'people.csv'), 3)
+        summary = scrape.stats.summary()
+        self.assertEqual(summary['stages']['fetch']['count'], 7)
+        self.assertEqual(summary['stages']['extract_all']['count'], 6)
+        self.assertEqual(summary['counters']['pages_parsed'], 6)
+        self.assertNotIn('missing_email', summary['counters'])
+
+    def test_merge(self):
+        """Test that merging a summary adds up the histograms"""
+        first = metrics.Metrics()
+        first.record('parse', 0.003)
+        first.count('pages_parsed')
+        second = metrics.Metrics()
+        second.record('parse', 0.3)
+        second.merge(first.summary())
+        parse = second.summary()['stages']['parse']
+        self.assertEqual(parse['count'], 2)
+        self.assertEqual(parse['buckets'], {'<=5': 1, '<=500': 1})
+        self.assertEqual(second.summary()['counters'], {'pages_parsed': 1})
+
+
+class ResumeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'people.csv')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_resume_after_crash(self):
+        """Test that a resumed harvest skips the checkpointed links"""
+        get_record = scrape.get_record
+        calls = []
+
+        def crash_after_25(link, *args, **kwargs):
+            calls.append(link)
+            if len(calls) > 25:
+                raise KeyboardInterrupt
+            return get_record(link, *args, **kwargs)
+
+        with localserver.serve(40) as url, \
+                unittest.mock.patch.object(scrape, 'BATCH_SIZE', 10):
+            expected_file = os.path.join(self.folder.name, 'expected.csv')
+            scrape.harvest(url, expected_file)
+            with unittest.mock.patch.object(scrape, 'get_record',
+                                            crash_after_25):
+                with self.assertRaises(KeyboardInterrupt):
+                    scrape.harvest(url, self.filename)
+            with unittest.mock.patch.object(
+                    scrape, 'get_record', wraps=get_record) as resumed:
+                scrape.harvest(url, self.filename, resume=True)
+        self.assertEqual(resumed.call_count, 15)
+        with open(expected_file, encoding='UTF-8') as expected, \
+                open(self.filename, encoding='UTF-8') as actual:
+            self.assertEqual(actual.read(), expected.read())
+        self.assertFalse(os.path.exists(self.filename + '.checkpoint'))
+
+    def test_resume_after_failure(self):
+        """Test that a link that failed before a crash is retried"""
+        get_record = scrape.get_record
+        fetch = scrape.client.fetch
+        calls = []
+
+        def crash_after_25(link, *args, **kwargs):
+            calls.append(link)
+            if len(calls) > 25:
+                raise KeyboardInterrupt
+            return get_record(link, *args, **kwargs)
+
+        def unavailable(link):
+            if link.endswith('/person3/'):
+                raise urllib.error.URLError('503 Service Unavailable')
+            return fetch(link)
+
+        with localserver.serve(40) as url, \
+                unittest.mock.patch.object(scrape, 'BATCH_SIZE', 10):
+            expected_file = os.path.join(self.folder.name, 'expected.csv')
+            scrape.harvest(url, expected_file)
+            with unittest.mock.patch.object(scrape, 'get_record',
+                                            crash_after_25), \
+                    unittest.mock.patch.object(scrape.client, 'fetch',
+                                               unavailable):
+                with self.assertRaises(KeyboardInterrupt):
+                    scrape.harvest(url, self.filename)
+            with open(scrape.failed_filename(self.filename),
+                      encoding='UTF-8') as log:
+                self.assertEqual(log.read(), f'{url}person3/\n')
+            with unittest.mock.patch.object(
+                    scrape, 'get_record', wraps=get_record) as resumed:
+                scrape.harvest(url, self.filename, resume=True)
+        self.assertEqual(resumed.call_count, 16)
+        with open(expected_file, encoding='UTF-8') as expected, \
+                open(self.filename, encoding='UTF-8') as actual:
+            self.assertEqual(sorted(actual), sorted(expected))
+        self.assertFalse(os.path.exists(
+            scrape.failed_filename(self.filename)))
+
+    def test_resume_drops_unchecked_rows(self):
+        """Test that rows written after the last checkpoint are dropped"""
+        sink = csvsink.CsvSink(self.filename, ['Name'], batch_size=2)
+        for name in ('a', 'b', 'c'):
+            sink.write(f'url-{name}', [name])
+        sink.file.close()  # row c reaches the disk but not the checkpoint
+        sink.checkpoint.close()
+        with csvsink.CsvSink(self.filename, ['Name'], resume=True) as sink:
+            self.assertEqual(sink.done, {'url-a', 'url-b'})
+            sink.write('url-c', ['c, with a comma'])
+        with open(self.filename, encoding='UTF-8') as actual:
+            self.assertEqual(actual.read(), 'Name\na\nb\n"c, with a comma"\n')
+
+
+class FailureLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'people.csv')
+        self.old_client = scrape.client
+        localserver.FlakyHandler.attempts.clear()
+
+    def tearDown(self):
+        scrape.client.close()
+        scrape.use_client(self.old_client)
+        self.folder.cleanup()
+
+    def harvest(self, retries):
+        policy = httpclient.FetchPolicy(retries=retries, backoff=0.01)
+        scrape.use_client(httpclient.HttpClient(policy=policy))
+        with localserver.serve(4, handler=localserver.FlakyHandler) as url:
+            scrape.harvest(url, self.filename, 4)
+        with open(self.filename, encoding='UTF-8') as csv_file:
+            return url, csv_file.read().count('\n') - 1
+
+    def test_retries_keep_every_row(self):
+        """Test that retried pages are not lost from the csv file"""
+        url, rows = self.harvest(retries=2)
+        self.assertEqual(rows, 4)
+        self.assertFalse(os.path.exists(scrape.failed_filename(
+            self.filename)))
+
+    def test_failure_log(self):
+        """Test that pages failing every retry are logged"""
+        url, rows = self.harvest(retries=1)
+        self.assertEqual(rows, 0)
+        with open(scrape.failed_filename(self.filename),
+                  encoding='UTF-8') as failed:
+            logged = sorted(failed.read().split())
+        self.assertEqual(logged, [f'{url}person{number}/'
+                                  for number in range(4)])
+
+
+class ChurnHandler(localserver.DirectoryHandler):
+    # person number: replacement education of an edited page
+    edits = {}
+    # person numbers left out of the directory
+    hidden = set()
+
+    def page_for(self, path):
+        if path == localserver.INDEX_PATH:
+            return ''.join(f'<a href="/people/person{number}/">{number}</a>'
+                           for number in range(self.people)
+                           if number not in self.hidden)
+        page = super().page_for(path)
+        for number, education in self.edits.items():
+            if page and path == f'/people/person{number}/':
+                page = page.replace(f'Campus {number}', education)
+        return page
+
+
+class IncrementalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'people.csv')
+        ChurnHandler.edits = {}
+        ChurnHandler.hidden = set()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_incremental_parses_changed_pages(self):
+        """Test that only edited pages are parsed again"""
+        with localserver.serve(5, handler=ChurnHandler) as url:
+            scrape.harvest(url, self.filename, incremental=True)
+            ChurnHandler.edits = {3: 'Oxford'}
+            with unittest.mock.patch.object(
+                    scrape, 'parse_info', wraps=scrape.parse_info) as parse:
+                scrape.harvest(url, self.filename, incremental=True)
+        self.assertEqual(parse.call_count, 1)
+        with open(self.filename, encoding='UTF-8') as csv_file:
+            self.assertIn('California- Oxford', csv_file.read())
+
+    def test_incremental_delta(self):
+        """Test the added, removed and changed rows of the delta report"""
+        ChurnHandler.hidden = {3}
+        with localserver.serve(4, handler=ChurnHandler) as url:
+            scrape.harvest(url, self.filename, incremental=True)
+            ChurnHandler.hidden = {2}
+            ChurnHandler.edits = {0: 'Oxford'}
+            scrape.harvest(url, self.filename, incremental=True)
+        with open(scrape.delta_filename(self.filename),
+                  encoding='UTF-8') as delta:
+            changes = [line.split(',')[:2] for line in delta][1:]
+        self.assertEqual(changes, [['changed', url + 'person0/'],
+                                   ['added', url + 'person3/'],
+                                   ['removed', url + 'person2/']])
+
+
+class ExtractAllTestCase(unittest.TestCase):
+    def test_extract_all_fixtures(self):
+        """Test that extract_all agrees with the extract_* functions"""
+        folder = os.path.join(os.path.dirname(__file__), 'fixtures')
+        for filename in glob.glob(os.path.join(folder, '*.html')):
+            with open(filename, 'rb') as page_file:
+                soup = scrape.make_soup(page_file.read())
+            expected = (scrape.extract_name(soup), scrape.extract_email(soup),
+                        scrape.extract_phone(soup),
+                        scrape.extract_education(soup))
+            with self.subTest(filename=filename):
+                self.assertEqual(scrape.extract_all(soup), expected)
+
+    def test_extract_all_none(self):
+        """Test extract_all on a page that could not be read"""
+        self.assertEqual(scrape.extract_all(None), (('', ''), '', '', ''))
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.archive = os.path.join(self.folder.name, 'crawl.snapshot')
+        self.old_client = scrape.client
+
+    def tearDown(self):
+        scrape.use_client(self.old_client)
+        self.folder.cleanup()
+
+    def harvest(self, url, name):
+        filename = os.path.join(self.folder.name, name)
+        scrape.harvest(url, filename, 4)
+        scrape.client.close()
+        with open(filename, encoding='UTF-8') as csv_file:
+            return csv_file.read()
+
+    def test_replay_without_network(self):
+        """Test that a replayed harvest matches the recorded harvest"""
+        with localserver.serve(12) as url:
+            scrape.use_client(snapshot.RecordingClient(
+                httpclient.HttpClient(), self.archive))
+            recorded = self.harvest(url, 'recorded.csv')
+        # The server is gone, so every page must come from the archive
+        scrape.use_client(snapshot.SnapshotReader(self.archive))
+        replayed = self.harvest(url, 'replayed.csv')
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(recorded.count('\n'), 13)
+
+    def test_unfinished_snapshot(self):
+        """Test that an archive that was never closed is rejected"""
+        writer = snapshot.SnapshotWriter(self.archive)
+        writer.file.close()
+        with self.assertRaises(ValueError):
+            snapshot.SnapshotReader(self.archive)
+
+
+class HttpClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_fetch_reuses_connection(self):
+        """Test that consecutive fetches share one keep-alive connection"""
+        client = httpclient.HttpClient()
+        with localserver.serve(2) as url:
+            idle = client.pool.idle['http', url.split('/')[2]]
+            client.fetch(url + 'person0/')
+            first = list(idle)
+            client.fetch(url + 'person1/')
+            second = list(idle)
+        client.close()
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first, second)
+
+    def test_fetch_not_modified(self):
+        """Test that an unchanged page is served from the cache"""
+        client = httpclient.HttpClient(self.folder.name)
+        with localserver.serve(1) as url:
+            first = client.fetch(url + 'person0/')
+            second = client.fetch(url + 'person0/')
+        client.close()
+        self.assertFalse(first.not_modified)
+        self.assertTrue(second.not_modified)
+        self.assertEqual(first.body, second.body)
+
+    def test_fetch_retries_flaky_page(self):
+        """Test that a page failing twice is fetched on the third try"""
+        localserver.FlakyHandler.attempts.clear()
+        policy = httpclient.FetchPolicy(retries=2, backoff=0.01)
+        client = httpclient.HttpClient(policy=policy)
+        with localserver.serve(1, handler=localserver.FlakyHandler) as url:
+            response = client.fetch(url + 'person0/')
+        client.close()
+        self.assertIn(b'first0.last0@sjsu.edu', response.body)
+        self.assertEqual(sum(localserver.FlakyHandler.attempts.values()), 3)
+
+    def test_fetch_timeout(self):
+        """Test that a slow server raises a timeout instead of stalling"""
+        policy = httpclient.FetchPolicy(timeout=0.05, retries=1, backoff=0)
+        client = httpclient.HttpClient(policy=policy)
+        with localserver.serve(1, delay=0.5) as url:
+            with self.assertRaises(TimeoutError):
+                client.fetch(url + 'person0/')
+        client.close()
+
+    def test_retry_after_clipped(self):
+        """Test that a long Retry-After waits no more than max_delay"""
+        policy = httpclient.FetchPolicy(retries=3, backoff=0.5)
+        self.assertEqual(policy.max_delay, 16)
+        self.assertEqual(policy.delay(0, '2'), 2)
+        self.assertEqual(policy.delay(0, '86400'), 16)
+        policy = httpclient.FetchPolicy(max_delay=1)
+        self.assertEqual(policy.delay(0, '86400'), 1)
+        self.assertEqual(policy.delay(2), 1)
+
+    def test_rate_limit(self):
+        """Test that the token bucket spaces out the requests"""
+        bucket = httpclient.TokenBucket(rate=50)
+        start = time.monotonic()
+        for count in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_fetch_missing_page(self):
+        """Test that an error status raises HTTPError"""
+        client = httpclient.HttpClient()
+        with localserver.serve(1) as url:
+            with self.assertRaises(urllib.error.HTTPError):
+                client.fetch(url + 'person5/')
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()